@@ -0,0 +1,170 @@
+"""
+compile_button_defs.py 2026-10-18 v 1.0
+
+Author: Brent Goode
+
+Script for checking button_defs.json and making the button layout file for
+the LMS_Controller project ahead of time, so the controller does not have to
+work it out at every boot
+
+"""
+
+import argparse
+import ast
+import hashlib
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lib'))
+from button_layout import LAYOUT_FORMAT, layout_pages
+from palette import parse_color
+
+BUTTON_KEYS = ('name', 'page', 'row', 'column', 'label', 'label_font', 'color',
+               'outline_color', 'label_color', 'symbol', 'fn_name', 'arg')
+
+def find_action_names(lib_dir: str) -> dict:
+    """
+    Finds the functions a button can call without importing the device code
+    Args:
+        lib_dir: the project's lib directory
+    Returns:
+        dictionary of where each function is, 'button_action_fns' or
+        'ButtonSet', addressed by function name
+    """
+    action_names = {}
+    with open(os.path.join(lib_dir, 'button_set.py'), 'r') as file:
+        tree = ast.parse(file.read())
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef) and node.name == 'ButtonSet':
+            for item in node.body:
+                if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    action_names[item.name] = 'ButtonSet'
+    # button_action_fns is searched first on the device, so it wins
+    with open(os.path.join(lib_dir, 'button_action_fns.py'), 'r') as file:
+        tree = ast.parse(file.read())
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            action_names[node.name] = 'button_action_fns'
+    return action_names
+
+def check_buttons(buttons_defs: list, default_font: str | None, art_dir: str, action_names: dict) -> tuple:
+    """
+    Checks the button definitions for mistakes that would otherwise only be
+    found on the device
+    Returns:
+        tuple of the list of errors and the list of warnings
+    """
+    errors = []
+    warnings = []
+    addresses = set()
+    rows_seen = {}
+    for number, item in enumerate(buttons_defs):
+        where = f"button {number} ({item.get('name')})"
+        if not all(isinstance(item.get(key), int) for key in ('page', 'row', 'column')):
+            errors.append(f'{where} needs whole number page, row, and column values')
+            continue
+        address = (item['page'], item['row'], item['column'])
+        if address in addresses:
+            errors.append(f'{where} has the same page, row, and column as another button {address}')
+        addresses.add(address)
+        rows_seen.setdefault(item['page'], {}).setdefault(item['row'], []).append(item['column'])
+        for key in item:
+            if key not in BUTTON_KEYS:
+                warnings.append(f'{where} has an unknown setting {key}')
+        if item.get('fn_name') and item['fn_name'] not in action_names:
+            errors.append(f"{where} calls {item['fn_name']}, which is not in button_action_fns.py or ButtonSet")
+        if item.get('symbol') and not os.path.isfile(os.path.join(art_dir, item['symbol'])):
+            warnings.append(f"{where} has no symbol file {item['symbol']} in {art_dir}")
+        for key in ('color', 'outline_color', 'label_color'):
+            if item.get(key) is not None and parse_color(item[key]) is None:
+                warnings.append(f'{where} has an unknown {key} {item[key]}. White will be used')
+        font = item.get('label_font', default_font)
+        if item.get('label') and font and not os.path.isfile(os.path.join(art_dir, font)):
+            warnings.append(f'{where} has no font file {font} in {art_dir}. The system font will be used')
+    for page, rows in rows_seen.items():
+        if sorted(rows) != list(range(len(rows))):
+            warnings.append(f'page {page} rows are not numbered 0 to {len(rows)-1}, so some buttons will be off the screen')
+        for row, columns in rows.items():
+            if sorted(columns) != list(range(len(columns))):
+                warnings.append(f'page {page} row {row} columns are not numbered 0 to {len(columns)-1}, so some buttons will be off the screen')
+    return errors, warnings
+
+def resolve_buttons(pages: dict, art_dir: str, action_names: dict):
+    """
+    Replaces each button's font name with the path the device uses, or None
+    if the file is missing, and adds where its function is found
+    """
+    for page_layout in pages.values():
+        for row, button_width, columns in page_layout['rows']:
+            for column, x, y, button_info in columns:
+                font = button_info.pop('label_font')
+                if font and os.path.isfile(os.path.join(art_dir, font)):
+                    button_info['label_font_path'] = f'/art/{font}'
+                else:
+                    button_info['label_font_path'] = None
+                if button_info.get('fn_name'):
+                    button_info['fn_owner'] = action_names.get(button_info['fn_name'])
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--input', type=str, default='button_defs.json', help='Name of the button definitions file')
+    parser.add_argument('--output', type=str, default='button_layout.json', help='Name of the layout file to write')
+    parser.add_argument('--width', type=int, default=480, help='Screen width in pixels')
+    parser.add_argument('--height', type=int, default=480, help='Screen height in pixels')
+    parser.add_argument('--check_only', default=False, action='store_true')
+    args = parser.parse_args()
+
+    project_dir = os.path.dirname(os.path.abspath(__file__))
+    art_dir = os.path.join(project_dir, 'art')
+
+    with open(args.input, 'rb') as file:
+        source = file.read()
+    try:
+        init_data = json.loads(source)
+    except ValueError as exc:
+        print(f'ERROR: {args.input} is not valid JSON: {exc}')
+        sys.exit(1)
+    if not isinstance(init_data.get('buttons_defs'), list):
+        print(f'ERROR: {args.input} has no buttons_defs list')
+        sys.exit(1)
+
+    action_names = find_action_names(os.path.join(project_dir, 'lib'))
+    buttons_defs = init_data.pop('buttons_defs')
+    margin_ratio = init_data.pop('margin_ratio', 0.1)
+    default_color = init_data.pop('default_color', None)
+    background_color = init_data.pop('background_color', None)
+    default_font = init_data.pop('default_font', None)
+    corner_radius = init_data.pop('corner_radius', None)
+
+    errors, warnings = check_buttons(buttons_defs, default_font, art_dir, action_names)
+    for key, color in (('default_color', default_color), ('background_color', background_color)):
+        if color is not None and parse_color(color) is None:
+            warnings.append(f'{key} {color} is not a color that is understood. White will be used')
+    for warning in warnings:
+        print(f'WARNING: {warning}')
+    for error in errors:
+        print(f'ERROR: {error}')
+    if errors:
+        sys.exit(1)
+    print(f'{args.input} has {len(buttons_defs)} buttons and no errors')
+    if args.check_only:
+        sys.exit(0)
+
+    pages = layout_pages(buttons_defs, args.width, args.height, margin_ratio,
+                         corner_radius, default_font, default_color)
+    resolve_buttons(pages, art_dir, action_names)
+    layout = {"format": LAYOUT_FORMAT,
+              "source": os.path.basename(args.input),
+              "source_hash": hashlib.sha256(source).hexdigest(),
+              "display": [args.width, args.height],
+              "margin_ratio": margin_ratio,
+              "default_color": default_color,
+              "background_color": background_color,
+              "default_font": default_font,
+              "corner_radius": corner_radius,
+              "other_vars": init_data,
+              "pages": pages}
+    with open(args.output, 'w') as file:
+        json.dump(layout, file, separators=(',', ':'))
+    print(f'Wrote the layout of {len(pages)} pages to {args.output}')
@@ -1,48 +1,125 @@
 """
-generate_tz_data.py 2025-11-05 v 1.0
+generate_tz_data.py 2026-10-18 v 1.1
 
 Author: Brent Goode
 
 Script for generate time zone data file for the LMS_Controller project
 
+The data file is a compact binary file that the controller can look up a
+single time zone in without reading the whole file. All numbers are little
+endian. It is laid out as:
+    header: 4 byte magic b'TZD1', uint16 zone count, uint16 schedule count,
+        uint32 offset of the zone names, uint32 offset of the schedule table
+    zone index: one 8 byte record per zone, sorted by zone name, of uint32
+        offset of the name from the start of the zone names, uint16 name
+        length, and uint16 schedule number
+    zone names: the utf-8 zone names one after another
+    schedule table: one 8 byte record per schedule of uint32 file offset of
+        its transitions, uint16 transition count, and uint16 padding
+    transitions: for each schedule, pairs of int32 UTC transition time and
+        int32 UTC offset in seconds, sorted by time
+Zones with identical transitions share one schedule.
+
 """
 
 import argparse
-import pytz
-from datetime import datetime, timezone
 import json
+import struct
+
+TZ_MAGIC = b'TZD1'
+
+def write_tz_binary(dst_database: dict, file_name: str):
+    """
+    Writes the time zone data to a binary file in the format described above
+    Args:
+        dst_database: dictionary of {UTC transition time: UTC offset}
+            dictionaries addressed by zone name
+        file_name: path of the file to write
+    """
+    zone_names = sorted(dst_database, key=lambda name: name.encode())
+    schedules = []
+    schedule_numbers = {}
+    zone_schedules = []
+    for name in zone_names:
+        schedule = tuple(sorted((int(utc), int(offset)) for utc, offset in dst_database[name].items()))
+        if schedule not in schedule_numbers:
+            schedule_numbers[schedule] = len(schedules)
+            schedules.append(schedule)
+        zone_schedules.append(schedule_numbers[schedule])
+
+    encoded_names = [name.encode() for name in zone_names]
+    names_offset = 16 + 8*len(zone_names)
+    schedules_offset = names_offset + sum(len(name) for name in encoded_names)
+    transitions_offset = schedules_offset + 8*len(schedules)
+
+    data = bytearray(struct.pack('<4sHHII', TZ_MAGIC, len(zone_names), len(schedules),
+                                 names_offset, schedules_offset))
+    name_position = 0
+    for name, schedule_number in zip(encoded_names, zone_schedules):
+        data += struct.pack('<IHH', name_position, len(name), schedule_number)
+        name_position += len(name)
+    for name in encoded_names:
+        data += name
+    position = transitions_offset
+    for schedule in schedules:
+        data += struct.pack('<IHH', position, len(schedule), 0)
+        position += 8*len(schedule)
+    for schedule in schedules:
+        for utc, offset in schedule:
+            data += struct.pack('<ii', utc, offset)
 
-time_zone_list = pytz.all_timezones
-dst_database = {}
+    with open(file_name,'wb') as file:
+        file.write(data)
+    print(f'Wrote {len(zone_names)} time zones with {len(schedules)} distinct schedules, {len(data)} bytes, to {file_name}')
+
+def build_dst_database(time_zone_list: list) -> dict:
+    """Gets the UTC offset transitions from 2025 on for each zone in time_zone_list from pytz"""
+    import pytz
+    from datetime import datetime, timezone
+    dst_database = {}
+    for time_zone in time_zone_list:
+        tz = pytz.timezone(time_zone)
+        start = datetime(2025,1,1,0,0,0,0)
+        dst_database[time_zone] = {int(start.replace(tzinfo=timezone.utc).timestamp()):int(tz.utcoffset(start).total_seconds())}
+        try:
+            dst_info = {int(x.replace(tzinfo=timezone.utc).timestamp()):int(tz.utcoffset(x).total_seconds()) for x in tz._utc_transition_times if x.year > 2024}
+            if dst_info:
+                dst_database[time_zone] = dst_info
+        except:
+            pass
+    return dst_database
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tz', type=str, default=None, help='Enter the name of a time zone')
+    parser.add_argument('--show_time_zones', default=False, action='store_true')
+    parser.add_argument('--from_json', type=str, default=None,
+                        help='Convert a tz_data.json file made by an earlier version instead of using pytz')
+    parser.add_argument('--output', type=str, default='tz_data.bin', help='Name of the file to write')
+    args = parser.parse_args()
+
+    if args.from_json:
+        with open(args.from_json,'r') as file:
+            dst_database = json.load(file)
+        time_zone_list = list(dst_database)
+    else:
+        import pytz
+        time_zone_list = pytz.all_timezones
 
-parser = argparse.ArgumentParser()
-parser.add_argument('--tz', type=str, default=None, help='Enter the name of a time zone')
-parser.add_argument('--show_time_zones', default=False, action='store_true')
-args = parser.parse_args()
+    if args.show_time_zones:
+        print(time_zone_list)
+        exit()
 
-if args.show_time_zones:
-     print(time_zone_list)
-     exit()
+    if args.tz:
+        if args.tz not in time_zone_list:
+            print(f'Provided time zone {args.tz} not in list')
+            print('Will generate full time zone data file')
+        else:
+            time_zone_list = [args.tz]
 
-if args.tz:
-    if args.tz not in time_zone_list:
-         print(f'Provided time zone {args.tz} not in list')
-         print('Will generate full time zone data file')
+    if args.from_json:
+        dst_database = {name: dst_database[name] for name in time_zone_list}
     else:
-         time_zone_list = [args.tz]
-
-for time_zone in time_zone_list:
-    tz = pytz.timezone(time_zone)
-    start = datetime(2025,1,1,0,0,0,0)
-    dst_database[time_zone] = {int(start.replace(tzinfo=timezone.utc).timestamp()):int(tz.utcoffset(start).total_seconds())}
-    try:
-        dst_info = {int(x.replace(tzinfo=timezone.utc).timestamp()):int(tz.utcoffset(x).total_seconds()) for x in tz._utc_transition_times if x.year > 2024}
-        if dst_info:
-            dst_database[time_zone] = dst_info
-    except:
-        pass
-
-with open('tz_data.json','w') as file:
-        json.dump(dst_database,file)
-    
+        dst_database = build_dst_database(time_zone_list)
 
+    write_tz_binary(dst_database, args.output)
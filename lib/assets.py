@@ -0,0 +1,152 @@
+"""
+assets.py 2026-10-18 v 1.0
+
+Author: Brent Goode
+
+Manifest of the art files used by the buttons, made once at boot, and the
+loading of fonts into the vector renderer shared by the buttons
+
+"""
+
+import os
+import struct
+
+ART_DIR = '/art'
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+def png_dimensions(path: str) -> tuple | None:
+    """
+    Reads the width and height of a png file from the IHDR chunk at its start
+    without decoding it
+    Returns:
+        tuple of width and height or None if the file is not a png
+    """
+    with open(path, 'rb') as file:
+        header = file.read(24)
+    if len(header) == 24 and header[:8] == PNG_SIGNATURE and header[12:16] == b'IHDR':
+        return struct.unpack('>II', header[16:24])
+    return None
+
+class AssetRegistry:
+    """
+    The files in the art directory, found once at boot so buttons can check
+    their symbol and font files without opening them
+
+    Also keeps track of the font loaded into the shared vector renderer.
+    PicoVector reads the whole font file each time set_font() is called, so
+    a font is only loaded when it is not the one already loaded and
+    otherwise only its size is changed. Nothing else should set the font of
+    the shared renderer.
+
+    Attributes
+    ----------
+    directory: str
+        the art directory
+    files: dict
+        size in bytes and png width and height, or None for other files,
+        addressed by file path
+    vector: PicoVector
+        the vector renderer whose font is set by use_font()
+    font: str
+        path of the font loaded into vector
+    font_size: int
+        size the loaded font is set to
+    missing: set
+        paths of missing files that have already been reported
+
+    Methods
+    -------
+    scan()
+        makes the manifest of the files in the art directory
+    add(path: str)
+        adds a file to the manifest or updates it after the file is written
+    check(path: str, kind: str, owner: str) -> bool
+        returns whether a file is in the manifest, reporting it once if not
+    png_size(path: str) -> tuple
+        returns the width and height of a png file in the manifest
+    use_font(path: str, size: int)
+        sets the font of the vector renderer, loading the file only if needed
+    """
+
+    def __init__(self, vector, directory: str = ART_DIR):
+        """Inits AssetRegistry and scans directory"""
+        self.directory = directory
+        self.files = {}
+        self.vector = vector
+        self.font = None
+        self.font_size = None
+        self.missing = set()
+        self.scan()
+
+    def scan(self):
+        """Makes the manifest of the files in the art directory"""
+        self.files = {}
+        try:
+            names = os.listdir(self.directory)
+        except OSError as exc:
+            print(f'Can not read the art directory {self.directory}: {exc}')
+            return
+        for name in names:
+            self.add(f'{self.directory}/{name}')
+
+    def add(self, path: str):
+        """
+        Adds a file to the manifest, or updates its entry after it has been
+        written, or drops it if it is not there
+        Args:
+            path: path of the file in the art directory
+        """
+        try:
+            size = os.stat(path)[6]
+            dimensions = png_dimensions(path) if path.lower().endswith('.png') else None
+        except OSError:
+            self.files.pop(path, None)
+            return
+        if dimensions:
+            self.files[path] = (size, dimensions[0], dimensions[1])
+        else:
+            self.files[path] = (size, None, None)
+        self.missing.discard(path)
+
+    def check(self, path: str, kind: str, owner: str) -> bool:
+        """
+        Checks that a file is in the manifest. A missing file is only
+        reported the first time it is checked
+        Args:
+            path: path of the file
+            kind: what the file is for, used in the message
+            owner: what uses the file, used in the message
+        Returns:
+            True if the file is there
+        """
+        if path in self.files:
+            return True
+        if path not in self.missing:
+            print(f'No {kind} file called {path} found for {owner}.')
+            self.missing.add(path)
+        return False
+
+    def png_size(self, path: str) -> tuple | None:
+        """
+        Returns the width and height of a png file in the manifest or None
+        if it is not a png that is there
+        """
+        entry = self.files.get(path)
+        if entry and entry[1] is not None:
+            return entry[1], entry[2]
+        return None
+
+    def use_font(self, path: str, size: int):
+        """
+        Sets the font of the vector renderer. The font file is only read when
+        it is not the font already loaded
+        Args:
+            path: path of the font file
+            size: font size
+        """
+        if path != self.font:
+            self.vector.set_font(path, size)
+            self.font = path
+        elif size != self.font_size:
+            self.vector.set_font_size(size)
+        self.font_size = size
@@ -0,0 +1,58 @@
+"""
+async_loop.py 2026-10-18 v 1.0
+
+Author: Brent Goode
+
+asyncio version of the main loop where touch handling, drawing, and timers
+run as separate tasks so network requests do not block the touch screen
+
+"""
+
+import asyncio
+import utils
+from micropytimer import check_timers
+from button_set import ButtonSet
+
+async def touch_task(buttons, interval: float):
+    """Polls the touch screen and triggers button actions. With no interval
+    it only lets the other tasks run between polls, as often as the
+    synchronous main loop polls"""
+    while True:
+        buttons.touch_to_action()
+        await asyncio.sleep(interval)
+
+async def timer_task(interval: float, check):
+    """Checks the timers. Actions that are coroutines are started as their own tasks"""
+    while True:
+        check()
+        await asyncio.sleep(interval)
+
+async def draw_task(buttons, interval: float):
+    """Draws the page after a page change or the buttons that have changed"""
+    while True:
+        if ButtonSet.needs_redrawing:
+            buttons.draw_page()
+            ButtonSet.needs_redrawing = False
+        elif ButtonSet.dirty_buttons:
+            buttons.draw_dirty()
+        await asyncio.sleep(interval)
+
+async def main(buttons, interval: float, check, touch_interval: float):
+    """Starts the tasks and runs them forever"""
+    utils.async_mode = True
+    await asyncio.gather(touch_task(buttons, touch_interval),
+                         timer_task(interval, check),
+                         draw_task(buttons, interval))
+
+def run(buttons, interval: float = 0.01, check_timers=check_timers, touch_interval: float = 0):
+    """
+    Runs the main loop with asyncio
+    Args:
+        buttons: the ButtonSet object
+        interval: seconds the timer and drawing tasks wait between passes
+        check_timers: the function that checks the timers
+        touch_interval: seconds the touch task waits between polls, which
+            is none by default so touches are acted on as soon as the
+            synchronous main loop would act on them
+    """
+    asyncio.run(main(buttons, interval, check_timers, touch_interval))
@@ -0,0 +1,112 @@
+"""
+boot_profiler.py 2026-10-18 v 1.0
+
+Author: Brent Goode
+
+Times each phase of the boot sequence and the heap free around it, to find
+which phases make booting slow
+
+"""
+
+import time
+import gc
+
+class BootProfiler:
+    """
+    Records the time taken by each phase of the boot sequence and the free
+    heap before and after it
+
+    A phase ends when mark() is called with its name and the next phase
+    starts straight away, so the phases add up to the whole boot time.
+
+    Attributes
+    ----------
+    start_us: int
+        ticks_us when the profiler was made
+    last_us: int
+        ticks_us at the end of the last phase
+    last_free: int
+        heap free at the end of the last phase
+    phases: list
+        name, microseconds, heap free before and heap free after of each phase
+
+    Methods
+    -------
+    mark(name: str)
+        ends the current phase and records it under name
+    summary() -> str
+        returns a table of all the phases
+    """
+
+    def __init__(self):
+        """Inits BootProfiler and starts the first phase"""
+        self.start_us = time.ticks_us()
+        self.last_us = self.start_us
+        self.last_free = mem_free()
+        self.phases = []
+
+    def mark(self, name: str):
+        """
+        Ends the current phase and records it under name
+        Args:
+            name: what happened during the phase
+        """
+        now = time.ticks_us()
+        free = mem_free()
+        self.phases.append((name, time.ticks_diff(now, self.last_us), self.last_free, free))
+        self.last_free = free
+        self.last_us = time.ticks_us()
+
+    def summary(self) -> str:
+        """Returns a table of the time and heap free of each phase"""
+        total_us = time.ticks_diff(self.last_us, self.start_us)
+        lines = [f"{'phase':<24}{'ms':>9}{'%':>6}{'free before':>13}{'free after':>12}{'change':>9}"]
+        for name, duration_us, free_before, free_after in self.phases:
+            if total_us:
+                percent = 100*duration_us/total_us
+            else:
+                percent = 0
+            lines.append(f'{name:<24}{duration_us/1000:>9.1f}{percent:>6.1f}{free_before:>13}{free_after:>12}{free_after-free_before:>9}')
+        lines.append(f"{'total':<24}{total_us/1000:>9.1f}")
+        return '\n'.join(lines)
+
+def mem_free() -> int:
+    """Returns the free heap in bytes, or 0 where gc.mem_free() does not exist"""
+    if hasattr(gc, 'mem_free'):
+        return gc.mem_free()
+    return 0
+
+profiler = None
+
+def start():
+    """Starts profiling the boot sequence"""
+    global profiler
+    profiler = BootProfiler()
+
+def mark(name: str):
+    """Ends the current boot phase if the boot is being profiled"""
+    if profiler:
+        profiler.mark(name)
+
+def finish(show: bool = True, file_name: str | None = None):
+    """
+    Stops profiling and shows the summary table
+    Args:
+        show: whether to print the table
+        file_name: file the table is added to the end of, so boots can be
+            compared over time, or None
+    """
+    global profiler
+    if not profiler:
+        return
+    table = profiler.summary()
+    profiler = None
+    if show:
+        print(table)
+    if file_name:
+        now = time.localtime()
+        try:
+            with open(file_name, 'a') as file:
+                file.write(f'Boot at {now[0]}-{now[1]:02}-{now[2]:02} {now[3]:02}:{now[4]:02}:{now[5]:02}\n{table}\n\n')
+        except Exception as exc:
+            print(f'Error writing boot profile to {file_name}: {exc}')
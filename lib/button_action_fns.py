@@ -8,12 +8,19 @@ File containing the functions that are called when a screen button is pressed.
 """
 
 import utils
-from utils import color_converter, set_time, parse_time, show_message
+from utils import color_converter, set_time, parse_time, show_message, run_action, coroutine_action
 from micropytimer import setup_timer, start_timer, stop_timer, override_timer_expiration
 import requests
 import json
 import time
 import micropyLMS
+import lms_client
+from cover_art import CoverArt, CoverCache
+from lms_subscription import StatusSubscription
+from lms_connection import KeepAliveConnection, ControllerPlayer, PooledPlayer
+from player_state import PlayerState
+import boot_profiler
+import palette
 
 def initialize_other_vars(kwargs):
     """
@@ -26,9 +33,25 @@ def initialize_other_vars(kwargs):
         global buzzer
         buzzer = Buzzer(other_vars.pop('buzzer_pin'))
     
-    # Set the internal clock to local time, and set a timer for DST change
+    # Start setting the internal clock to local time. This finishes in the
+    # background, then sets a timer for DST change and calls time_set()
     utils.timezone = other_vars.pop('timezone','GMT')
+    utils.time_set_callbacks.append(time_set)
+    # The clock is set by a timer action, and micropytimer checks its timers
+    # by going through its registry, so timers must not be added while it
+    # does. The timers started once the clock is set are made now, stopped
+    setup_timer('dst_change',{"expiration":0,
+                              "action":"set_time",
+                              "library":"utils",
+                              "running":False,
+                              "long":True})
+    setup_timer('change_brightness',{"expiration":0,
+                                     "action":"change_brightness",
+                                     "library":"button_action_fns",
+                                     "running":False,
+                                     "long":True})
     set_time()
+    boot_profiler.mark('set time')
 
     # Setup the other timers defined in button_defs.json
     if other_vars.get('timers'):
@@ -49,22 +72,37 @@ def initialize_other_vars(kwargs):
         morning_list.append('0')
         morning = float(morning_list[0])+float(morning_list[1])/60.0
     change_brightness()
+    boot_profiler.mark('timers and brightness')
     
     # Set up the connection to the LMS server
     if other_vars.get('host'):
-        server_url = micropyLMS.build_url(other_vars.pop('host'),
+        host = other_vars.pop('host')
+        username = other_vars.pop('username',None)
+        password = other_vars.pop('password',None)
+        server_url = micropyLMS.build_url(host,
                                           other_vars.pop('prefix','http'),
                                           other_vars.pop('port','9000'),
-                                          other_vars.pop('username',None),
-                                          other_vars.pop('password',None))
+                                          username,
+                                          password)
         try:
             global player
             player_name = other_vars.pop('player',None)
             player = micropyLMS.get_player(server_url,
                                            player_name,
                                            other_vars.pop('image_scale'))
+            boot_profiler.mark('get player')
             if player:
+                keep_alive_settings = other_vars.pop('keep_alive',{})
+                if keep_alive_settings.get('enabled'):
+                    global connection
+                    connection = KeepAliveConnection(server_url,
+                                                     keep_alive_settings.get('timeout',5),
+                                                     keep_alive_settings.get('connections',1))
+                    player = PooledPlayer.from_player(player, connection)
+                else:
+                    player = ControllerPlayer.from_player(player)
                 player.status_update()
+                boot_profiler.mark('status update')
             else:
                 show_message(board_obj,"Error setting up player")
                 time.sleep(10)
@@ -81,17 +119,84 @@ def initialize_other_vars(kwargs):
             max_text_length = other_vars.pop('max_text_length')
         else:
             max_text_length = 25
+
+        # Set up the memory buffer cover art is downloaded into and the cover cache on flash
+        global cover_art, save_cover_to_flash
+        cover_cache_settings = other_vars.pop('cover_cache',{})
+        if cover_cache_settings.get('budget_bytes'):
+            cover_cache = CoverCache(cover_cache_settings.get('directory','/cover_cache'),
+                                     cover_cache_settings.get('budget_bytes'))
+        else:
+            cover_cache = None
+        prefetch_settings = other_vars.pop('cover_prefetch',{})
+        cover_art = CoverArt(other_vars.pop('cover_buffer_bytes',131072),
+                             cover_cache=cover_cache,
+                             prefetch=prefetch_settings.get('enabled',False),
+                             connection=connection)
+        if prefetch_settings.get('enabled'):
+            setup_timer('cover_prefetch',{"interval":prefetch_settings.get('delay',3000),
+                                          "action":"prefetch_next_cover",
+                                          "library":"button_action_fns",
+                                          "running":False})
+        save_cover_to_flash = other_vars.pop('save_cover_to_flash',False)
+
+        # Set up the local mirror of player flags changed by toggle buttons
+        global player_state
+        player_state_settings = other_vars.pop('player_state',{})
+        player_state = PlayerState(player, player_state_settings.get('settle_ms',3000))
+        setup_timer('player_state_check',{"interval":player_state.settle_ms,
+                                          "action":"check_player_state",
+                                          "library":"button_action_fns",
+                                          "running":False})
+
+        # Set up how the time between now playing updates follows the player
+        polling_settings = other_vars.pop('adaptive_polling',{})
+        if polling_settings.get('enabled'):
+            global adaptive_polling
+            adaptive_polling = {"base_ms":polling_settings.get('base_ms',5000),
+                                "min_ms":polling_settings.get('min_ms',1000),
+                                "max_ms":polling_settings.get('max_ms',30000),
+                                "margin_ms":polling_settings.get('margin_ms',1000),
+                                "fast_polls":polling_settings.get('fast_polls',3)}
+
+        # Set up the timer that sends repeated volume, skip, and seek presses as one command
+        global command_window
+        command_window = other_vars.pop('command_window',300)
+        if command_window:
+            setup_timer('command_flush',{"interval":command_window,
+                                         "action":"flush_commands",
+                                         "library":"button_action_fns",
+                                         "running":False})
+
+        # Subscribe to player change notifications so the status is only polled if that fails
+        subscription_settings = other_vars.pop('status_subscription',{})
+        if subscription_settings.get('enabled'):
+            global status_subscription
+            status_subscription = StatusSubscription(host,
+                                                     subscription_settings.get('cli_port',9090),
+                                                     player.player_id,
+                                                     username,
+                                                     password,
+                                                     subscription_settings.get('retry_ms',10000),
+                                                     subscription_settings.get('keepalive_ms',30000),
+                                                     subscription_settings.get('timeout_ms',5000))
+            status_subscription.connect()
+            setup_timer('status_subscription',{"interval":subscription_settings.get('interval',200),
+                                               "action":"check_status_subscription",
+                                               "library":"button_action_fns",
+                                               "running":True})
         
         # Set the clock button text to the current time
-        ButtonSet.get_button_obj((0,0,0)).label = parse_time(*time.localtime())
+        ButtonSet.get_button_obj((0,0,0)).label = clock_text()
         
         # Depending on player power set the correct starting screen
         if player.power:
             ButtonSet.current_page = 1
-            draw_now_playing()
+            run_action(draw_now_playing())
+            boot_profiler.mark('first now playing')
             player.last_update_current_track = player.current_track
             ButtonSet.needs_redrawing = False
-            start_timer('now_playing_update')
+            schedule_now_playing_update()
         else:
             ButtonSet.current_page = 0
             start_timer('check_power')
@@ -102,21 +207,22 @@ def initialize_other_vars(kwargs):
             global sync_unsync_button
             sync_unsync_button_addr = tuple([int(i) for i in sync_unsync_button_addr.split(',')])
             sync_unsync_button = ButtonSet.get_button_obj(sync_unsync_button_addr)
-            if player.synced:
-                sync_unsync_button.symbol_path = '/art/Unsync.png'
-            else:
-                sync_unsync_button.symbol_path = '/art/Sync.png'
+            show_sync_state(player.synced)
 
     # Catch any other custom variables
     if other_vars:
         for var_name, var_value in other_vars.items():
             globals()[var_name]=var_value
+    boot_profiler.mark('other setup')
 
 def change_brightness():
     """
     Checks time, dims screen between 'night' and 'morning' and sets timer
-    for the next brightness change
+    for the next brightness change. Stays bright until the clock is set
     """
+    if not utils.clock_synced:
+        board_obj.set_backlight(1)
+        return
     now = time.localtime()
     
     if now[3]+now[4]/60.0 >= night:
@@ -149,23 +255,85 @@ def change_brightness():
                                    0, 
                                    now[6], 
                                    now[7]))
-    setup_timer('change_brightness',{"expiration":change_time,
-                                     "action":"change_brightness",
-                                     "library":"button_action_fns",
-                                     "running":True,
-                                     "long":True})
+    override_timer_expiration('change_brightness', change_time - time.time())
+    start_timer('change_brightness')
 
 
-def draw_now_playing():
+connection = None
+player_state = None
+diagnostics_page = None
+page_before_diagnostics = None
+adaptive_polling = None
+poll_backoff = 0
+fast_polls = 0
+status_request = None
+command_window = 0
+pending_commands = {}
+skip_position = 0
+# Seconds into a track after which the server's rew.single goes back to the
+# start of the track instead of to the previous track
+REWIND_THRESHOLD_S = 5
+status_subscription = None
+
+async def update_status() -> bool:
+    """
+    Updates the player status. When the asyncio main loop is running the
+    request does not block, and callers while a request is still waiting for
+    its response wait for that one instead of sending another, so they all
+    act on the status it brings. Flags changed by toggle buttons are then
+    checked against the new status
+    Returns:
+        True if the status was updated
+    """
+    global status_request
+    if not utils.async_mode:
+        updated = player.status_update()
+    else:
+        if status_request is None:
+            status_request = run_action(lms_client.status_update(player))
+        request = status_request
+        try:
+            updated = await request
+        finally:
+            if status_request is request:
+                status_request = None
+    if updated and player_state:
+        player_state.reconcile()
+    return updated
+
+async def query_player(*command):
+    """
+    Sends a query from the player. When the asyncio main loop is running the
+    request does not block, so the touch screen keeps working while the
+    server answers
+    Args:
+        command: the words of the CLI command
+    Returns:
+        the result dictionary, True if the result is empty, or None if the
+        query failed
+    """
+    if utils.async_mode:
+        return await lms_client.player_query(player, *command)
+    return player.player_query(*command)
+
+async def draw_now_playing():
     """ Pulls scaled image file for cover button and resets label button text"""
-    url = player.scaled_image_url
+    cover_button = ButtonSet.get_button_obj((1,0,0))
+    last_cover_key = cover_art.key
     # NOTE: this scales down an image, but currently doesn't scale up
-    try:
-        cover_request = requests.get(url)
-        with open("art/cover.png",mode='wb') as file:
-            file.write(cover_request.content)
-    except Exception as exc:
-        print(f"Error while attempting to download cover at: {exc}")
+    if player.current_track:
+        cover_url, cover_key = track_cover(player.current_track)
+    else:
+        cover_url, cover_key = player.scaled_image_url, None
+    cover_button.symbol_data = await cover_art.fetch(cover_url, cover_key)
+    if cover_art.key != last_cover_key or not cover_button.symbol_data:
+        if cover_button.symbol_data and save_cover_to_flash:
+            try:
+                cover_art.save("art/cover.png")
+                cover_button.assets.add(cover_button.symbol_path)
+            except Exception as exc:
+                print(f"Error while attempting to save cover: {exc}")
+        cover_button.image_cache.forget(cover_button.symbol_path)
     
     label_text = ''
 
@@ -196,59 +364,198 @@ def draw_now_playing():
             remote_title = player.remote_title
         label_text += '\n' + remote_title
     
-    ButtonSet.get_button_obj((1,1,0)).label = label_text
-    ButtonSet.needs_redrawing = True
+    label_button = ButtonSet.get_button_obj((1,1,0))
+    label_button.label = label_text
+    label_button.mark_dirty()
+    cover_button.mark_dirty()
+    if cover_art.prefetch_buffer is not None:
+        start_timer('cover_prefetch')
     return
 
+def track_cover(track: dict) -> tuple:
+    """
+    Finds the scaled cover art url for a track, in the same way as the
+    player's scaled_image_url, and the key that identifies that cover.
+    Tracks from the library use their artwork id as the key and tracks
+    with their own artwork url, like remote streams, use the url
+    Args:
+        track: a track dictionary from the player's playlist
+    Returns:
+        tuple of the cover url and key
+    """
+    artwork_url = track.get('artwork_url')
+    if artwork_url:
+        if not artwork_url.startswith('http'):
+            artwork_url = player.generate_image_url('/'+artwork_url.lstrip('/'))
+        cover_url = '.'.join(artwork_url.split('.')[:-1])+f'{player.image_scale}.png'
+        return cover_url, cover_url
+    artwork_id = track.get('artwork_track_id')
+    cover_url = player.generate_image_url(f'/music/{artwork_id}/cover{player.image_scale}.png')
+    if artwork_id:
+        return cover_url, f'{artwork_id}{player.image_scale}'
+    return cover_url, cover_url
+
+@coroutine_action
+async def prefetch_next_cover():
+    """
+    Downloads the cover of the next track in the playlist ahead of the track
+    change so it can be shown without waiting. A prefetched cover is dropped
+    if the next track shown is a different one
+    """
+    if not player.power or player.remote:
+        return
+    index = player.current_index
+    playlist = player.playlist
+    if index is None or not playlist or index + 1 >= len(playlist):
+        return
+    await cover_art.prefetch(*track_cover(playlist[index + 1]))
+
 def update_clock():
     """Changes clock button text and sets next check"""
     now = time.localtime()
     
-    ButtonSet.get_button_obj((0,0,0)).label = parse_time(*now)
-    if ButtonSet.current_page == 0:
-        ButtonSet.needs_redrawing = True
+    clock_button = ButtonSet.get_button_obj((0,0,0))
+    clock_button.label = clock_text()
+    clock_button.mark_dirty()
     start_timer('clock_update')
-    if now[5] != 0:
+    if now[5] != 0 and utils.clock_synced:
         override_timer_expiration('clock_update',1000*(60-now[5]))
+
+def clock_text() -> str:
+    """Returns the time to show on the clock button, or a placeholder until the clock is set"""
+    if utils.clock_synced:
+        return parse_time(*time.localtime())
+    return '--:--'
+
+def time_set():
+    """Called once the clock is set, to show the time and set the brightness for it"""
+    update_clock()
+    change_brightness()
         
-def menu_inaction():
+@coroutine_action
+async def menu_inaction():
     """After no interaction for a time goes back to clock or now playing"""
-    player.status_update()
-    if player.power:
+    await update_status()
+    if player_state.get('power'):
         ButtonSet.jump_to_page(1)
+        tighten_polling()
         if player.last_update_current_track != player.current_track:
             player.last_update_current_track = player.current_track
-            draw_now_playing()
-        start_timer('now_playing_update')
+            await draw_now_playing()
+        schedule_now_playing_update()
     else:
         ButtonSet.jump_to_page(0)
         player.last_update_current_track =  None
         start_timer('check_power')
 
-def refresh_now_playing_screen():
+def schedule_now_playing_update():
+    """
+    Starts the now_playing_update timer. With adaptive polling the timer is
+    set to expire just after the current track should end while playing, backs
+    off while paused or stopped, and is quick for a few updates after returning
+    from the menu pages
+    """
+    start_timer('now_playing_update')
+    if adaptive_polling:
+        override_timer_expiration('now_playing_update', next_poll_interval())
+
+def next_poll_interval() -> int:
+    """
+    Works out the milliseconds until the next now playing update from the
+    last status
+    Returns:
+        the interval between min_ms and max_ms of the adaptive_polling settings
+    """
+    global poll_backoff, fast_polls
+    if fast_polls:
+        fast_polls -= 1
+        return adaptive_polling['min_ms']
+    if player.mode == 'play':
+        poll_backoff = 0
+        # Player.duration reads current_track, which is None for a moment
+        # between tracks and on an empty playlist
+        if player.current_track and player.duration and player.time is not None:
+            remaining = int(1000*(player.duration - player.time)) + adaptive_polling['margin_ms']
+            return max(adaptive_polling['min_ms'], min(adaptive_polling['max_ms'], remaining))
+        return adaptive_polling['base_ms']
+    interval = adaptive_polling['base_ms']*2**poll_backoff
+    if interval < adaptive_polling['max_ms']:
+        poll_backoff += 1
+    return min(adaptive_polling['max_ms'], interval)
+
+def tighten_polling():
+    """Makes the next few now playing updates quick after the user has made changes"""
+    global fast_polls
+    if adaptive_polling:
+        fast_polls = adaptive_polling['fast_polls']
+
+def subscribed() -> bool:
+    """Returns True if player changes are being pushed by the status subscription"""
+    return status_subscription is not None and status_subscription.connected
+
+@coroutine_action
+async def check_status_subscription():
+    """
+    Reads any notifications from the status subscription and updates the
+    screen if the player has changed. If the subscription drops, restarts
+    the polling timers until it reconnects
+    """
+    start_timer('status_subscription')
+    was_connected = status_subscription.connected
+    changed = status_subscription.poll()
+    if status_subscription.connected:
+        if changed:
+            await status_changed()
+    elif was_connected:
+        if player_state.get('power'):
+            schedule_now_playing_update()
+        else:
+            start_timer('check_power')
+
+async def status_changed():
+    """Updates the status and the clock or now playing screen after the player has changed"""
+    await update_status()
+    if player_state.get('power'):
+        if ButtonSet.current_page == 0:
+            ButtonSet.jump_to_page(1)
+        if player.last_update_current_track != player.current_track:
+            player.last_update_current_track = player.current_track
+            await draw_now_playing()
+    else:
+        player.last_update_current_track =  None
+        if ButtonSet.current_page == 1:
+            ButtonSet.jump_to_page(0)
+
+@coroutine_action
+async def refresh_now_playing_screen():
     """If on and if song has changed since last call, refreshes now playing screen"""
-    if player.power and ButtonSet.current_page == 1:
-        start_timer('now_playing_update')
-        player.status_update()
+    if subscribed():
+        return
+    if player_state.get('power') and ButtonSet.current_page == 1:
+        await update_status()
+        schedule_now_playing_update()
         if player.last_update_current_track != player.current_track:
             player.last_update_current_track = player.current_track
-            draw_now_playing()
-    elif not player.power:
+            await draw_now_playing()
+    elif not player_state.get('power'):
         ButtonSet.jump_to_page(0)
         player.last_update_current_track =  None
         start_timer('check_power')
 
-def check_power():
+@coroutine_action
+async def check_power():
     """While power is off, checks if remote source has turned the player on"""
-    player.status_update()
-    if not player.power:
+    if subscribed():
+        return
+    await update_status()
+    if not player_state.get('power'):
         start_timer('check_power')
     else:
-        ButtonSet.current_page = 1
+        ButtonSet.jump_to_page(1)
         if player.last_update_current_track != player.current_track:
             player.last_update_current_track = player.current_track
-            draw_now_playing()
-        start_timer('now_playing_update')
+            await draw_now_playing()
+        schedule_now_playing_update()
 
 def jump_to_menu():
     """If user taps screen when in power off/clock mode goes to first menu page"""
@@ -266,89 +573,165 @@ def previous_page_w_interaction():
     ButtonSet.previous_page()
     start_timer('menu_interaction')
 
-def play_pause():
+@coroutine_action
+async def play_pause():
     """Toggles play/plause"""
-    player.toggle_pause()
     start_timer('menu_interaction')
+    await update_status()
+    if player.mode == 'play':
+        await query_player('pause')
+    else:
+        await query_player('play')
 
 def previous_track():
     """Goes to begging of this track or previous track in playlist"""
-    player.player_query("button", "rew.single")
+    queue_command('skip', -1)
     start_timer('menu_interaction')
 
 def next_track():
     """Goes to next track in the playlist"""
-    player.player_query("button", "fwd.single")
+    queue_command('skip', 1)
     start_timer('menu_interaction')
 
-def play_kexp():
+def seek(seconds):
+    """Jumps forward in the current track by seconds, or back if seconds is negative"""
+    queue_command('seek', int(seconds))
+    start_timer('menu_interaction')
+
+def queue_command(name: str, amount: int):
+    """
+    Adds amount to a pending volume, skip, or seek command. The first press
+    starts the command_flush timer, and all presses until it expires are
+    sent together as one command. Sends the command straight away if
+    command_window is 0
+    Args:
+        name: 'volume', 'skip', or 'seek'
+        amount: volume change, number of tracks, or seconds
+    """
+    if name == 'skip' and name not in pending_commands:
+        global skip_position
+        skip_position = player.position()
+    if not pending_commands and command_window:
+        start_timer('command_flush')
+    pending_commands[name] = pending_commands.get(name, 0) + amount
+    if not command_window:
+        flush_commands()
+
+@coroutine_action
+async def flush_commands():
+    """Sends the pending volume, skip, and seek commands, each as a single request"""
+    volume = pending_commands.pop('volume', 0)
+    skip = pending_commands.pop('skip', 0)
+    seconds = pending_commands.pop('seek', 0)
+    if volume > 0:
+        await query_player('mixer', 'volume', f'+{volume}')
+    elif volume < 0:
+        await query_player('mixer', 'volume', str(volume))
+    if skip == 1:
+        await query_player("button", "fwd.single")
+    elif skip == -1:
+        await query_player("button", "rew.single")
+    elif skip > 1:
+        await query_player("playlist", "index", f'+{skip}')
+    elif skip < -1:
+        # Pressed one at a time, a rew.single past the rewind threshold goes
+        # back to the start of the track and the others go back a track
+        # each. The position at the first press is estimated from the last
+        # status, so a press within a moment of the threshold may be taken
+        # the other way
+        if skip_position > REWIND_THRESHOLD_S:
+            skip += 1
+        await query_player("playlist", "index", str(skip))
+    if seconds > 0:
+        await query_player("time", f'+{seconds}')
+    elif seconds < 0:
+        await query_player("time", str(seconds))
+
+@coroutine_action
+async def play_kexp():
     """
     Replaces current playlist with the remote stream of the greatest radio station in the world
     Listener powered KEXP - where the music matters. kexp.org
     """
     kexp_url = 'https://kexp.streamguys1.com/kexp160.aac'
-    player.load_url(kexp_url)
     start_timer('menu_interaction')
+    await query_player('playlist', 'load', kexp_url)
 
-def play_random_songs():
+@coroutine_action
+async def play_random_songs():
     """Replaces the current playlist with the Random Songs playlist"""
-    player.player_query("randomplay", "tracks")
     start_timer('menu_interaction')
+    await query_player("randomplay", "tracks")
 
-def play_random_album():
+@coroutine_action
+async def play_random_album():
     """Replaces the current playlist with a randomly chosen album"""
-    player.player_query("randomplay", "albums")
     start_timer('menu_interaction')
+    await query_player("randomplay", "albums")
 
-def play_random_artist():
+@coroutine_action
+async def play_random_artist():
     """Replaces the current playlist with all tracks by a randomly chosen artist"""
-    player.player_query("randomplay", "contributors")
     start_timer('menu_interaction')
+    await query_player("randomplay", "contributors")
 
-def play_favorite_number(number):
+async def play_item(item: dict):
+    """
+    Replaces the current playlist with a favorites or saved playlist item,
+    as Player.load_playlist() does for a single item
+    Args:
+        item: a dictionary with the 'url' of the item
+    """
+    if item.get('url'):
+        await query_player('playlist', 'play', item['url'])
+    else:
+        print(f'ERROR: {item.get("name")} has no url to play')
+
+@coroutine_action
+async def play_favorite_number(number):
     """
     Replaces the current playlist with the item in the favorites list at 
     the position given as the arg. List starts at 0
     Args:
         number: an int of the item in the saved playlist
     """
-    raw_favorites = player.player_query("favorites","items","0","want_url:1")
+    start_timer('menu_interaction')
+    raw_favorites = await query_player("favorites","items","0","want_url:1")
     favorites = raw_favorites.get('loop_loop')
     if number in range(len(favorites)):
-        single_item_playlist = [favorites[number]]
-        player.load_playlist(single_item_playlist)
+        await play_item(favorites[number])
     else:
         print(f'ERROR: provided favorite number {number} is our of range')
-    start_timer('menu_interaction')
 
-def play_playlist_number(number):
+@coroutine_action
+async def play_playlist_number(number):
     """
     Replaces the current playlist with the item in the saved playlists at 
     the position given as the arg. List starts at 0
     Args:
         number: an int of the item in the saved playlist
     """
-    get_count = player.player_query("playlists","0","1")
-    raw_playlists = player.player_query("playlists",
-                                        "0",
-                                        str(get_count.get('count',0)),
-                                        "tags:u")
+    start_timer('menu_interaction')
+    get_count = await query_player("playlists","0","1")
+    raw_playlists = await query_player("playlists",
+                                       "0",
+                                       str(get_count.get('count',0)),
+                                       "tags:u")
     playlists = raw_playlists.get('playlists_loop')
     if number in range(len(playlists)):
-        single_item_playlist = [playlists[number]]
-        player.load_playlist(single_item_playlist)
+        await play_item(playlists[number])
     else:
         print(f'ERROR: provided playlist number {number} is our of range')
-    start_timer('menu_interaction')
 
-def add_to_favorites():
+@coroutine_action
+async def add_to_favorites():
     """Adds the currently playing track to the favorites list"""
-    player.status_update()
+    await update_status()
     if player.remote:
         title = player.remote_title
     else:
         title = player.title
-    player.player_query('favorites', 'add', f'url:{player.url}',f'title:{title}')
+    await query_player('favorites', 'add', f'url:{player.url}',f'title:{title}')
     start_timer('menu_interaction')
 
 def goto_now_playing():
@@ -358,15 +741,14 @@ def goto_now_playing():
 
 def toggle_power():
     """Turns the player on or off"""
-    player.status_update()
-    if player.power:
+    if player_state.get('power'):
         power_off()
     else:
         power_on()
 
 def power_off():
     """turns the player off and sets local state"""
-    player.set_power(False)
+    send_toggle('power', False, set_power, power_rolled_back)
     stop_timer('menu_interaction')
     player.last_update_current_track =  None
     start_timer('check_power')
@@ -375,100 +757,209 @@ def power_off():
 
 def power_on():
     """turns the player on and sets local state"""
-    player.set_power(True)
+    send_toggle('power', True, set_power, power_rolled_back)
     start_timer('menu_interaction')
 
+def power_rolled_back(power: bool):
+    """Goes back to the now playing screen if the player did not turn off"""
+    if power:
+        stop_timer('check_power')
+        ButtonSet.jump_to_page(1)
+        player.last_update_current_track = player.current_track
+        run_action(draw_now_playing())
+        schedule_now_playing_update()
+
+def send_toggle(name: str, value: bool, command, rollback=None):
+    """
+    Records the new value of a player flag in the local mirror and sends
+    the command that sets it. The value is checked against the status from
+    the next scheduled update or subscription notification, or from a status
+    requested settle_ms later if neither has come, and rolled back as soon
+    as the command fails
+    Args:
+        name: name of the Player property, like 'power'
+        value: the value the flag is set to
+        command: async function that sends value to the server
+        rollback: function called with the server's value if it does not change
+    """
+    # The flag is recorded before the command is sent so presses made while
+    # it is waiting for the server see the new value
+    player_state.expect(name, value, rollback)
+    start_timer('player_state_check')
+    run_action(check_sent(name, command(value)))
+
+async def check_sent(name: str, request):
+    """
+    Waits for the command sent by send_toggle() and rolls the flag back if
+    it failed
+    Args:
+        name: name of the Player property, like 'power'
+        request: the coroutine sending the command
+    """
+    if await request is None:
+        player_state.rollback(name)
+
+@coroutine_action
+async def check_player_state():
+    """
+    Requests the status to check the flags set by toggle buttons when no
+    status has settled them within settle_ms, for example when the polling
+    timers are stopped while the status subscription is connected. Checks
+    again later while any are still waiting
+    """
+    if not player_state.expected:
+        return
+    await update_status()
+    if player_state.expected:
+        start_timer('player_state_check')
+
+async def set_power(power: bool):
+    """Sets the player power to on or off"""
+    return await query_player('power', int(power))
+
+async def set_muting(muting: bool):
+    """Mutes or unmutes the player"""
+    return await query_player('mixer', 'muting', int(muting))
+
 def volume_up(amount):
     """Increases player volume by amount"""
-    player.set_volume(f'+{amount}')
+    queue_command('volume', int(amount))
     start_timer('menu_interaction')
 
 def volume_down(amount):
     """Decreases player volume by amount"""
-    player.set_volume(f'-{amount}')
+    queue_command('volume', -int(amount))
     start_timer('menu_interaction')
 
 def mute():
     """mutes the player"""
-    player.status_update()
-    player.set_muting(not player.muting)
+    send_toggle('muting', not player_state.get('muting'), set_muting)
     start_timer('menu_interaction')
 
-def shuffle(mode = None):
+@coroutine_action
+async def shuffle(mode = None):
     """
     Either sets player shuffle mode to the state given as the arg or 
     goes to the next shuffle state if no arg given
     none -> song -> album -> none
     """
-    if mode:
-        player.set_shuffle(mode)
-    else:
-        player.player_query("button", "shuffle.single")
     start_timer('menu_interaction')
+    if not mode:
+        await query_player("button", "shuffle.single")
+    elif mode in micropyLMS.SHUFFLE_MODE:
+        await query_player('playlist', 'shuffle', str(micropyLMS.SHUFFLE_MODE.index(mode)))
+    else:
+        print(f'Invalid shuffle mode: {mode}')
 
-def repeat(mode = None):
+@coroutine_action
+async def repeat(mode = None):
     """
     Either sets player repeat mode to the state given as the arg or 
     goes to the next repeat state if no arg given
     none -> song -> playlist -> none
     """
-    if mode:
-        player.set_repeat(mode)
-    else:
-        player.player_query("button", "repeat")
     start_timer('menu_interaction')
+    if not mode:
+        await query_player("button", "repeat")
+    elif mode in micropyLMS.REPEAT_MODE:
+        await query_player('playlist', 'repeat', str(micropyLMS.REPEAT_MODE.index(mode)))
+    else:
+        print(f'Invalid repeat mode: {mode}')
 
-def go_to_sleep(time: int | str):
+@coroutine_action
+async def go_to_sleep(time: int | str):
     """Starts a timer for the player to shut off after a number of minutes given as arg"""
     if isinstance(time, int):
         time = str(60*time)
     elif isinstance(time,str):
         time = str(60*int(time))
-    player.player_query("sleep", time)
     start_timer('menu_interaction')
+    await query_player("sleep", time)
 
 def sync_unsync():
     """If synced, unsyncs. If unsynced, syncs to all other players"""
-    player.status_update()
-    if player.synced:
-        player.unsync()
-        sync_unsync_button.symbol_path = '/art/Sync.png'
-        #sync_unsync_button.redraw_button()
-        ButtonSet.needs_redrawing = True
-    else:
-        player.sync_to_all()
-        sync_unsync_button.symbol_path = '/art/Unsync.png'
-        #sync_unsync_button.redraw_button()
-        ButtonSet.needs_redrawing = True
+    synced = not player_state.get('synced')
+    show_sync_state(synced)
+    send_toggle('synced', synced, sync_command, show_sync_state)
     start_timer('menu_interaction')
 
-def press_button(button_name: str):
+async def sync_command(synced: bool):
+    """Syncs to all other players if synced is True, otherwise unsyncs"""
+    if not synced:
+        return await query_player("sync", "-")
+    if utils.async_mode:
+        return await lms_client.sync_to_all(player)
+    return player.sync_to_all()
+
+def show_sync_state(synced: bool):
+    """Sets the sync/unsync button icon. The button shows the opposite of the current state"""
+    if synced:
+        sync_unsync_button.symbol_path = '/art/Unsync.png'
+    else:
+        sync_unsync_button.symbol_path = '/art/Sync.png'
+    sync_unsync_button.mark_dirty()
+
+@coroutine_action
+async def press_button(button_name: str):
     """
     Issues a command to player that matches one of the remote control command
     listed in the Default.map file
     """
-    player.player_query("button", button_name)
     start_timer('menu_interaction')
+    await query_player("button", button_name)
 
-def send_command(*command):
+@coroutine_action
+async def send_command(*command):
     """
     Generic query to send a command to the LMS server with no return
     For how to structure commands see https://lyrion.org/reference/cli/using-the-cli/
     under the jsonrpc.js section and the command part of the body of the request
     """
-    player.player_query(*command)
     start_timer('menu_interaction')
+    await query_player(*command)
 
-def send_query(*query):
+@coroutine_action
+async def send_query(*query):
     """
     Generic query to send a command to the LMS server and capture the response
     For how to structure commands see https://lyrion.org/reference/cli/using-the-cli/
     under the jsonrpc.js section and the command part of the body of the request
     """
     start_timer('menu_interaction')
-    return player.player_query(*query)
+    return await query_player(*query)
     
 
+def show_diagnostics():
+    """Shows the hidden page of timing statistics if diagnostics are enabled"""
+    if diagnostics_page is None:
+        print('Diagnostics are not enabled in button_defs.json')
+        return
+    global page_before_diagnostics
+    if ButtonSet.current_page != diagnostics_page:
+        page_before_diagnostics = ButtonSet.current_page
+    stop_timer('menu_interaction')
+    ButtonSet.jump_to_page(diagnostics_page)
+    refresh_diagnostics()
+
+def refresh_diagnostics():
+    """Updates the timing statistics while the diagnostics page is shown"""
+    if ButtonSet.current_page != diagnostics_page:
+        return
+    import instrumentation
+    diagnostics_button = ButtonSet.get_button_obj((diagnostics_page,0,0))
+    diagnostics_button.label = instrumentation.report()
+    diagnostics_button.mark_dirty()
+    start_timer('diagnostics_refresh')
+
+def close_diagnostics():
+    """Goes back to the page shown before the diagnostics page"""
+    stop_timer('diagnostics_refresh')
+    if page_before_diagnostics is None or page_before_diagnostics < 2:
+        menu_inaction()
+    else:
+        ButtonSet.jump_to_page(page_before_diagnostics)
+        start_timer('menu_interaction')
+
 def light_backlight(color: str | list | tuple | None = None) -> None:
     """Lights Presto backlight to the color given by color"""
     r,g,b = color_converter(color)
@@ -493,8 +984,8 @@ def cycle_through_colors(address):
     address = tuple([int(i) for i in address.split(',')])
     this_button = ButtonSet.get_button_obj(address)
     color_cycle.append(color_cycle.pop(0))
-    this_button.outline_color = board_obj.display.create_pen(*color_converter(color_cycle[0]))
-    this_button.redraw_button()
+    this_button.outline_color = palette.get_pen(board_obj.display, color_cycle[0])
+    this_button.mark_dirty()
     
 def add_amount_to_label(address,amount):
     """
@@ -507,7 +998,7 @@ def add_amount_to_label(address,amount):
     address = tuple([int(i) for i in address.split(',')])
     this_button = ButtonSet.get_button_obj(address)
     this_button.label = str(int(this_button.label)+amount)
-    this_button.redraw_button()
+    this_button.mark_dirty()
 
 def set_label(address,text):
     """
@@ -520,7 +1011,7 @@ def set_label(address,text):
     address = tuple([int(i) for i in address.split(',')])
     this_button = ButtonSet.get_button_obj(address)
     this_button.label = str(text)
-    this_button.redraw_button()
+    this_button.mark_dirty()
 
 def http_post(url,query_data):
     """
@@ -0,0 +1,78 @@
+"""
+button_layout.py 2026-10-18 v 1.0
+
+Author: Brent Goode
+
+Button position and size calculations shared by ButtonSet on the device and
+the compile_button_defs.py script on a computer
+
+"""
+
+LAYOUT_FORMAT = 1
+
+def layout_pages(buttons_defs: list[dict],
+                 display_width: int,
+                 display_height: int,
+                 margin_ratio: float = 0.1,
+                 corner_radius: int | None = None,
+                 default_font: str | None = None,
+                 default_color: str | list | tuple | None = 'white') -> dict:
+    """
+    Works out where each button goes on its page. Each page's rows share the
+    screen height equally, and each row's buttons share its width equally,
+    with a gap of margin_ratio times the button height around every button
+    Args:
+        buttons_defs: the list of button definitions from button_defs.json
+        display_width: width of the screen in pixels
+        display_height: height of the screen in pixels
+        margin_ratio: gap between buttons as a fraction of the button height
+        corner_radius: corner radius of all buttons, or None to use the gap
+        default_font: font used by buttons that do not give one
+        default_color: color used by buttons that do not give one
+    Returns:
+        dictionary of each page's layout addressed by page number. A page's
+        layout is a dictionary with the gap, button_height, and rows, where
+        rows is a list of [row, button_width, columns] and columns is a list
+        of [column, x, y, button] with button holding the FunctionButton
+        arguments for that button
+    """
+    buttons_seen = {}
+    for item in buttons_defs:
+        if item['page'] not in buttons_seen:
+            buttons_seen[item['page']] = {}
+        if item['row'] not in buttons_seen[item['page']]:
+            buttons_seen[item['page']][item['row']] = {}
+        buttons_seen[item['page']][item['row']][item['column']] = item
+
+    pages = {}
+    for page in buttons_seen:
+        n = len(buttons_seen[page])
+        button_height = display_height/(n + margin_ratio*n + margin_ratio)
+        gap = button_height * margin_ratio
+        if not corner_radius:
+            this_page_corner_radius = gap
+        else:
+            this_page_corner_radius = corner_radius
+        rows = []
+        for row in buttons_seen[page]:
+            m = len(buttons_seen[page][row])
+            button_width = (display_width - (m+1)*gap)/m
+            columns = []
+            for column in buttons_seen[page][row]:
+                this_buttons_info = buttons_seen[page][row][column]
+                columns.append([column,
+                                gap*(column+1)+column*button_width,
+                                gap*(row+1)+row*button_height,
+                                {"name":this_buttons_info.get('name'),
+                                 "radius":this_page_corner_radius,
+                                 "label":this_buttons_info.get('label'),
+                                 "label_font":this_buttons_info.get('label_font',default_font),
+                                 "color":this_buttons_info.get('color',default_color),
+                                 "outline_color":this_buttons_info.get('outline_color'),
+                                 "label_color":this_buttons_info.get('label_color'),
+                                 "symbol":this_buttons_info.get('symbol'),
+                                 "fn_name":this_buttons_info.get('fn_name'),
+                                 "arg":this_buttons_info.get('arg')}])
+            rows.append([row, button_width, columns])
+        pages[page] = {"gap":gap, "button_height":button_height, "rows":rows}
+    return pages
@@ -9,9 +9,40 @@ Class libraries for ButtonSet and FunctionButton objects
 
 import button_action_fns
 from picovector import PicoVector, Polygon, HALIGN_CENTER
-from touch import Button
-from pngdec import PNG
-from utils import color_converter
+from utils import run_action, read_input_file
+import palette
+from button_layout import layout_pages
+import boot_profiler
+from lru_cache import LRUCache
+from image_cache import ImageCache
+from assets import AssetRegistry
+from touch_events import TouchEvents, PRESS, RELEASE, LONG_PRESS, SWIPE_LEFT, SWIPE_RIGHT
+
+def find_function(fn_name: str, owner_name: str | None = None, fn_owner: str | None = None):
+    """
+    Finds the function called fn_name in button_action_fns or failing that
+    in the ButtonSet class
+    Args:
+        fn_name: name of the function to find
+        owner_name: name of what the function is for, used in the error message
+        fn_owner: 'button_action_fns' or 'ButtonSet' if already known, as
+            found by compile_button_defs.py
+    Returns:
+        the function or None if not found
+    """
+    if fn_owner == 'button_action_fns' and hasattr(button_action_fns,fn_name):
+        return getattr(button_action_fns,fn_name)
+    if fn_owner == 'ButtonSet' and hasattr(ButtonSet,fn_name):
+        return getattr(ButtonSet,fn_name)
+    try:
+        return getattr(button_action_fns,fn_name)
+    except:
+        try:
+            return getattr(ButtonSet,fn_name)
+        except Exception as exc:
+            print(f'There is no function named {fn_name} for {owner_name}.')
+            print(exc)
+            return None
 
 class ButtonSet:
     """A collection of FunctionButton objects with addresses and dynamically calculated sizes
@@ -22,6 +53,8 @@ class ButtonSet:
     with buttons through touch and direct addressing and retrieving individual button objects
     for external interaction with its attribute. Assumes that another script called button_action_fns.py
     will exists with an initialize_other_vars()function and other action functions for each of the buttons.
+    Instead of the list of button definitions, it can be given the layout made ahead of time by
+    compile_button_defs.py, as read by utils.read_layout_file().
 
     Class Variables
     ---------------
@@ -32,10 +65,23 @@ class ButtonSet:
     min_page: int
         number of the lowest page in the buttons set
     needs_redrawing: bool
-        indicates that the draw_page need to be called
+        indicates that the page has changed and draw_page need to be called
+    dirty_buttons: list
+        FunctionButton objects on current_page that need to be drawn again
     buttons: dict
         externally accessible copy of te ButtonSet dict
-    
+    pages: dict
+        externally accessible copy of the pages dict
+    page_versions: dict
+        content version of each page, increased whenever a button on that page changes
+    page_cache: LRUCache
+        rendered frame buffers of pages addressed by page number and content version
+    cache_min_page: int
+        lowest page number whose rendered frame buffer is cached
+    uncached_pages: set
+        page numbers that are never kept in the page cache, like the hidden
+        pages added by add_page()
+
     Attributes
     ----------
     ButtonSet: dict
@@ -44,21 +90,64 @@ class ButtonSet:
         The Presto class object for the hardware interface
     display:
         The PicoGraphics class object for drawing on the screen
+    vector: PicoVector
+        the vector renderer shared by all the buttons
+    assets: AssetRegistry
+        manifest of the files in /art, made once at boot and shared by all the buttons
     background_color: str | list | tuple
         The background screen color to be displayed behind buttons
+    pages: dict
+        a tuple of the FunctionButton objects on each page addressed by page number
+    page_layouts: dict
+        per page row and column band tables used to find the button under a touch
+    touch_events: TouchEvents
+        polls the touch controller once per frame and queues touch events
+    swipe_left_fn: callable
+        function called when the screen is swiped to the left
+    swipe_right_fn: callable
+        function called when the screen is swiped to the right
+    swipe_min_page: int
+        lowest page number on which swipes trigger swipe_left_fn or swipe_right_fn
+    long_press_actions: dict
+        functions run by a long press instead of the button's own action,
+        addressed by button address
+    fired_on_press: list
+        whether the current touch of each finger has already run its
+        button's action when the finger went down
+    margin_ratio: float
+        gap between buttons as a fraction of the button height
+    default_color: str | list | tuple
+        color used by buttons that do not give one
+    default_font: str
+        font used by buttons that do not give one
+    corner_radius: int
+        corner radius of all buttons, or None to use the gap
 
     Methods
     -------
+    add_page(page_number: int, buttons_defs: list[dict], cached: bool)
+        adds a page that is not reached by next_page() or previous_page()
+    button_at(x: int, y: int) -> FunctionButton
+        returns the button on current_page at the screen position x, y
+    run_button(button: FunctionButton)
+        triggers the action of button
     touch_to_button_address() -> tuple
         returns the address of a button that was just touched
     run_addressed_button(address: tuple)
         triggers the action of the button at address
     touch_to_action()
         triggers the action of the button that was just touched
-    get_a_page(page_number: int) -> list
-        returns a list of all the FunctionButton objects on page_number
+    waits_for_lift(button: FunctionButton) -> bool
+        whether a press on button waits to be told apart from a long press or swipe
+    get_a_page(page_number: int) -> tuple
+        returns a tuple of all the FunctionButton objects on page_number
+    get_current_page() -> tuple
+        returns a tuple of all the FunctionButton objects on current_page
     draw_page()
-        clears the screen and draws the buttons on current_page
+        clears the screen and draws the buttons on current_page or copies a
+        cached rendering of it to the screen
+    draw_dirty()
+        draws only the dirty buttons and updates just the screen areas around them
 
     Class Functions
     ---------------
@@ -68,15 +157,23 @@ class ButtonSet:
         subtracts one to current page if in range and sets needs_redrawing to True
     jump_to_page(page_number: int)
         sets current page to page_number if in range and sets needs_redrawing to True
+    invalidate_page(page_number: int)
+        increases the content version of page_number so its cached rendering is not used
     """
     current_page = 0
     max_page = 0
     min_page = 0
     needs_redrawing = False
+    dirty_buttons = []
     buttons = {}
+    pages = {}
+    page_versions = {}
+    page_cache = None
+    cache_min_page = 2
+    uncached_pages = set()
 
     def __init__(self,
-                 buttons_defs: list[dict],
+                 buttons_defs: list[dict] | dict,
                  board_obj,
                  margin_ratio: float | None = 0.1,
                  default_color: str | list | tuple | None = 'white',
@@ -87,8 +184,41 @@ class ButtonSet:
         """Inits ButtonSet with defaults for nonessential attributes."""
 
         self.ButtonSet: dict | None = None
+        self.pages = {}
+        self.page_layouts = {}
+        self.long_press_actions = {}
+        self.fired_on_press = [False, False]
         self.board_obj = board_obj
         self.display = board_obj.display
+        self.margin_ratio = margin_ratio
+        self.default_color = default_color
+        self.default_font = default_font
+        self.corner_radius = corner_radius
+        
+        touch_settings = kwargs.get('other_vars',{}).pop('touch',{})
+        self.touch_events = TouchEvents(board_obj.touch,
+                                        touch_settings.get('debounce_ms',30),
+                                        touch_settings.get('long_press_ms',600),
+                                        touch_settings.get('swipe_distance',80))
+        self.swipe_left_fn = find_function(touch_settings.get('swipe_left','next_page'),'swipe left')
+        self.swipe_right_fn = find_function(touch_settings.get('swipe_right','previous_page'),'swipe right')
+
+        cache_settings = kwargs.get('other_vars',{}).pop('page_cache',{})
+        if cache_settings.get('budget_bytes'):
+            ButtonSet.page_cache = LRUCache(cache_settings.get('budget_bytes'))
+            ButtonSet.cache_min_page = cache_settings.get('min_page',2)
+            self.framebuffer = memoryview(self.display)
+
+        image_settings = kwargs.get('other_vars',{}).pop('image_cache',{})
+        FunctionButton.image_cache = ImageCache(self.display, image_settings.get('budget_bytes',262144))
+
+        self.vector = PicoVector(self.display)
+        FunctionButton.board_obj = board_obj
+        FunctionButton.display = self.display
+        FunctionButton.vector = self.vector
+        self.assets = AssetRegistry(self.vector)
+        FunctionButton.assets = self.assets
+        boot_profiler.mark('asset scan')
         
         button_action_fns.board_obj = board_obj
         button_action_fns.ButtonSet = ButtonSet
@@ -99,57 +229,121 @@ class ButtonSet:
             self.background_color = background_color
         else:
             self.background_color = "black"
+        self.background_pen = palette.get_pen(self.display, self.background_color)
+        FunctionButton.background_pen = self.background_pen
             
-        if buttons_defs:
-            buttons_seen = {}
-            self.ButtonSet = {}
+        if isinstance(buttons_defs, dict):
+            if buttons_defs.get('display') == [display_width, display_height]:
+                pages = buttons_defs['pages']
+            else:
+                print(f"{buttons_defs.get('source')} was compiled for a different screen size. Laying out buttons again.")
+                pages = layout_pages(read_input_file(buttons_defs['source'])[0],
+                                     display_width,
+                                     display_height,
+                                     margin_ratio,
+                                     corner_radius,
+                                     default_font,
+                                     default_color)
+        elif buttons_defs:
+            pages = layout_pages(buttons_defs,
+                                 display_width,
+                                 display_height,
+                                 margin_ratio,
+                                 corner_radius,
+                                 default_font,
+                                 default_color)
+        else:
+            pages = None
 
-            for item in buttons_defs:
-                address = (item['page'],item['row'],item['column'])
-                if item['page'] not in buttons_seen:
-                    buttons_seen[item['page']] = {}
-                if item['row'] not in buttons_seen[item['page']]:
-                    buttons_seen[item['page']][item['row']] = {}
-                buttons_seen[item['page']][item['row']][item['column']] = item
-                if item['page'] > ButtonSet.max_page:
-                    ButtonSet.max_page = item['page']
-                if item['page'] < ButtonSet.min_page:
-                    ButtonSet.min_page = item['page']
-            
-            for page in buttons_seen:
-                n = len(buttons_seen[page])
-                button_height = display_height/(n + margin_ratio*n + margin_ratio)
-                gap = button_height * margin_ratio
-                if not corner_radius:
-                    this_page_corner_radius = gap
-                else:
-                    this_page_corner_radius = corner_radius
-                for row in buttons_seen[page]:
-                    m = len(buttons_seen[page][row])
-                    button_width = (display_width - (m+1)*gap)/m
-                    for column in buttons_seen[page][row]:
-                        address = (page,row,column)
-                        this_buttons_info = buttons_seen[page][row][column]
-                        self.ButtonSet[address] = \
-                                FunctionButton(gap*(column+1)+column*button_width,
-                                               gap*(row+1)+row*button_height,
-                                               button_width,
-                                               button_height,
-                                               address,
-                                               board_obj,
-                                               this_buttons_info.get('name'),
-                                               this_page_corner_radius,
-                                               this_buttons_info.get('label'),
-                                               this_buttons_info.get('label_font',default_font),
-                                               this_buttons_info.get('color',default_color),
-                                               this_buttons_info.get('outline_color'),
-                                               this_buttons_info.get('label_color'),
-                                               this_buttons_info.get('symbol'),
-                                               this_buttons_info.get('fn_name'),
-                                               this_buttons_info.get('arg'))
+        if pages:
+            self.ButtonSet = {}
+            for page in pages:
+                if int(page) > ButtonSet.max_page:
+                    ButtonSet.max_page = int(page)
+                if int(page) < ButtonSet.min_page:
+                    ButtonSet.min_page = int(page)
+            self.build_pages(pages)
         ButtonSet.buttons = self.ButtonSet
+        ButtonSet.pages = self.pages
+        self.swipe_min_page = touch_settings.get('swipe_min_page',ButtonSet.min_page)
+        boot_profiler.mark('button setup')
         button_action_fns.initialize_other_vars(kwargs)
         
+    def build_pages(self, pages: dict):
+        """
+        Makes the FunctionButton objects for pages laid out by
+        button_layout.layout_pages() and the tables used to find them by touch
+        Args:
+            pages: dictionary of page layouts addressed by page number
+        """
+        for page, page_layout in pages.items():
+            page = int(page)
+            gap = page_layout['gap']
+            button_height = page_layout['button_height']
+            page_buttons = []
+            row_bands = {}
+            for row, button_width, columns in page_layout['rows']:
+                column_bands = {}
+                row_bands[row] = (button_width, column_bands)
+                for column, x, y, button_info in columns:
+                    address = (page,row,column)
+                    self.ButtonSet[address] = FunctionButton(x,
+                                                             y,
+                                                             button_width,
+                                                             button_height,
+                                                             address,
+                                                             **button_info)
+                    column_bands[column] = self.ButtonSet[address]
+                    page_buttons.append(self.ButtonSet[address])
+            self.pages[page] = tuple(page_buttons)
+            self.page_layouts[page] = (gap, button_height, row_bands)
+
+    def add_page(self, page_number: int, buttons_defs: list[dict], cached: bool = False):
+        """
+        Adds a hidden page of buttons after setup. The page is outside of
+        min_page to max_page, so it is only shown by jump_to_page()
+        Args:
+            page_number: number of the new page
+            buttons_defs: button definitions like those in button_defs.json
+            cached: whether the page may be kept in the page cache. Hidden
+                pages are usually redrawn often, like the diagnostics page,
+                so by default they are left out and do not push the menu
+                pages out of the cache
+        """
+        if not cached:
+            ButtonSet.uncached_pages.add(page_number)
+        display_width, display_height = self.display.get_bounds()
+        self.build_pages(layout_pages(buttons_defs,
+                                      display_width,
+                                      display_height,
+                                      self.margin_ratio,
+                                      self.corner_radius,
+                                      self.default_font,
+                                      self.default_color))
+
+    def button_at(self, x: int, y: int):
+        """
+        Finds the button on the current page that covers a screen position
+        using the row and column bands calculated at setup
+        Args:
+            x: horizontal screen position
+            y: vertical screen position
+        Returns:
+            the FunctionButton object at x, y or None if the position is in a gap
+        """
+        layout = self.page_layouts.get(ButtonSet.current_page)
+        if not layout:
+            return None
+        gap, button_height, row_bands = layout
+        row = int((y - gap) // (button_height + gap))
+        if row not in row_bands or y - gap*(row+1) - row*button_height > button_height:
+            return None
+        button_width, column_bands = row_bands[row]
+        column = int((x - gap) // (button_width + gap))
+        if column not in column_bands or x - gap*(column+1) - column*button_width > button_width:
+            return None
+        return column_bands[column]
+
     def touch_to_button_address(self) -> tuple | None:
         """
         Converts a touch on the screen to the button address tuple
@@ -159,9 +353,15 @@ class ButtonSet:
         Returns:
              address tuple with page, row, and column of the button pressed
         """
-        for button in self.get_current_page():
-            if button.just_pressed():
-                return button.address
+        self.touch_events.poll()
+        event = self.touch_events.get_event()
+        while event:
+            kind, finger, x, y = event
+            if kind == RELEASE or kind == LONG_PRESS:
+                button = self.button_at(x, y)
+                if button:
+                    return button.address
+            event = self.touch_events.get_event()
         return None
 
     def run_addressed_button(self, address:tuple):
@@ -172,58 +372,99 @@ class ButtonSet:
         Returns:
             whatever the triggered function returns
         """
-        button = self.ButtonSet.get(address)
+        return self.run_button(self.ButtonSet.get(address))
+
+    def run_button(self, button):
+        """
+        Triggers the action tied to the button given as an input. Actions
+        that are coroutines are run with utils.run_action()
+        Args:
+            button: the FunctionButton object whose action is triggered
+        Returns:
+            whatever the triggered function returns
+        """
         if button.fn:
             if button.arg is not None:
                 if list is type(button.arg):
-                    return button.fn(*button.arg)
+                    return run_action(button.fn(*button.arg))
                 else:
-                    return button.fn(button.arg)
+                    return run_action(button.fn(button.arg))
             else:
-                return button.fn()
+                return run_action(button.fn())
 
     def touch_to_action(self) -> None:
         """
-        Triggers the action tied to the button that was touched
+        Polls the touch controller once and triggers the actions for the
+        queued touch events. A button triggers its action as soon as it is
+        pressed, unless it has a long press action or the page can be swiped,
+        when the action waits for the finger to lift or be held so a long
+        press or swipe can be told apart from a tap. A long press on a button
+        with a long press action triggers that instead, and a swipe triggers
+        swipe_left_fn or swipe_right_fn.
         Args:
             None
         Returns:
-            whatever the triggered function returns
+            whatever the last triggered function returns
         """
-        for button in self.get_current_page():
-            if button.just_pressed() and button.fn:
-                if button.arg is not None:
-                    if list is type(button.arg):
-                        return button.fn(*button.arg)
-                    else:
-                        return button.fn(button.arg)
-                else:
-                    return button.fn()
+        self.touch_events.poll()
+        result = None
+        event = self.touch_events.get_event()
+        while event:
+            kind, finger, x, y = event
+            if kind == PRESS:
+                button = self.button_at(x, y)
+                self.fired_on_press[finger] = bool(button) and not self.waits_for_lift(button)
+                if self.fired_on_press[finger]:
+                    result = self.run_button(button)
+            elif self.fired_on_press[finger]:
+                # The action has run already, and the touch may now be over another page
+                pass
+            elif kind == LONG_PRESS and self.long_press_actions:
+                button = self.button_at(x, y)
+                if button and button.address in self.long_press_actions:
+                    result = run_action(self.long_press_actions[button.address]())
+                elif button:
+                    result = self.run_button(button)
+            elif kind == RELEASE or kind == LONG_PRESS:
+                button = self.button_at(x, y)
+                if button:
+                    result = self.run_button(button)
+            elif ButtonSet.current_page >= self.swipe_min_page:
+                if kind == SWIPE_LEFT and self.swipe_left_fn:
+                    result = run_action(self.swipe_left_fn())
+                elif kind == SWIPE_RIGHT and self.swipe_right_fn:
+                    result = run_action(self.swipe_right_fn())
+            event = self.touch_events.get_event()
+        return result
+
+    def waits_for_lift(self, button) -> bool:
+        """
+        Returns True if a press on button has to wait to see if it becomes a
+        long press or swipe before triggering the button's action
+        Args:
+            button: the FunctionButton object pressed
+        """
+        if button.address in self.long_press_actions:
+            return True
+        return ButtonSet.current_page >= self.swipe_min_page and \
+               bool(self.swipe_left_fn or self.swipe_right_fn)
 
-    def get_a_page(self,page_number: int) -> list:
+    def get_a_page(self,page_number: int) -> tuple:
         """
-        Returns a list of FunctionButton objects that are all the button on the page given as an input
+        Returns a tuple of FunctionButton objects that are all the button on the page given as an input
         Args:
             page_number: the int page number whose buttons are to be returned
         Returns:
-            a list of FunctionButton objects
+            a tuple of FunctionButton objects
         """
-        return_list = []
-        for button in self.ButtonSet:
-            if button[0] == page_number:
-                return_list.append(self.ButtonSet[button])
-        return return_list
+        return self.pages.get(page_number, ())
 
-    def get_current_page(self) -> list:
+    def get_current_page(self) -> tuple:
         """
-        Returns a list of FunctionButton objects that are all the button on the current page
-            Returns: a list of FunctionButton objects
+        Returns a tuple of FunctionButton objects that are all the button on the current page
+            Returns: a tuple of FunctionButton objects
         """
-        return_list = []
-        for button in self.ButtonSet:
-            if button[0] == ButtonSet.current_page:
-                return_list.append(self.ButtonSet[button])
-        return return_list
+        return self.pages.get(ButtonSet.current_page, ())
 
     def get_button_obj(address):
         """
@@ -236,14 +477,51 @@ class ButtonSet:
         return ButtonSet.buttons.get(address)
 
     def draw_page(self):
-        """Draws a page of FunctionButton objects after a page change"""
-        self.display.set_pen(self.display.create_pen(*color_converter(self.background_color)))
+        """
+        Draws a page of FunctionButton objects after a page change. Pages at
+        or above cache_min_page and not in uncached_pages are copied from the
+        page cache when a rendering of their current content version is held
+        """
+        page = ButtonSet.current_page
+        ButtonSet.dirty_buttons = []
+        cache_key = None
+        if ButtonSet.page_cache and page >= ButtonSet.cache_min_page and page not in ButtonSet.uncached_pages:
+            cache_key = (page, ButtonSet.page_versions.get(page,0))
+            rendered_page = ButtonSet.page_cache.get(cache_key)
+            if rendered_page:
+                self.framebuffer[:] = rendered_page
+                self.board_obj.update()
+                return
+        self.display.set_pen(self.background_pen)
         self.display.clear()
         current_page = self.get_current_page()
         for button in current_page:
             button.draw_button()
+        if cache_key:
+            ButtonSet.page_cache.put(cache_key, bytes(self.framebuffer), len(self.framebuffer))
         self.board_obj.update()
-    
+
+    def draw_dirty(self):
+        """
+        Draws the buttons in dirty_buttons over a cleared background and sends
+        only the screen areas around them to the display. Neighbouring button
+        areas are merged so they are sent with a single partial update.
+        The page cache is not updated, because copying the whole frame buffer
+        would undo the saving of a partial update. mark_dirty() has already
+        dropped the cached rendering, so the page is drawn and cached again by
+        the next draw_page()
+        """
+        areas = []
+        for button in ButtonSet.dirty_buttons:
+            area = [int(button.x)-1, int(button.y)-1, int(button.width)+2, int(button.height)+2]
+            self.display.set_pen(self.background_pen)
+            self.display.rectangle(*area)
+            button.draw_button()
+            areas.append(area)
+        ButtonSet.dirty_buttons = []
+        for area in merge_areas(areas):
+            self.board_obj.partial_update(*area)
+
     def next_page():
         """Change the current page to the next page of buttons if possible"""
         if ButtonSet.current_page < ButtonSet.max_page:
@@ -258,24 +536,72 @@ class ButtonSet:
 
     def jump_to_page(page_number: int):
         """
-        Change the current page to the page given as an input if possible
+        Change the current page to the page given as an input if possible,
+        including hidden pages added by add_page()
         Args:
             page_number: an integer for the page number to jump to.
         """
-        if ButtonSet.min_page <= page_number <= ButtonSet.max_page:
+        if ButtonSet.min_page <= page_number <= ButtonSet.max_page or page_number in ButtonSet.pages:
             ButtonSet.current_page = page_number
             ButtonSet.needs_redrawing = True
+
+    def invalidate_page(page_number: int):
+        """
+        Marks the content of a page as changed so that a cached rendering of
+        it is dropped and the page is drawn again the next time it is shown
+        Args:
+            page_number: an integer for the page number that has changed
+        """
+        version = ButtonSet.page_versions.get(page_number,0)
+        if ButtonSet.page_cache:
+            ButtonSet.page_cache.remove((page_number, version))
+        ButtonSet.page_versions[page_number] = version + 1
     
-class FunctionButton(Button):
+def merge_areas(areas: list) -> list:
+    """
+    Merges screen areas whose combined bounding box is not much larger than
+    the areas themselves, such as neighbouring buttons, so fewer partial
+    screen updates are needed
+    Args:
+        areas: a list of [x, y, width, height] lists
+    Returns:
+        a list of merged [x, y, width, height] lists
+    """
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(areas)):
+            for j in range(i+1, len(areas)):
+                a = areas[i]
+                b = areas[j]
+                x = min(a[0], b[0])
+                y = min(a[1], b[1])
+                width = max(a[0]+a[2], b[0]+b[2]) - x
+                height = max(a[1]+a[3], b[1]+b[3]) - y
+                if width*height <= 1.25*(a[2]*a[3] + b[2]*b[3]):
+                    areas[i] = [x, y, width, height]
+                    areas.pop(j)
+                    merged = True
+                    break
+            if merged:
+                break
+    return areas
+
+class FunctionButton:
     """ 
-    An extension to the Button class to link a button to a function,
-    draw a rounded rectangle, add text, and add an image.
+    A button on the screen linked to a function, drawn as a rounded
+    rectangle with text and an image.
 
     Handles missing or default inputs, calculates sizes and positioning to 
     center labels and symbols, and adds a rounded rectangle border.
-    Contains methods for registering a button touch as a single debounced 
-    action either when a button is first touched or first released.
-    Also contains methods for drawing and redrawing buttons.
+    Touches are handled by the TouchEvents object owned by ButtonSet.
+    Contains methods for drawing and redrawing buttons.
+
+    There can be thousands of buttons, so each one only keeps what is its
+    own in __slots__. The board, display, and vector renderer are shared
+    class variables set up by ButtonSet, pens come from the palette module,
+    and font paths and symbol paths are shared by all the buttons that use
+    the same one.
 
     Attributes
     ----------
@@ -289,8 +615,6 @@ class FunctionButton(Button):
         height of the button
     address: tuple
         page, row, and column address of this button
-    board_obj: 
-        The Presto class object for the hardware interface
     name: str
         Name of this button
     radius: int
@@ -298,31 +622,61 @@ class FunctionButton(Button):
     label: str
         Text that will be displayed on the button
     label_font: str
-        Name of font file to used for the label text
-    color: str | tuple | list
-        color to be used for the text and outline
-    outline_color: str | tuple | list
-        color to be used for the outline, overrides color
-    label_color: str | tuple | list
-        color to be used for the label, overrides color
-    symbol: str
-        name of a png file with symbol to be displayed
-    fn_name: str
-        name of the function to be called when the button is pressed
+        path of the font file used for the label text, or None for the system font
+    outline_color: int
+        pen used for the outline
+    label_color: int
+        pen used for the label
+    symbol_path: str
+        path of a png file with symbol to be displayed
+    symbol_data: memoryview
+        png data in memory that is displayed instead of the symbol file
+    fn: callable
+        function to be called when the button is pressed
     arg: str | list | dict | int | float
         arguments to the function to be called when the button is pressed
 
+    Class Variables
+    ---------------
+    board_obj:
+        The Presto class object for the hardware interface
+    display:
+        The PicoGraphics class object for drawing on the screen
+    vector: PicoVector
+        the vector renderer owned by ButtonSet and used by all buttons
+    assets: AssetRegistry
+        manifest of the art files and the font loaded into vector, set up by ButtonSet
+    shared_values: dict
+        one copy of each font and symbol path so buttons using the same file share it
+    layout_cache: LRUCache
+        label layouts addressed by label, font, width and height. Its hits
+        and misses counters show how often draws skip measuring the label
+    image_cache: ImageCache
+        decoded symbol images shared by all buttons, set up by ButtonSet
+    background_pen: int
+        pen of the screen background behind the buttons, set up by ButtonSet
+
     Methods
     -------
     draw_button()
         draws button elements to be ready for a screen update
+    label_layout() -> tuple
+        returns the font size, position and wrap width that fits the label
     redraw_button()
         draws button elements and calls a partial screen update around the button
-    just_pressed()
-        returns true once on the first calling after a button is touched
-    just_released()
-        returns true once on the first calling after a button is released
+    mark_dirty()
+        marks the button as needing to be drawn again after its appearance changes
     """
+    __slots__ = ('x', 'y', 'width', 'height', 'radius', 'address', 'name', 'label', 'label_font',
+                 'outline_color', 'label_color', 'symbol_path', 'symbol_data', 'fn', 'arg')
+    board_obj = None
+    display = None
+    vector = None
+    assets = None
+    shared_values = {}
+    layout_cache = LRUCache(8192)
+    image_cache = None
+    background_pen = None
 
     def __init__(self,
                  x: int,
@@ -330,7 +684,6 @@ class FunctionButton(Button):
                  width: int,
                  height: int,
                  address: tuple,
-                 board_obj,
                  name: str | None = None,
                  radius: int = 14,
                  label: str | None = None,
@@ -342,58 +695,48 @@ class FunctionButton(Button):
                  fn_name: str | None = None,
                  arg: str | list | dict | int | float | None = None,
                  **kwargs):
-        """ Inits a FunctionButton object withe defaults for nonessential values."""
-        super().__init__(x, y, width, height)
-
+        """
+        Inits a FunctionButton object withe defaults for nonessential values.
+        Font and symbol files are checked against the art manifest, so each
+        missing file is reported once at boot instead of at every draw
+        """
         self.x = x
         self.y = y
         self.width = width
         self.height = height
         self.radius = radius
         self.address = address
-        self.board_obj = board_obj
         self.name = name
-        self.display = board_obj.display
-        self.touch = board_obj.touch
-        self.fn_name = fn_name
         self.arg = arg
         self.label = label
-        self.depressed = False
-        self.vector = PicoVector(self.display)
-
-        try:
-            open(f'/art/{label_font}')
-            self.label_font = f'/art/{label_font}'
-        except Exception as exc:
-            print(f"No font file called {label_font} found for button {self.name}. Using system font.")
-            print(exc)
-            self.label_font = None
 
-        if outline_color:
-            self.outline_color = self.display.create_pen(*color_converter(outline_color))
+        if 'label_font_path' in kwargs:
+            font_path = kwargs['label_font_path']
+        elif label_font:
+            font_path = f'{self.assets.directory}/{label_font}'
         else:
-            self.outline_color = self.display.create_pen(*color_converter(color))
-        
-        if label_color:
-            self.label_color = self.display.create_pen(*color_converter(label_color))
+            font_path = None
+        if font_path and self.assets.check(font_path, 'font', f'button {name}. Using system font'):
+            self.label_font = FunctionButton.shared_values.setdefault(font_path, font_path)
         else:
-            self.label_color = self.display.create_pen(*color_converter(color))
+            self.label_font = None
+
+        self.outline_color = palette.get_pen(self.display, outline_color or color)
+        self.label_color = palette.get_pen(self.display, label_color or color)
         
         if symbol:
-            self.symbol_path = f'/art/{symbol}'
+            symbol_path = f'{self.assets.directory}/{symbol}'
+            self.symbol_path = FunctionButton.shared_values.setdefault(symbol_path, symbol_path)
+            if self.assets.check(symbol_path, 'image', f'button {name}'):
+                image_size = self.assets.png_size(symbol_path)
+                if image_size and (image_size[0] > width or image_size[1] > height):
+                    print(f'The image {symbol_path} is {image_size[0]}x{image_size[1]}, which is larger than button {name}.')
         else:
             self.symbol_path = None
+        self.symbol_data = None
 
         if fn_name:
-            try:
-                self.fn = getattr(button_action_fns,fn_name)
-            except:
-                try:
-                    self.fn = getattr(ButtonSet,fn_name)
-                except Exception as exc:
-                    print(f'There is no function named {fn_name} for button {self.name}.')
-                    print(exc)
-                    self.fn = None
+            self.fn = find_function(fn_name, f'button {self.name}', kwargs.get('fn_owner'))
         else:
             self.fn = None
 
@@ -409,44 +752,82 @@ class FunctionButton(Button):
                         stroke=3)
         self.vector.draw(shape)
         
-        if self.symbol_path:
-            png = PNG(self.display)
+        if self.symbol_path and (self.symbol_data or self.symbol_path in self.assets.files):
             try:
-                png.open_file(self.symbol_path)
-                png.decode(int(self.x+0.5*self.width-0.5*png.get_width()), int(self.y+0.5*self.height-0.5*png.get_height()))
+                FunctionButton.image_cache.draw(self.symbol_path,
+                                                self.x,
+                                                self.y,
+                                                self.width,
+                                                self.height,
+                                                self.symbol_data,
+                                                (FunctionButton.background_pen, self.outline_color))
             except Exception as exc:
-                print(f"No image file called {self.symbol_path} found for button {self.name}.")
+                print(f"Could not draw the image {self.symbol_path} for button {self.name}.")
                 print(exc)
             
         if self.label:
             self.display.set_pen(self.label_color)
             if self.label_font:
-                self.vector.set_font(self.label_font, int(0.33*self.height))
+                font_size, text_x_offset, text_y_offset, wrap_width = self.label_layout()
+                self.assets.use_font(self.label_font, font_size)
                 self.vector.set_font_align(HALIGN_CENTER)
-                text_x, text_y, text_width, text_height = self.vector.measure_text(self.label)
-                if text_height > 0.9*self.height:
-                    self.vector.set_font(self.label_font, int(0.85*self.height/text_height*0.33*self.height))
-                    text_x, text_y, text_width, text_height = self.vector.measure_text(self.label)
-                text_x, text_y, text_width, text_height = self.vector.measure_text(self.label)
-                if text_width > 0.9*self.width:
-                    self.vector.set_font(self.label_font, int(0.85*self.width/text_width*0.33*self.height))
-                    text_x, text_y, text_width, text_height = self.vector.measure_text(self.label)
-                first_line = self.label.split('\n')[0]
-                first_line_x, first_line_y, first_line_width, first_line_height = self.vector.measure_text(first_line)
-                last_line = self.label.split('\n')[-1]
-                last_line_x, last_line_y, last_line_width, last_line_height = self.vector.measure_text(last_line)
-                text_y_offset = int(0.5*text_height - first_line_height - last_line_y)
                 self.vector.text(self.label, 
-                            int(self.x+0.5*self.width-0.52*text_width),
-                            int(self.y+0.5*self.height-text_y_offset),
+                            int(self.x+text_x_offset),
+                            int(self.y+text_y_offset),
                             0,
-                            int(1.04*text_width))
+                            wrap_width)
             else:
-                self.board_obj.display.text(self.label,
-                                            int(self.x+5),
-                                            int(self.y+0.5*self.height-5),
-                                            int(self.width-10),
-                                            3)
+                self.display.text(self.label,
+                                  int(self.x+5),
+                                  int(self.y+0.5*self.height-5),
+                                  int(self.width-10),
+                                  3)
+
+    def label_layout(self) -> tuple:
+        """
+        Finds the font size and position that fits the label inside the button.
+        Layouts are kept in FunctionButton.layout_cache so each label is only
+        measured the first time it is drawn on a button of its size
+        Returns:
+            tuple of font size, x and y offsets of the text from the button's
+            top left corner, and the text wrap width
+        """
+        cache_key = (self.label, self.label_font, int(self.width), int(self.height))
+        layout = FunctionButton.layout_cache.get(cache_key)
+        if layout:
+            return layout
+        font_size = int(0.33*self.height)
+        self.assets.use_font(self.label_font, font_size)
+        self.vector.set_font_align(HALIGN_CENTER)
+        text_x, text_y, text_width, text_height = self.vector.measure_text(self.label)
+        if text_height > 0.9*self.height:
+            font_size = int(0.85*self.height/text_height*0.33*self.height)
+            self.assets.use_font(self.label_font, font_size)
+            text_x, text_y, text_width, text_height = self.vector.measure_text(self.label)
+        if text_width > 0.9*self.width:
+            font_size = int(0.85*self.width/text_width*0.33*self.height)
+            self.assets.use_font(self.label_font, font_size)
+            text_x, text_y, text_width, text_height = self.vector.measure_text(self.label)
+        first_line = self.label.split('\n')[0]
+        first_line_x, first_line_y, first_line_width, first_line_height = self.vector.measure_text(first_line)
+        last_line = self.label.split('\n')[-1]
+        last_line_x, last_line_y, last_line_width, last_line_height = self.vector.measure_text(last_line)
+        text_y_offset = int(0.5*text_height - first_line_height - last_line_y)
+        layout = (font_size,
+                  0.5*self.width-0.52*text_width,
+                  0.5*self.height-text_y_offset,
+                  int(1.04*text_width))
+        FunctionButton.layout_cache.put(cache_key, layout, len(self.label) + 64)
+        return layout
+
+    def mark_dirty(self):
+        """
+        Marks the button as changed. The cached rendering of its page is dropped
+        and, if the button is on the current page, it is queued for draw_dirty()
+        """
+        ButtonSet.invalidate_page(self.address[0])
+        if self.address[0] == ButtonSet.current_page and self not in ButtonSet.dirty_buttons:
+            ButtonSet.dirty_buttons.append(self)
 
     def redraw_button(self):
         """Redraws a single button after some aspect of its appearance has been updated"""
@@ -455,27 +836,3 @@ class FunctionButton(Button):
                                       int(self.y)-1,
                                       int(self.width)+2,
                                       int(self.height)+2)
-
-    def just_pressed(self):
-        """Returns True once and only once when a button transitions from not touched to touched"""
-        self.touch.poll()
-        if self.is_pressed():
-            if not self.depressed:
-                self.depressed = True
-                return True
-            else:
-                return False
-        elif not self.is_pressed():
-            self.depressed = False
-
-    def just_released(self):
-        """Returns True once and only once when a button transitions from touched to not touched"""
-        self.touch.poll()
-        if not self.is_pressed():
-            if self.depressed:
-                self.depressed = False
-                return True
-            else:
-                return False
-        elif self.is_pressed():
-            self.depressed = True
@@ -0,0 +1,376 @@
+"""
+cover_art.py 2026-10-18 v 1.0
+
+Author: Brent Goode
+
+Downloads cover art into a reusable memory buffer so it can be decoded
+without being written to flash, and keeps a size limited cache of covers
+on flash so each cover is only downloaded once. Downloads do not block
+when the asyncio main loop is running, and reuse a kept connection to the
+server otherwise when one is given
+
+"""
+
+import requests
+import utils
+import lms_client
+import json
+import os
+import hashlib
+import binascii
+
+class CoverArt:
+    """
+    A preallocated buffer that cover art images are streamed into
+
+    The image is read from the response in fixed size chunks directly into
+    the buffer, so no large temporary allocations are made for each download.
+    The buffer is reused for every download, so the memoryview returned by
+    fetch() is only valid until the next call of fetch(). Covers are looked
+    up by a key, first in the buffer, then in the prefetch buffer, then in the
+    flash cover cache if one is given, and are only downloaded if all miss.
+    When a prefetch buffer is allocated, prefetch() loads the next track's
+    cover ahead of time and fetch() swaps the two buffers when that cover is
+    asked for. A prefetched cover that is not the next one asked for is dropped.
+    Only one prefetch runs at a time, and the prefetch buffer has no key
+    while it is being written, so fetch() never swaps in a partly loaded
+    cover.
+    fetch() and prefetch() are coroutines so they can be awaited by the asyncio
+    main loop, and can be run with utils.run_action() otherwise. Outside of
+    the asyncio main loop, covers on the LMS server are downloaded over the
+    connection if one is given.
+
+    Attributes
+    ----------
+    buffer: bytearray
+        memory the image is downloaded into
+    chunk_size: int
+        number of bytes read from the response at a time
+    length: int
+        number of bytes in the buffer that hold the current image
+    key: str
+        key of the image currently in the buffer
+    cover_cache: CoverCache
+        the flash cache covers are read from and saved to, or None
+    prefetch_buffer: bytearray
+        memory the next image is downloaded into ahead of time, or None
+    prefetch_length: int
+        number of bytes in the prefetch buffer that hold the next image
+    prefetch_key: str
+        key of the image in the prefetch buffer
+    prefetching: bool
+        whether a prefetch is loading into the prefetch buffer
+    connection: KeepAliveConnection
+        kept connection to the LMS server used for downloads, or None
+
+    Methods
+    -------
+    fetch(url: str, key: str) -> memoryview
+        loads the image for key into the buffer, downloading it from url if needed
+    prefetch(url: str, key: str) -> bool
+        loads the image for key into the prefetch buffer
+    save(file_name: str)
+        writes the image currently in the buffer to a file
+    """
+
+    def __init__(self,
+                 buffer_size: int = 131072,
+                 chunk_size: int = 2048,
+                 cover_cache = None,
+                 prefetch: bool = False,
+                 connection = None):
+        """Inits CoverArt with an empty buffer of buffer_size bytes"""
+        self.buffer = bytearray(buffer_size)
+        self.chunk_size = chunk_size
+        self.length = 0
+        self.key = None
+        self.cover_cache = cover_cache
+        if prefetch:
+            self.prefetch_buffer = bytearray(buffer_size)
+        else:
+            self.prefetch_buffer = None
+        self.prefetch_length = 0
+        self.prefetch_key = None
+        self.prefetching = False
+        self.connection = connection
+
+    async def fetch(self, url: str, key: str | None = None) -> memoryview | None:
+        """
+        Loads the image for key into the buffer. The image is taken from the
+        buffer, the prefetch buffer, or the cover cache if held there,
+        otherwise it is downloaded from url and added to the cover cache
+        Args:
+            url: the address of the image
+            key: identifies the image, such as its artwork id and scale.
+                Defaults to url
+        Returns:
+            a memoryview of the image data in the buffer or None if the
+            download failed or the image is bigger than the buffer
+        """
+        if key is None:
+            key = url
+        if key == self.key and self.length:
+            return memoryview(self.buffer)[:self.length]
+        if key == self.prefetch_key and self.prefetch_length:
+            self.buffer, self.prefetch_buffer = self.prefetch_buffer, self.buffer
+            self.length = self.prefetch_length
+            self.key = key
+            self.prefetch_length = 0
+            self.prefetch_key = None
+            return memoryview(self.buffer)[:self.length]
+        self.prefetch_length = 0
+        self.prefetch_key = None
+        self.length = await self._load(url, key, self.buffer)
+        if self.length:
+            self.key = key
+            return memoryview(self.buffer)[:self.length]
+        self.key = None
+        return None
+
+    async def prefetch(self, url: str, key: str | None = None) -> bool:
+        """
+        Loads the image for key into the prefetch buffer so a later fetch()
+        for the same key does not have to wait for it
+        Args:
+            url: the address of the image
+            key: identifies the image. Defaults to url
+        Returns:
+            True if the image is ready in the prefetch buffer or the buffer
+        """
+        if self.prefetch_buffer is None or self.prefetching:
+            return False
+        if key is None:
+            key = url
+        if key == self.key or key == self.prefetch_key:
+            return True
+        # The old image is dropped before the buffer is written so fetch()
+        # can not swap it in part way through
+        buffer = self.prefetch_buffer
+        self.prefetch_length = 0
+        self.prefetch_key = None
+        self.prefetching = True
+        try:
+            length = await self._load(url, key, buffer)
+        finally:
+            self.prefetching = False
+        if length and buffer is self.prefetch_buffer:
+            self.prefetch_length = length
+            self.prefetch_key = key
+            return True
+        return False
+
+    async def _load(self, url: str, key: str, buffer: bytearray) -> int:
+        """
+        Reads the image for key into buffer from the cover cache or by
+        downloading it from url
+        Returns:
+            the number of bytes of image data in buffer or 0 if it failed
+        """
+        if self.cover_cache:
+            length = self.cover_cache.read_into(key, buffer)
+            if length:
+                return length
+        if utils.async_mode:
+            length = await lms_client.fetch_into(url, buffer, self.chunk_size)
+            if length and self.cover_cache:
+                self.cover_cache.store(key, memoryview(buffer)[:length])
+            return length
+        if self.connection:
+            length = self.connection.fetch_into(url, buffer, self.chunk_size)
+            if length is not None:
+                if length and self.cover_cache:
+                    self.cover_cache.store(key, memoryview(buffer)[:length])
+                return length
+        try:
+            response = requests.get(url)
+        except Exception as exc:
+            print(f"Error while attempting to download cover at {url}: {exc}")
+            return 0
+        try:
+            if response.status_code != 200:
+                print(f"Error while attempting to download cover at {url}: status {response.status_code}")
+                return 0
+            view = memoryview(buffer)
+            length = 0
+            while length < len(buffer):
+                count = response.raw.readinto(view[length:length+self.chunk_size])
+                if not count:
+                    break
+                length += count
+            else:
+                if response.raw.read(1):
+                    print(f"Cover at {url} is larger than the {len(buffer)} byte cover buffer")
+                    return 0
+            if self.cover_cache:
+                self.cover_cache.store(key, view[:length])
+            return length
+        except Exception as exc:
+            print(f"Error while attempting to download cover at {url}: {exc}")
+            return 0
+        finally:
+            response.close()
+
+    def save(self, file_name: str):
+        """
+        Writes the image currently in the buffer to a file
+        Args:
+            file_name: path of the file to write
+        """
+        with open(file_name, mode='wb') as file:
+            file.write(memoryview(self.buffer)[:self.length])
+
+class CoverCache:
+    """
+    A size limited cache of cover art files on flash
+
+    Each cover is stored in directory in a file named from a hash of its key.
+    An index file in the same directory holds the size and last use of each
+    file. When adding a cover would go over max_bytes, the least recently
+    used covers are deleted first. So that each new cover is not two flash
+    writes, the index is only written when covers are evicted or after
+    save_every new covers, and last use is only tracked in memory between
+    writes, so cache hits do not cause flash writes either. At boot the
+    index is matched to the files in directory, so covers stored after the
+    last write of the index are found again.
+
+    Attributes
+    ----------
+    directory: str
+        directory the cover files and index are kept in
+    max_bytes: int
+        the largest total size of all cover files
+    index: dict
+        size and last use pairs addressed by file name
+    used: int
+        total size of all cover files
+    counter: int
+        increases by one each time a cover is used to order last use
+    save_every: int
+        number of new covers stored between writes of the index
+    unsaved: int
+        number of new covers stored since the index was written
+
+    Methods
+    -------
+    read_into(key: str, buffer: bytearray) -> int
+        reads the cover for key into buffer
+    store(key: str, data: memoryview)
+        saves a cover to flash, evicting old covers to make space
+    """
+
+    def __init__(self, directory: str = '/cover_cache', max_bytes: int = 1048576, save_every: int = 8):
+        """Inits CoverCache and loads the index file from directory"""
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.save_every = save_every
+        self.unsaved = 0
+        self.index = {}
+        try:
+            os.mkdir(directory)
+        except OSError:
+            pass
+        try:
+            with open(f'{directory}/index.json','r') as file:
+                self.index = json.load(file)
+        except Exception:
+            self.index = {}
+        self._match_files()
+        self.used = sum([entry[0] for entry in self.index.values()])
+        self.counter = max([entry[1] for entry in self.index.values()] + [0])
+
+    def read_into(self, key: str, buffer: bytearray) -> int:
+        """
+        Reads the cover for key into buffer
+        Args:
+            key: identifies the cover
+            buffer: memory to read the cover into
+        Returns:
+            the number of bytes read or 0 if the cover is not held or does
+            not fit in buffer
+        """
+        file_name = self._file_name(key)
+        entry = self.index.get(file_name)
+        if not entry or entry[0] > len(buffer):
+            return 0
+        try:
+            with open(f'{self.directory}/{file_name}','rb') as file:
+                length = file.readinto(memoryview(buffer)[:entry[0]])
+        except Exception as exc:
+            print(f'Error reading cached cover {file_name}: {exc}')
+            self._remove(file_name)
+            return 0
+        self.counter += 1
+        entry[1] = self.counter
+        return length
+
+    def store(self, key: str, data: memoryview):
+        """
+        Saves a cover to flash, deleting the least recently used covers
+        until it fits within max_bytes
+        Args:
+            key: identifies the cover
+            data: the cover image data
+        """
+        if len(data) > self.max_bytes:
+            return
+        file_name = self._file_name(key)
+        self._remove(file_name)
+        evicted = False
+        while self.index and self.used + len(data) > self.max_bytes:
+            oldest = min(self.index, key=lambda name: self.index[name][1])
+            self._remove(oldest)
+            evicted = True
+        try:
+            with open(f'{self.directory}/{file_name}','wb') as file:
+                file.write(data)
+        except Exception as exc:
+            print(f'Error saving cover {file_name}: {exc}')
+            return
+        self.counter += 1
+        self.index[file_name] = [len(data), self.counter]
+        self.used += len(data)
+        self.unsaved += 1
+        if evicted or self.unsaved >= self.save_every:
+            self._save_index()
+
+    def _file_name(self, key: str) -> str:
+        """Returns the file name for a cover key"""
+        return binascii.hexlify(hashlib.sha256(key.encode()).digest()[:8]).decode() + '.png'
+
+    def _remove(self, file_name: str):
+        """Deletes a cover file and its index entry"""
+        entry = self.index.pop(file_name, None)
+        if entry:
+            self.used -= entry[0]
+            try:
+                os.remove(f'{self.directory}/{file_name}')
+            except OSError:
+                pass
+
+    def _match_files(self):
+        """
+        Matches the index to the cover files in directory. Covers stored
+        after the index was last written are added as the least recently
+        used, and entries whose file is gone are dropped
+        """
+        try:
+            names = set(os.listdir(self.directory))
+        except OSError:
+            return
+        for file_name in [name for name in self.index if name not in names]:
+            self.index.pop(file_name)
+        for file_name in names:
+            if file_name.endswith('.png') and file_name not in self.index:
+                try:
+                    self.index[file_name] = [os.stat(f'{self.directory}/{file_name}')[6], 0]
+                except OSError:
+                    pass
+
+    def _save_index(self):
+        """Writes the index file"""
+        self.unsaved = 0
+        try:
+            with open(f'{self.directory}/index.json','w') as file:
+                json.dump(self.index, file)
+        except Exception as exc:
+            print(f'Error saving cover cache index: {exc}')
@@ -0,0 +1,128 @@
+"""
+image_cache.py 2026-10-18 v 1.0
+
+Author: Brent Goode
+
+Cache of decoded button symbol images so each png file is only read from
+flash and decoded once
+
+"""
+
+from pngdec import PNG
+from lru_cache import LRUCache
+
+class ImageCache:
+    """
+    Draws png symbols centered in a button area, keeping the decoded pixels
+    so later draws of the same symbol in a button of the same size are copied
+    straight into the frame buffer
+
+    The first draw of a symbol decodes the png onto the screen and then copies
+    the pixels it covered out of the frame buffer. The copied pixels include
+    whatever showed through the transparent parts of the symbol, so they are
+    kept under the colors behind the symbol as well as the button size, and
+    are only placed in buttons of the same size drawn in the same colors.
+
+    Attributes
+    ----------
+    display:
+        The PicoGraphics class object for drawing on the screen
+    framebuffer: memoryview
+        view of the display's frame buffer
+    display_width: int
+        width of the display in pixels
+    display_height: int
+        height of the display in pixels
+    bytes_per_pixel: int
+        number of bytes for each pixel in the frame buffer
+    png: PNG
+        png decoder shared by all symbols
+    cache: LRUCache
+        width, height, and pixel data of decoded symbols addressed by symbol
+        path, button width and height, and the colors behind the symbol
+
+    Methods
+    -------
+    draw(symbol_path: str, x: int, y: int, width: int, height: int, data: memoryview, background: tuple)
+        draws the symbol centered in the given area
+    forget(symbol_path: str)
+        drops all decoded copies of a symbol whose file has changed
+    """
+
+    def __init__(self, display, budget: int):
+        """Inits ImageCache for display with a byte budget for decoded symbols"""
+        self.display = display
+        self.framebuffer = memoryview(display)
+        self.display_width, self.display_height = display.get_bounds()
+        self.bytes_per_pixel = len(self.framebuffer) // (self.display_width*self.display_height)
+        self.png = PNG(display)
+        self.cache = LRUCache(budget)
+
+    def draw(self,
+             symbol_path: str,
+             x: int,
+             y: int,
+             width: int,
+             height: int,
+             data: memoryview | None = None,
+             background: tuple | None = None):
+        """
+        Draws the symbol centered in an area, decoding it only if it is not cached
+        Args:
+            symbol_path: path to the png file for the symbol
+            x: left edge of the area
+            y: top edge of the area
+            width: width of the area
+            height: height of the area
+            data: png data already in memory to decode instead of the file
+                at symbol_path, which is then only used as the cache key
+            background: the pens of everything drawn behind the symbol, like
+                the background and the button outline
+        """
+        cache_key = (symbol_path, int(width), int(height), background)
+        image = self.cache.get(cache_key)
+        if image:
+            image_width, image_height, pixels = image
+            left = int(x+0.5*width-0.5*image_width)
+            top = int(y+0.5*height-0.5*image_height)
+            self._paste(pixels, left, top, image_width, image_height)
+            return
+        if data:
+            self.png.open_RAM(data)
+        else:
+            self.png.open_file(symbol_path)
+        image_width = self.png.get_width()
+        image_height = self.png.get_height()
+        left = int(x+0.5*width-0.5*image_width)
+        top = int(y+0.5*height-0.5*image_height)
+        self.png.decode(left, top)
+        if left >= 0 and top >= 0 and left + image_width <= self.display_width \
+           and top + image_height <= self.display_height:
+            pixels = self._copy(left, top, image_width, image_height)
+            self.cache.put(cache_key, (image_width, image_height, pixels), len(pixels))
+
+    def forget(self, symbol_path: str):
+        """
+        Drops all decoded copies of a symbol so it is read again on the next draw
+        Args:
+            symbol_path: path to the png file for the symbol
+        """
+        for cache_key in [key for key in self.cache.entries if key[0] == symbol_path]:
+            self.cache.remove(cache_key)
+
+    def _copy(self, left: int, top: int, width: int, height: int) -> bytearray:
+        """Copies a rectangle of pixels out of the frame buffer"""
+        row_bytes = width*self.bytes_per_pixel
+        pixels = bytearray(row_bytes*height)
+        for row in range(height):
+            start = ((top+row)*self.display_width + left)*self.bytes_per_pixel
+            pixels[row*row_bytes:(row+1)*row_bytes] = self.framebuffer[start:start+row_bytes]
+        return pixels
+
+    def _paste(self, pixels: bytearray, left: int, top: int, width: int, height: int):
+        """Copies a rectangle of pixels into the frame buffer"""
+        row_bytes = width*self.bytes_per_pixel
+        pixels = memoryview(pixels)
+        for row in range(height):
+            start = ((top+row)*self.display_width + left)*self.bytes_per_pixel
+            self.framebuffer[start:start+row_bytes] = pixels[row*row_bytes:(row+1)*row_bytes]
@@ -0,0 +1,167 @@
+"""
+instrumentation.py 2026-10-18 v 1.0
+
+Author: Brent Goode
+
+Optional timing of the main loop, drawing, touch handling, timer actions,
+and LMS requests, with rolling statistics shown on a hidden diagnostics page
+
+"""
+
+import time
+import micropytimer
+
+class RingStats:
+    """
+    The most recent durations of one kind of call in a fixed size ring buffer
+
+    Attributes
+    ----------
+    samples: list
+        the durations in microseconds, overwritten oldest first once full
+    count: int
+        total number of durations added
+    index: int
+        position the next duration is written to
+
+    Methods
+    -------
+    add(duration_us: int)
+        adds a duration
+    summary() -> tuple
+        returns the number of samples and the min, average, 95th percentile
+        and max of the samples held
+    """
+
+    def __init__(self, size: int = 64):
+        """Inits RingStats with room for size samples"""
+        self.samples = [0]*size
+        self.count = 0
+        self.index = 0
+
+    def add(self, duration_us: int):
+        """Adds a duration in microseconds"""
+        self.samples[self.index] = duration_us
+        self.index = (self.index + 1) % len(self.samples)
+        self.count += 1
+
+    def summary(self) -> tuple:
+        """
+        Returns:
+            tuple of the total count and the min, average, 95th percentile and
+            max in microseconds of the samples held, or None if there are none
+        """
+        held = min(self.count, len(self.samples))
+        if not held:
+            return None
+        samples = sorted(self.samples[:held])
+        return (self.count,
+                samples[0],
+                sum(samples)//held,
+                samples[int(0.95*(held-1))],
+                samples[-1])
+
+stats = {}
+ring_size = 64
+timer_actions = {}
+last_loop_us = None
+
+def get_stats(name: str) -> RingStats:
+    """Returns the RingStats kept under name, making it if needed"""
+    if name not in stats:
+        stats[name] = RingStats(ring_size)
+    return stats[name]
+
+def timed(name: str, fn):
+    """
+    Wraps a function so the time each call takes is added to the stats kept
+    under name. Coroutine actions are only timed until they are started when
+    the asyncio main loop is running
+    Args:
+        name: name the stats are kept under
+        fn: the function to time
+    Returns:
+        the wrapped function
+    """
+    ring = get_stats(name)
+    def wrapper(*args, **kwargs):
+        start = time.ticks_us()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            ring.add(time.ticks_diff(time.ticks_us(), start))
+    return wrapper
+
+def time_method(obj, method_name: str, name: str):
+    """Replaces a method of an object or class with a timed version if it has one"""
+    try:
+        setattr(obj, method_name, timed(name, getattr(obj, method_name)))
+    except (AttributeError, TypeError) as exc:
+        print(f'Can not time {name}: {exc}')
+
+def check_timers():
+    """
+    Replacement for micropytimer.check_timers() that times each pass of the
+    main loop and each timer action, including timers set up after start up
+    """
+    global last_loop_us
+    now = time.ticks_us()
+    if last_loop_us is not None:
+        get_stats('main loop').add(time.ticks_diff(now, last_loop_us))
+    last_loop_us = now
+    for name, timer in micropytimer.timer_registry.items():
+        if timer.action is not timer_actions.get(name):
+            timer.action = timed(f'timer {name}', timer.action)
+            timer_actions[name] = timer.action
+    micropytimer.check_timers()
+
+def report() -> str:
+    """Returns a line of min/avg/p95/max milliseconds for each kind of call timed"""
+    lines = ['min/avg/p95/max ms']
+    for name in sorted(stats):
+        summary = stats[name].summary()
+        if summary:
+            count, low, average, p95, high = summary
+            lines.append(f'{name} {low/1000:.1f}/{average/1000:.1f}/{p95/1000:.1f}/{high/1000:.1f} n{count}')
+    return '\n'.join(lines)
+
+def install(buttons, settings: dict):
+    """
+    Turns on timing and adds the hidden diagnostics page
+    Args:
+        buttons: the ButtonSet object
+        settings: the diagnostics settings from button_defs.json
+    Returns:
+        the check_timers() function the main loop should use
+    """
+    global ring_size
+    ring_size = settings.get('samples', 64)
+    import button_action_fns
+    from button_set import ButtonSet, FunctionButton
+    time_method(ButtonSet, 'touch_to_action', 'touch_to_action')
+    time_method(ButtonSet, 'draw_page', 'draw_page')
+    time_method(ButtonSet, 'draw_dirty', 'draw_dirty')
+    time_method(FunctionButton, 'draw_button', 'draw_button')
+    time_method(buttons.board_obj, 'partial_update', 'partial_update')
+    time_method(buttons.board_obj, 'update', 'update')
+    player = getattr(button_action_fns, 'player', None)
+    if player:
+        time_method(player, 'player_query', 'LMS query')
+
+    page = settings.get('page', 99)
+    buttons.add_page(page, [{"name":"diagnostics",
+                             "page":page,
+                             "row":0,
+                             "column":0,
+                             "label":report(),
+                             "fn_name":"close_diagnostics"}],
+                     cached=False)
+    button_action_fns.diagnostics_page = page
+    micropytimer.setup_timer('diagnostics_refresh',{"interval":settings.get('refresh_ms',1000),
+                                                    "action":"refresh_diagnostics",
+                                                    "library":"button_action_fns",
+                                                    "running":False})
+    if settings.get('open_address'):
+        address = tuple([int(i) for i in settings.get('open_address').split(',')])
+        buttons.long_press_actions[address] = button_action_fns.show_diagnostics
+    return check_timers
@@ -0,0 +1,234 @@
+"""
+lms_client.py 2026-10-18 v 1.0
+
+Author: Brent Goode
+
+Non-blocking versions of the LMS server requests and artwork downloads for
+use with the asyncio main loop
+
+"""
+
+import asyncio
+import json
+import binascii
+
+def split_url(url: str) -> tuple:
+    """
+    Breaks a url into the parts needed to open a connection
+    Args:
+        url: a url like the ones made by micropyLMS.build_url()
+    Returns:
+        tuple of host, port, path and the basic authorization string or None
+    """
+    if '://' in url:
+        prefix, url = url.split('://', 1)
+    else:
+        prefix = 'http'
+    if '/' in url:
+        address, path = url.split('/', 1)
+    else:
+        address, path = url, ''
+    auth = None
+    if '@' in address:
+        credentials, address = address.rsplit('@', 1)
+        auth = binascii.b2a_base64(credentials.encode()).decode().strip()
+    if ':' in address:
+        host, port = address.split(':', 1)
+        port = int(port)
+    elif prefix == 'https':
+        host, port = address, 443
+    else:
+        host, port = address, 80
+    return host, port, '/' + path, auth
+
+def build_request(method: str,
+                  host: str,
+                  path: str,
+                  auth: str | None,
+                  body: bytes = b'',
+                  keep_alive: bool = False) -> bytes:
+    """
+    Builds the bytes of an HTTP request
+    Args:
+        method: GET or POST
+        host: the host the request is sent to
+        path: the path on the host
+        auth: basic authorization string or None
+        body: request body
+        keep_alive: if True makes an HTTP/1.1 request that asks the server
+            to keep the connection open afterwards
+    Returns:
+        the request bytes
+    """
+    if keep_alive:
+        request = f'{method} {path} HTTP/1.1\r\nHost: {host}\r\nConnection: keep-alive\r\n'
+    else:
+        request = f'{method} {path} HTTP/1.0\r\nHost: {host}\r\n'
+    if auth:
+        request += f'Authorization: Basic {auth}\r\n'
+    if body:
+        request += f'Content-Type: application/json\r\nContent-Length: {len(body)}\r\n'
+    return request.encode() + b'\r\n' + body
+
+def query_body(*command, player: str = "") -> bytes:
+    """Returns the JSON-RPC request body for a command, as sent by micropyLMS.core_query()"""
+    return json.dumps({"id": "1", "method": "slim.request", "params": [player, list(command)]}).encode()
+
+def parse_result(body: bytes) -> dict | None:
+    """
+    Takes the result out of a JSON-RPC response body in the same way as micropyLMS.core_query()
+    Args:
+        body: the response body
+    Returns:
+        the result dictionary or None if the response is not valid
+    """
+    try:
+        result = json.loads(body).get("result")
+    except Exception as exc:
+        print(exc)
+        return None
+    if not isinstance(result, dict):
+        print(f"Received invalid response: {result}")
+        return None
+    return result
+
+async def _read_headers(reader) -> tuple:
+    """Reads the status line and headers of a response and returns the status code and content length"""
+    status_line = await reader.readline()
+    status_code = int(status_line.split(b' ')[1])
+    content_length = None
+    while True:
+        line = await reader.readline()
+        if not line or line == b'\r\n':
+            break
+        name, _, value = line.partition(b':')
+        if name.strip().lower() == b'content-length':
+            content_length = int(value.strip())
+    return status_code, content_length
+
+async def _close(writer):
+    """Closes a connection"""
+    writer.close()
+    await writer.wait_closed()
+
+async def query(server_url: str, *command, player: str = "") -> dict | None:
+    """
+    Non-blocking version of micropyLMS.core_query()
+    Args:
+        server_url: the url of the LMS server as returned by build_url()
+        command: a string or list of strings containing CLI commands
+        player: 'playerid' of the LMS player the query is represented as coming from
+    Returns:
+        the result dictionary or None if the query failed
+    """
+    host, port, path, auth = split_url(server_url)
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except Exception as exc:
+        print(exc)
+        return None
+    try:
+        writer.write(build_request('POST', host, path + 'jsonrpc.js', auth, query_body(*command, player=player)))
+        await writer.drain()
+        status_code, content_length = await _read_headers(reader)
+        if status_code != 200:
+            print(f"Query failed, response code: {status_code}")
+            return None
+        if content_length is None:
+            body = await reader.read(-1)
+        else:
+            body = await reader.readexactly(content_length)
+    except Exception as exc:
+        print(exc)
+        return None
+    finally:
+        await _close(writer)
+    return parse_result(body)
+
+async def player_query(player, *command):
+    """Non-blocking version of Player.player_query()"""
+    result = await query(player.server_url, *command, player=player.player_id)
+    if result == {}:
+        return True
+    return result
+
+async def status_update(player) -> bool:
+    """
+    Non-blocking version of Player.status_update(). Updates the player's
+    stored status with the full current playlist
+    Args:
+        player: a ControllerPlayer object from lms_connection
+    Returns:
+        True if the status was updated
+    """
+    response = await player_query(player, "status")
+    if not response:
+        return False
+    response = await player_query(player, 'status', '0', str(response['playlist_tracks']), 'tags:adJKlNux')
+    if response:
+        player.set_status(response)
+        return True
+    print('ERROR: Received no response in status_update')
+    return False
+
+async def sync_to_all(player) -> bool:
+    """
+    Non-blocking version of PooledPlayer.sync_to_all(). Syncs the player to
+    all others that are clients to the same server
+    Args:
+        player: a micropyLMS Player object
+    Returns:
+        True if every sync command succeeded
+    """
+    data = await query(player.server_url, "players", "status")
+    if data is None or not isinstance(data.get("players_loop"), list):
+        return False
+    sync_success = []
+    for item in data["players_loop"]:
+        if isinstance(item, dict) and item.get("playerid") and item["playerid"] != player.player_id:
+            sync_success.append(await player_query(player, "sync", item["playerid"]))
+    return all(sync_success)
+
+async def fetch_into(url: str, buffer: bytearray, chunk_size: int = 2048) -> int:
+    """
+    Downloads a file into a buffer without blocking
+    Args:
+        url: address of the file
+        buffer: memory to download the file into
+        chunk_size: number of bytes read at a time
+    Returns:
+        the number of bytes downloaded or 0 if the download failed or the
+        file is larger than buffer
+    """
+    host, port, path, auth = split_url(url)
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except Exception as exc:
+        print(f"Error while attempting to download {url}: {exc}")
+        return 0
+    try:
+        writer.write(build_request('GET', host, path, auth))
+        await writer.drain()
+        status_code, content_length = await _read_headers(reader)
+        if status_code != 200:
+            print(f"Error while attempting to download {url}: status {status_code}")
+            return 0
+        view = memoryview(buffer)
+        length = 0
+        while True:
+            data = await reader.read(chunk_size)
+            if not data:
+                break
+            if length + len(data) > len(buffer):
+                print(f"{url} is larger than the {len(buffer)} byte buffer")
+                return 0
+            view[length:length+len(data)] = data
+            length += len(data)
+            if content_length is not None and length >= content_length:
+                break
+        return length
+    except Exception as exc:
+        print(f"Error while attempting to download {url}: {exc}")
+        return 0
+    finally:
+        await _close(writer)
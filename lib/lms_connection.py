@@ -0,0 +1,397 @@
+"""
+lms_connection.py 2026-10-18 v 1.0
+
+Author: Brent Goode
+
+Persistent HTTP connections to the LMS server so each request does not have
+to open a new connection first, and the Player classes used by the controller
+
+"""
+
+import socket
+import errno
+import time
+import micropyLMS
+from lms_client import split_url, build_request, query_body, parse_result
+
+class KeepAliveConnection:
+    """
+    A small pool of HTTP/1.1 keep-alive connections to the LMS server
+
+    A request takes an idle connection from the pool, or opens a new one if
+    none is idle, and gives it back afterwards if the server left it open.
+    At most pool_size idle connections are kept. If a kept connection turns
+    out to have been closed by the server in the meantime, the request is
+    sent once more on a new connection. That is only done when the server
+    can not have acted on the request: when sending it fails, or when the
+    connection is closed or reset before any reply arrives. Requests such
+    as volume +5 are not idempotent, so a request that timed out waiting
+    for the reply is never sent again.
+
+    Attributes
+    ----------
+    server_url: str
+        the url of the LMS server as returned by micropyLMS.build_url()
+    host: str
+        the host the connections are made to
+    port: int
+        the port the connections are made to
+    path: str
+        the path of the server_url on the host
+    auth: str
+        basic authorization string or None
+    timeout: float
+        seconds to wait on the server before a request fails
+    pool_size: int
+        the most idle connections kept open
+    idle: list
+        socket and stream pairs of the open idle connections
+    address:
+        the resolved address of host, looked up on first use
+
+    Methods
+    -------
+    query(*command, player: str) -> dict
+        sends a JSON-RPC query to the server and returns the result
+    fetch_into(url: str, buffer: bytearray, chunk_size: int) -> int
+        downloads a file from the server into a buffer
+    close()
+        closes all idle connections
+    """
+
+    def __init__(self, server_url: str, timeout: float = 5, pool_size: int = 1):
+        """Inits KeepAliveConnection without opening any connections"""
+        self.server_url = server_url
+        self.host, self.port, self.path, self.auth = split_url(server_url)
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.idle = []
+        self.address = None
+
+    def query(self, *command, player: str = "") -> dict | None:
+        """
+        Keep-alive version of micropyLMS.core_query()
+        Args:
+            command: a string or list of strings containing CLI commands
+            player: 'playerid' of the LMS player the query is represented as coming from
+        Returns:
+            the result dictionary or None if the query failed
+        """
+        request = build_request('POST', self.host, self.path + 'jsonrpc.js', self.auth,
+                                query_body(*command, player=player), keep_alive=True)
+        try:
+            status_code, body = self._exchange(request, self._read_bytes)
+        except Exception as exc:
+            print(exc)
+            return None
+        if status_code != 200:
+            print(f"Query failed, response code: {status_code}")
+            return None
+        return parse_result(body)
+
+    def fetch_into(self, url: str, buffer: bytearray, chunk_size: int = 2048) -> int | None:
+        """
+        Downloads a file from the server into a buffer
+        Args:
+            url: address of the file
+            buffer: memory to download the file into
+            chunk_size: the most bytes read at a time
+        Returns:
+            the number of bytes downloaded, 0 if the download failed or the
+            file is larger than buffer, or None if url is not on this server
+        """
+        host, port, path, auth = split_url(url)
+        if host != self.host or port != self.port:
+            return None
+        request = build_request('GET', host, path, auth, keep_alive=True)
+        view = memoryview(buffer)
+        reader = lambda stream, length, chunked: self._read_into(stream, length, chunked, view, chunk_size)
+        try:
+            status_code, length = self._exchange(request, reader)
+        except Exception as exc:
+            print(f"Error while attempting to download {url}: {exc}")
+            return 0
+        if status_code != 200:
+            print(f"Error while attempting to download {url}: status {status_code}")
+            return 0
+        if length < 0:
+            print(f"{url} is larger than the {len(buffer)} byte buffer")
+            return 0
+        return length
+
+    def close(self):
+        """Closes all idle connections"""
+        while self.idle:
+            self._close(self.idle.pop())
+
+    def _exchange(self, request: bytes, reader) -> tuple:
+        """
+        Sends a request and reads the response, retrying once on a new
+        connection if a kept connection turns out to be closed before the
+        server could have received the request
+        Args:
+            request: the request bytes
+            reader: function that takes the stream, content length, and
+                whether the body is chunked and reads the body
+        Returns:
+            tuple of the status code and what reader returned
+        """
+        while True:
+            reused = bool(self.idle)
+            connection = self.idle.pop() if reused else self._open()
+            try:
+                connection[0].send(request)
+                status_line = connection[1].readline()
+            except Exception as exc:
+                self._close(connection)
+                if reused and self._stale(exc):
+                    continue
+                raise
+            if not status_line:
+                self._close(connection)
+                if reused:
+                    continue
+                raise OSError('connection closed by server')
+            try:
+                status_code, length, chunked, keep_alive = self._read_headers(connection[1], status_line)
+                if length is None and not chunked:
+                    keep_alive = False
+                result = reader(connection[1], length, chunked)
+            except Exception:
+                self._close(connection)
+                raise
+            if keep_alive and len(self.idle) < self.pool_size:
+                self.idle.append(connection)
+            else:
+                self._close(connection)
+            return status_code, result
+
+    def _open(self) -> tuple:
+        """Opens a new connection and returns its socket and stream"""
+        if self.address is None:
+            self.address = socket.getaddrinfo(self.host, self.port)[0][-1]
+        sock = socket.socket()
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.address)
+        except Exception:
+            sock.close()
+            raise
+        return sock, sock.makefile('rb')
+
+    def _stale(self, exc: Exception) -> bool:
+        """
+        Returns True if a send or the wait for the status line failed because
+        the server had already closed the connection, rather than because the
+        server was slow to reply
+        """
+        code = exc.args[0] if exc.args else None
+        return code in (errno.ECONNRESET, errno.EPIPE, errno.ENOTCONN, errno.ECONNABORTED)
+
+    def _close(self, connection: tuple):
+        """Closes a connection"""
+        try:
+            connection[1].close()
+            connection[0].close()
+        except OSError:
+            pass
+
+    def _read_headers(self, stream, status_line: bytes) -> tuple:
+        """
+        Reads the headers of a response after its status line
+        Returns:
+            tuple of the status code, content length or None, whether the body
+            is chunked, and whether the server keeps the connection open
+        """
+        status_code = int(status_line.split(b' ')[1])
+        keep_alive = status_line.startswith(b'HTTP/1.1')
+        length = None
+        chunked = False
+        while True:
+            line = stream.readline()
+            if not line or line == b'\r\n':
+                break
+            name, _, value = line.partition(b':')
+            name = name.strip().lower()
+            value = value.strip().lower()
+            if name == b'content-length':
+                length = int(value)
+            elif name == b'transfer-encoding':
+                chunked = value == b'chunked'
+            elif name == b'connection':
+                keep_alive = value == b'keep-alive'
+        return status_code, length, chunked, keep_alive
+
+    def _read_bytes(self, stream, length: int | None, chunked: bool) -> bytes:
+        """Reads a whole response body"""
+        if chunked:
+            parts = []
+            while True:
+                size = int(stream.readline().split(b';')[0], 16)
+                if size:
+                    parts.append(self._read_exactly(stream, size))
+                stream.readline()
+                if not size:
+                    return b''.join(parts)
+        if length is None:
+            return stream.read()
+        return self._read_exactly(stream, length)
+
+    def _read_exactly(self, stream, size: int) -> bytes:
+        """Reads exactly size bytes"""
+        data = stream.read(size)
+        while len(data) < size:
+            more = stream.read(size - len(data))
+            if not more:
+                raise OSError('connection closed by server')
+            data += more
+        return data
+
+    def _read_into(self, stream, length: int | None, chunked: bool, view: memoryview, chunk_size: int) -> int:
+        """
+        Reads a response body into view
+        Returns:
+            the number of bytes read or -1 if the body is larger than view.
+            The rest of a body that is too large is still read so the
+            connection can be used again
+        """
+        total = 0
+        overflow = False
+        while True:
+            if chunked:
+                size = int(stream.readline().split(b';')[0], 16)
+                if not size:
+                    stream.readline()
+                    break
+            else:
+                size = length
+            remaining = size
+            while remaining:
+                count = min(remaining, chunk_size)
+                if total + count > len(view):
+                    overflow = True
+                    skipped = stream.read(count)
+                    if not skipped:
+                        raise OSError('connection closed by server')
+                    count = len(skipped)
+                else:
+                    count = stream.readinto(view[total:total+count])
+                    if not count:
+                        raise OSError('connection closed by server')
+                    total += count
+                remaining -= count
+            if not chunked:
+                break
+            stream.readline()
+        if overflow:
+            return -1
+        return total
+
+class ControllerPlayer(micropyLMS.Player):
+    """
+    A micropyLMS Player whose status can also be set from a status fetched
+    by other code, like the non-blocking requests of lms_client
+
+    Attributes
+    ----------
+    status_ms: int
+        ticks_ms when the stored status was fetched, or None
+
+    Methods
+    -------
+    from_player(player: Player) -> ControllerPlayer
+        makes a ControllerPlayer for the same LMS player as a Player object
+    status_update() -> bool
+        updates the status from the server
+    set_status(status: dict)
+        replaces the stored status
+    position() -> float
+        estimated playback position of the current track now
+    """
+    status_ms = None
+
+    @classmethod
+    def from_player(cls, player, *args):
+        """
+        Makes a player of this class with the same player, image scale and
+        status as player
+        Args:
+            player: a micropyLMS Player object
+            args: any further arguments taken by the class
+        """
+        new_player = cls(player.server_url, player.player_id, player.image_scale, *args)
+        new_player.set_status(player._status)
+        new_player.last_update_current_track = player.last_update_current_track
+        return new_player
+
+    def set_status(self, status: dict):
+        """
+        Replaces the stored status with status, as status_update() does
+        Args:
+            status: the result of a full 'status' query for this player
+        """
+        self._status = status
+        self.status_ms = time.ticks_ms()
+
+    def status_update(self) -> bool:
+        """Updates the status from the server, noting when it was fetched"""
+        if not super().status_update():
+            return False
+        self.status_ms = time.ticks_ms()
+        return True
+
+    def position(self) -> float:
+        """
+        Returns the playback position of the current track in seconds,
+        estimated from the last status and the time since it was fetched
+        """
+        position = self.time or 0
+        if self.mode == 'play' and self.status_ms is not None:
+            position += time.ticks_diff(time.ticks_ms(), self.status_ms)/1000
+        return position
+
+class PooledPlayer(ControllerPlayer):
+    """
+    A ControllerPlayer that sends all of its queries through a
+    KeepAliveConnection, so every player command and status update reuses an
+    open connection to the server
+
+    Attributes
+    ----------
+    connection: KeepAliveConnection
+        the connection queries are sent through
+
+    Methods
+    -------
+    player_query() -> dict
+        sends query to LMS serve from Player over the kept connection
+    sync_to_all()
+        syncs this player to all others that are clients to the same server
+    """
+
+    def __init__(self, server_url, player_id, image_scale, connection: KeepAliveConnection):
+        """Inits PooledPlayer"""
+        super().__init__(server_url, player_id, image_scale)
+        self.connection = connection
+
+    def player_query(self, *command):
+        """Sends a query from this player through the kept connection"""
+        result = self.connection.query(*command, player=self.player_id)
+        if result == {}:
+            return True
+        return result
+
+    def sync_to_all(self):
+        """
+        Syncs this player to all others that are clients to the same server.
+        Unlike Player.sync_to_all() this does not request the full status of
+        every other player first
+        """
+        data = self.connection.query("players", "status")
+        if data is None or not isinstance(data.get("players_loop"), list):
+            return False
+        sync_success = []
+        for item in data["players_loop"]:
+            if isinstance(item, dict) and item.get("playerid") and item["playerid"] != self.player_id:
+                sync_success.append(self.player_query("sync", item["playerid"]))
+        return all(sync_success)
@@ -0,0 +1,189 @@
+"""
+lms_subscription.py 2026-10-18 v 1.0
+
+Author: Brent Goode
+
+Subscription to player change notifications from the LMS server's command
+line interface, so status only has to be requested when something changes
+
+"""
+
+import socket
+import select
+import time
+
+class StatusSubscription:
+    """
+    A connection to the LMS command line interface port that subscribes to
+    notifications of changes to the player
+
+    The server sends a line whenever a subscribed command runs for any
+    player, such as a new song starting or the power being switched. poll()
+    reads these without blocking and reports when one was for this player.
+    A connection can stop working without being closed, for example when the
+    server's machine goes to sleep, so after keepalive_ms with nothing
+    received poll() sends a version query, and if no reply comes within
+    timeout_ms the connection is taken to be down. If the connection drops,
+    poll() tries to reconnect every retry_ms.
+    See https://lyrion.org/reference/cli/ for the command line interface.
+
+    Attributes
+    ----------
+    host: str
+        the IP address of the server on the local network
+    port: int
+        the server's command line interface port
+    player_id: str
+        'playerid' of the LMS player whose changes are reported
+    username: str
+        login user name if the server needs one
+    password: str
+        login password if the server needs one
+    retry_ms: int
+        milliseconds between attempts to reconnect
+    keepalive_ms: int
+        milliseconds with nothing received before checking the connection
+    timeout_ms: int
+        milliseconds to wait for the reply to that check
+    connected: bool
+        whether the subscription is currently connected
+    sock: socket
+        the connection to the server
+    poller:
+        poll object used to check for data without blocking
+    received: bytes
+        data received that does not yet make a full line
+    last_attempt: int
+        ticks_ms of the last connection attempt
+    last_received: int
+        ticks_ms when data last arrived, or the connection was made
+    keepalive_sent: int
+        ticks_ms when the check of the connection was sent, or None if no
+        reply is awaited
+
+    Methods
+    -------
+    connect() -> bool
+        connects to the server and subscribes to notifications
+    poll() -> bool
+        reads any notifications and returns True if the player has changed
+    close()
+        closes the connection
+    """
+    commands = 'power,playlist,pause,play,stop,mixer,sync,client'
+    keepalive = b'version ?\n'
+
+    def __init__(self,
+                 host: str,
+                 port: int = 9090,
+                 player_id: str = '',
+                 username: str | None = None,
+                 password: str | None = None,
+                 retry_ms: int = 10000,
+                 keepalive_ms: int = 30000,
+                 timeout_ms: int = 5000):
+        """Inits StatusSubscription without connecting"""
+        self.host = host
+        self.port = int(port)
+        self.player_id = player_id.lower()
+        self.username = username
+        self.password = password
+        self.retry_ms = retry_ms
+        self.keepalive_ms = keepalive_ms
+        self.timeout_ms = timeout_ms
+        self.connected = False
+        self.sock = None
+        self.poller = None
+        self.received = b''
+        self.last_attempt = None
+        self.last_received = None
+        self.keepalive_sent = None
+
+    def connect(self) -> bool:
+        """
+        Connects to the server and subscribes to change notifications
+        Returns:
+            True if connected
+        """
+        self.close()
+        self.last_attempt = time.ticks_ms()
+        try:
+            address = socket.getaddrinfo(self.host, self.port)[0][-1]
+            self.sock = socket.socket()
+            self.sock.settimeout(2)
+            self.sock.connect(address)
+            if self.username and self.password:
+                self.sock.send(f'login {self.username} {self.password}\n'.encode())
+            self.sock.send(f'subscribe {self.commands}\n'.encode())
+            self.sock.setblocking(False)
+            self.poller = select.poll()
+            self.poller.register(self.sock, select.POLLIN)
+        except Exception as exc:
+            print(f'Error subscribing to status changes at {self.host}:{self.port}: {exc}')
+            self.close()
+            return False
+        self.connected = True
+        self.last_received = self.last_attempt
+        self.keepalive_sent = None
+        return True
+
+    def poll(self) -> bool:
+        """
+        Reads any notifications that have arrived without blocking and checks
+        a quiet connection is still working. When not connected, tries to
+        reconnect if retry_ms has passed since the last try
+        Returns:
+            True if the player has changed or the subscription has just
+            reconnected, since changes may have been missed while disconnected
+        """
+        if not self.connected:
+            if self.last_attempt is None or \
+               time.ticks_diff(time.ticks_ms(), self.last_attempt) >= self.retry_ms:
+                return self.connect()
+            return False
+        changed = False
+        now = time.ticks_ms()
+        try:
+            while self.poller.poll(0):
+                data = self.sock.recv(512)
+                if not data:
+                    print('Status subscription closed by server')
+                    self.close()
+                    return changed
+                self.received += data
+                self.last_received = now
+                self.keepalive_sent = None
+            if self.keepalive_sent is not None:
+                if time.ticks_diff(now, self.keepalive_sent) >= self.timeout_ms:
+                    print('Status subscription not answering')
+                    self.close()
+                    return changed
+            elif time.ticks_diff(now, self.last_received) >= self.keepalive_ms:
+                self.sock.send(self.keepalive)
+                self.keepalive_sent = now
+        except OSError as exc:
+            print(f'Status subscription dropped: {exc}')
+            self.close()
+            return changed
+        while b'\n' in self.received:
+            line, self.received = self.received.split(b'\n', 1)
+            if self._for_player(line):
+                changed = True
+        return changed
+
+    def close(self):
+        """Closes the connection"""
+        if self.sock:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+        self.sock = None
+        self.poller = None
+        self.received = b''
+        self.connected = False
+
+    def _for_player(self, line: bytes) -> bool:
+        """Returns True if a notification line is about this player"""
+        first = line.split(b' ', 1)[0].decode().replace('%3A', ':').replace('%3a', ':').lower()
+        return first == self.player_id
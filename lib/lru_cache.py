@@ -0,0 +1,101 @@
+"""
+lru_cache.py 2026-10-18 v 1.0
+
+Author: Brent Goode
+
+A least recently used cache bounded by the total size in bytes of its entries
+
+"""
+
+from collections import OrderedDict
+
+class LRUCache:
+    """
+    Holds values up to a byte budget and evicts the least recently used
+    values first when a new value does not fit
+
+    Attributes
+    ----------
+    budget: int
+        the maximum total size in bytes of all values held
+    used: int
+        the total size in bytes of all values held
+    entries: OrderedDict
+        value and size pairs addressed by key, oldest used first
+    hits: int
+        number of get() calls that found a value
+    misses: int
+        number of get() calls that did not find a value
+
+    Methods
+    -------
+    get(key) -> any
+        returns the value for key and marks it as most recently used
+    put(key, value, size: int) -> bool
+        adds a value, evicting old values until it fits in the budget
+    remove(key)
+        removes the value for key if held
+    clear()
+        removes all values
+    """
+
+    def __init__(self, budget: int):
+        """Inits LRUCache with an empty set of entries"""
+        self.budget = budget
+        self.used = 0
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, key) -> bool:
+        return key in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key):
+        """
+        Returns the value for key and marks it as the most recently used
+        Args:
+            key: the key the value was stored under
+        Returns:
+            the stored value or None if not held
+        """
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries[key] = entry
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, value, size: int) -> bool:
+        """
+        Adds a value to the cache, evicting the least recently used values
+        until it fits within the budget
+        Args:
+            key: the key to store the value under
+            value: the value to store
+            size: the size of value in bytes
+        Returns:
+            True if the value was stored, False if it is larger than the budget
+        """
+        self.remove(key)
+        if size > self.budget:
+            return False
+        while self.entries and self.used + size > self.budget:
+            self.remove(next(iter(self.entries)))
+        self.entries[key] = (value, size)
+        self.used += size
+        return True
+
+    def remove(self, key):
+        """Removes the value for key if it is held"""
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.used -= entry[1]
+
+    def clear(self):
+        """Removes all values"""
+        self.entries = OrderedDict()
+        self.used = 0
@@ -0,0 +1,90 @@
+"""
+palette.py 2026-10-18 v 1.0
+
+Author: Brent Goode
+
+Turns the colors given in button_defs.json into r,g,b values and display
+pens. Each color is only worked out and made into a pen the first time it is
+used, so drawing reuses the same pens instead of making new ones
+
+"""
+
+NAMED_COLORS = {'black': (0, 0, 0),
+                'white': (255, 255, 255),
+                'red': (255, 0, 0),
+                'green': (0, 255, 0),
+                'blue': (0, 0, 255),
+                'yellow': (255, 255, 0),
+                'magenta': (255, 0, 255),
+                'aqua': (0, 255, 255)}
+DEFAULT_RGB = (255, 255, 255)
+
+# r,g,b values and pens already worked out, addressed by color_key()
+rgb_values = {}
+pens = {}
+pen_display = None
+
+def color_key(color):
+    """Returns a form of color that can be used as a dictionary key"""
+    if isinstance(color, list):
+        return tuple(color)
+    return color
+
+def parse_color(color) -> tuple | None:
+    """
+    Works out the r,g,b values of a color
+    Args:
+        color: one of the names in NAMED_COLORS in any case, a '#RRGGBB' hex
+            string, or a list or tuple of red, green, and blue from 0 to 255
+    Returns:
+        tuple of red, green, and blue or None if color is not understood
+    """
+    if isinstance(color, str):
+        rgb = NAMED_COLORS.get(color.lower())
+        if rgb is None and len(color) == 7 and color[0] == '#':
+            try:
+                rgb = (int(color[1:3], 16), int(color[3:5], 16), int(color[5:7], 16))
+            except ValueError:
+                rgb = None
+        return rgb
+    if isinstance(color, (tuple, list)) and len(color) >= 3:
+        if all(isinstance(value, int) and 0 <= value <= 255 for value in color[:3]):
+            return color[0], color[1], color[2]
+    return None
+
+def to_rgb(color) -> tuple:
+    """
+    Returns the r,g,b values of a color for use as inputs to Pimoroni pico
+    display.create_pen() method, worked out the first time the color is used.
+    Colors that are not understood are white
+    Args:
+        color: a color as taken by parse_color() or None
+    """
+    key = color_key(color)
+    rgb = rgb_values.get(key)
+    if rgb is None:
+        rgb = parse_color(color)
+        if rgb is None:
+            if color is not None:
+                print(f'Unknown color: {color}. Defaulting to white.')
+            rgb = DEFAULT_RGB
+        rgb_values[key] = rgb
+    return rgb
+
+def get_pen(display, color) -> int:
+    """
+    Returns the pen for a color, made the first time the color is used
+    Args:
+        display: the PicoGraphics object the pen is for
+        color: a color as taken by parse_color() or None
+    """
+    global pen_display
+    if display is not pen_display:
+        pens.clear()
+        pen_display = display
+    key = color_key(color)
+    pen = pens.get(key)
+    if pen is None:
+        pen = display.create_pen(*to_rgb(color))
+        pens[key] = pen
+    return pen
@@ -0,0 +1,101 @@
+"""
+player_state.py 2026-10-18 v 1.0
+
+Author: Brent Goode
+
+Local mirror of player flags that toggle buttons change, so a press can act
+on and show the new state straight away and check it against the server later
+
+"""
+
+import time
+
+class PlayerState:
+    """
+    Expected values of player flags like power, muting, and synced that have
+    been changed by a command but not yet seen in a status from the server
+
+    A toggle reads the flag from here instead of asking the server first,
+    and records the value it sets. reconcile() is run after each status
+    update. A flag whose status matches the expected value is confirmed and
+    read from the player's status again. If the status still differs after
+    settle_ms, or the command fails, the expected value is dropped and its
+    rollback function is called with the server's value so the screen can be
+    put back.
+
+    Attributes
+    ----------
+    player: Player
+        the micropyLMS Player whose status is mirrored
+    settle_ms: int
+        milliseconds a command has to show up in the status before it is
+        rolled back
+    expected: dict
+        expected value, ticks_ms when it was set, and rollback function
+        addressed by flag name
+
+    Methods
+    -------
+    get(name: str)
+        returns the expected value of a flag, or its value in the last status
+    expect(name: str, value, rollback)
+        records the value a command has just set a flag to
+    rollback(name: str)
+        drops the expected value of a flag after its command failed
+    reconcile()
+        checks the expected values against the last status
+    """
+
+    def __init__(self, player, settle_ms: int = 3000):
+        """Inits PlayerState for player with nothing expected"""
+        self.player = player
+        self.settle_ms = settle_ms
+        self.expected = {}
+
+    def get(self, name: str):
+        """
+        Returns the expected value of a flag, or its value in the last status
+        if nothing is expected
+        Args:
+            name: name of the Player property, like 'power'
+        """
+        if name in self.expected:
+            return self.expected[name][0]
+        return getattr(self.player, name)
+
+    def expect(self, name: str, value, rollback=None):
+        """
+        Records the value a command has just set a flag to
+        Args:
+            name: name of the Player property, like 'power'
+            value: the value the command set
+            rollback: function called with the server's value if the
+                command does not take effect, or None
+        """
+        self.expected[name] = (value, time.ticks_ms(), rollback)
+
+    def rollback(self, name: str):
+        """
+        Drops the expected value of a flag and calls its rollback function
+        with the value in the last status
+        Args:
+            name: name of the Player property, like 'power'
+        """
+        entry = self.expected.pop(name, None)
+        if entry and entry[2]:
+            entry[2](getattr(self.player, name))
+
+    def reconcile(self):
+        """
+        Checks the expected values against the last status. Matches are
+        confirmed, and values that still do not match after settle_ms are
+        rolled back
+        """
+        now = time.ticks_ms()
+        for name in list(self.expected):
+            value, set_at, _ = self.expected[name]
+            if getattr(self.player, name) == value:
+                del self.expected[name]
+            elif time.ticks_diff(now, set_at) >= self.settle_ms:
+                print(f'Player {name} is not {value} on the server, rolling back')
+                self.rollback(name)
@@ -0,0 +1,131 @@
+"""
+touch_events.py 2026-10-18 v 1.0
+
+Author: Brent Goode
+
+Touch event engine that polls the touch controller once per frame and turns
+the raw finger states into a queue of debounced touch events
+
+"""
+
+import time
+
+PRESS = 'press'
+RELEASE = 'release'
+LONG_PRESS = 'long_press'
+SWIPE_LEFT = 'swipe_left'
+SWIPE_RIGHT = 'swipe_right'
+
+class TouchEvents:
+    """
+    Tracks up to two fingers on the touch controller and queues touch events
+
+    Each event is a tuple of (kind, finger, x, y) where kind is one of PRESS,
+    RELEASE, LONG_PRESS, SWIPE_LEFT, or SWIPE_RIGHT, finger is 0 or 1, and
+    x, y is where the finger first touched the screen. A finger produces a
+    PRESS when it touches down, a LONG_PRESS if it is held in place for
+    long_press_ms, and, unless it was already reported as a long press, when
+    it lifts either a swipe if it travelled swipe_distance horizontally or a
+    RELEASE. A lift is only accepted once the finger has been off the
+    screen for debounce_ms so brief drop outs from the controller are ignored.
+
+    Attributes
+    ----------
+    touch:
+        The touch controller object from the Presto board object
+    debounce_ms: int
+        milliseconds a finger must be lifted before the lift is accepted
+    long_press_ms: int
+        milliseconds a finger must be held in place to make a long press
+    swipe_distance: int
+        horizontal distance in pixels a finger must travel to make a swipe
+    fingers: list
+        per finger state lists of down, start x, start y, x, y, down time,
+        lift time, and whether a long press was already reported
+    queue: list
+        the events that have not been handled yet
+
+    Methods
+    -------
+    poll() -> list
+        reads the touch controller once and returns the queued events
+    get_event() -> tuple
+        removes and returns the oldest queued event or None
+    clear()
+        drops all queued events
+    """
+
+    def __init__(self,
+                 touch,
+                 debounce_ms: int = 30,
+                 long_press_ms: int = 600,
+                 swipe_distance: int = 80):
+        """Inits TouchEvents with defaults for the timing and distance thresholds"""
+        self.touch = touch
+        self.debounce_ms = debounce_ms
+        self.long_press_ms = long_press_ms
+        self.swipe_distance = swipe_distance
+        self.fingers = [[False, 0, 0, 0, 0, 0, None, False],
+                        [False, 0, 0, 0, 0, 0, None, False]]
+        self.queue = []
+
+    def poll(self) -> list:
+        """
+        Reads the touch controller once and updates the state of both fingers
+        Returns:
+            the list of queued events
+        """
+        self.touch.poll()
+        now = time.ticks_ms()
+        self._track(0, self.touch.state, self.touch.x, self.touch.y, now)
+        self._track(1, self.touch.state2, self.touch.x2, self.touch.y2, now)
+        return self.queue
+
+    def get_event(self) -> tuple | None:
+        """Removes and returns the oldest queued event or None if there are none"""
+        if self.queue:
+            return self.queue.pop(0)
+        return None
+
+    def clear(self):
+        """Drops all queued events"""
+        self.queue = []
+
+    def _track(self, index: int, state: bool, x: int, y: int, now: int):
+        """Updates the state of one finger and queues any resulting events"""
+        finger = self.fingers[index]
+        if state:
+            finger[6] = None
+            if not finger[0]:
+                finger[0] = True
+                finger[1] = finger[3] = x
+                finger[2] = finger[4] = y
+                finger[5] = now
+                finger[7] = False
+                self.queue.append((PRESS, index, x, y))
+                return
+            finger[3] = x
+            finger[4] = y
+            if not finger[7] and time.ticks_diff(now, finger[5]) >= self.long_press_ms:
+                if abs(x - finger[1]) < self.swipe_distance//2 and \
+                   abs(y - finger[2]) < self.swipe_distance//2:
+                    finger[7] = True
+                    self.queue.append((LONG_PRESS, index, finger[1], finger[2]))
+        elif finger[0]:
+            if finger[6] is None:
+                finger[6] = now
+            if time.ticks_diff(now, finger[6]) < self.debounce_ms:
+                return
+            finger[0] = False
+            finger[6] = None
+            if finger[7]:
+                return
+            travel_x = finger[3] - finger[1]
+            travel_y = finger[4] - finger[2]
+            if abs(travel_x) >= self.swipe_distance and abs(travel_x) > abs(travel_y):
+                if travel_x < 0:
+                    self.queue.append((SWIPE_LEFT, index, finger[1], finger[2]))
+                else:
+                    self.queue.append((SWIPE_RIGHT, index, finger[1], finger[2]))
+            else:
+                self.queue.append((RELEASE, index, finger[1], finger[2]))
@@ -8,46 +8,32 @@ Utility functions for the stream deck project
 """
 
 import json
+import struct
 import time
+import hashlib
+import binascii
+import socket
+import random
 import ntptime
-from micropytimer import setup_timer
+import palette
+from micropytimer import setup_timer, start_timer, override_timer_expiration
+from button_layout import LAYOUT_FORMAT
 
 
 def color_converter(color):
     """Takes a variety of color imports and converts them to r,g,b values 
-        for use as inputs to Pimoroni pico display.create_pen() method
+        for use as inputs to Pimoroni pico display.create_pen() method.
+        Names, '#RRGGBB' hex strings, and r,g,b lists are understood, and
+        each color is only worked out once by the palette module
     """
-    if isinstance(color,str):
-        if color.lower() == 'black':
-            return 0, 0, 0
-        elif color.lower() == 'white':
-            return 255, 255, 255
-        elif color.lower() == 'red':
-            return 255, 0, 0
-        elif color.lower() == 'green':
-            return 0, 255, 0
-        elif color.lower() == 'blue':
-            return 0, 0, 255
-        elif color.lower() == 'yellow':
-            return 255, 255, 0
-        elif color.lower() == 'magenta':
-            return 255, 0, 255
-        elif color.lower() == 'aqua':
-            return 0, 255, 255
-        else:
-            print(f'Unknown color: {color}. Defaulting to white.')
-            return 255, 255, 255
-    elif isinstance(color,tuple) or isinstance(color,list):
-        return color[0], color[1], color[2]
-    else:
-        return 255, 255, 255
+    return palette.to_rgb(color)
 
 def show_message(board_obj,label):
     """Sets the screen of a Pimoroni pico device to show the text given by label.
         Useful for start up or other error messages"""
-    board_obj.display.set_pen(board_obj.display.create_pen(*color_converter('black')))
+    board_obj.display.set_pen(palette.get_pen(board_obj.display, 'black'))
     board_obj.display.clear()
-    board_obj.display.set_pen(board_obj.display.create_pen(*color_converter('white')))
+    board_obj.display.set_pen(palette.get_pen(board_obj.display, 'white'))
     display_width, display_height = board_obj.display.get_bounds()
     board_obj.display.text(label, 5, 10, display_width-10, 6)
     board_obj.update()
@@ -66,55 +52,242 @@ def read_input_file(json_file):
         other_vars = init_data
         return buttons_defs, margin_ratio, default_color, background_color, default_font, corner_radius, other_vars
 
+def read_layout_file(layout_file, json_file):
+    """Reads the button layout made ahead of time from json_file by
+        compile_button_defs.py. Returns the same values as read_input_file(),
+        but with the layout in place of the list of button definitions, or
+        None if there is no layout file or json_file has changed since it was made
+    """
+    try:
+        with open(layout_file,'r') as file:
+            layout = json.load(file)
+    except OSError:
+        return None
+    except Exception as exc:
+        print(f'Error reading {layout_file}: {exc}')
+        return None
+    if layout.get('format') != LAYOUT_FORMAT or layout.get('source') != json_file:
+        print(f'{layout_file} was not made from {json_file} by this version. Using {json_file}')
+        return None
+    try:
+        with open(json_file,'rb') as file:
+            source_hash = binascii.hexlify(hashlib.sha256(file.read()).digest()).decode()
+    except OSError:
+        source_hash = layout.get('source_hash')
+    if source_hash != layout.get('source_hash'):
+        print(f'{json_file} has changed since {layout_file} was made. Using {json_file}')
+        return None
+    return layout, layout.get('margin_ratio',0.1), layout.get('default_color'), \
+        layout.get('background_color'), layout.get('default_font'), \
+        layout.get('corner_radius'), layout.get('other_vars',{})
+
 timezone = None
+async_mode = False
+clock_synced = False
+time_set_callbacks = []
+ntp_socket = None
+ntp_address = None
+ntp_sent_at = 0
+ntp_attempts = 0
+NTP_PORT = 123
+NTP_POLL_MS = 100
+NTP_TIMEOUT_MS = 2000
+NTP_BASE_BACKOFF_MS = 2000
+NTP_MAX_BACKOFF_MS = 600000
 
-def set_time():
-    """ Uses micropython's ntptime module and local time zone data from the file
-        tz_data.json to correctly set the clock to local time and to keep up
-        with when to change to/from DTS.
+def is_coroutine(obj) -> bool:
+    """Returns True if obj is a coroutine, such as the result of calling an async function"""
+    return hasattr(obj, 'send') and hasattr(obj, 'throw')
+
+def run_action(result):
     """
-    with open('tz_data.json','r') as file:
-        dst_database = json.load(file)
-    
-    current_tz = dst_database.get(timezone)
-    if not current_tz:
-        current_tz = {1735718400:0}
-    current_tz = {int(k):v for k,v in current_tz.items()}
-    
-    retries = 1
-    total_tries = 4
-    success = False
+    Runs the coroutine returned by an action function. When the asyncio main
+    loop is running the coroutine is started as a task, otherwise it is run
+    to completion straight away. Results that are not coroutines are returned
+    unchanged
+    Args:
+        result: whatever an action function returned
+    Returns:
+        the task, the coroutine's result, or result
+    """
+    if not is_coroutine(result):
+        return result
+    if async_mode:
+        import asyncio
+        return asyncio.create_task(result)
+    try:
+        while True:
+            result.send(None)
+    except StopIteration as exc:
+        return exc.value
+
+def coroutine_action(fn):
+    """
+    Decorator for async action functions so that they can be called like
+    normal functions by timers and other actions. Calling the decorated
+    function runs the coroutine with run_action()
+    """
+    def action(*args):
+        return run_action(fn(*args))
+    return action
+
+def find_utc_offset(zone: str, utc_time: int, file_name: str = 'tz_data.bin') -> tuple:
+    """
+    Looks up the UTC offset of a time zone in the binary time zone data file
+    made by generate_tz_data.py. The zone is found by a binary search of the
+    sorted zone index, and only its index records, name, and transitions are
+    read from the file
+    Args:
+        zone: name of the time zone, like 'America/Los_Angeles'
+        utc_time: seconds since the epoch in UTC
+        file_name: path of the time zone data file
+    Returns:
+        tuple of the UTC offset in seconds at utc_time and the UTC time of the
+        next change or None if there are no more. The offset is 0 and there
+        are no changes if the zone is not in the file
+    """
+    if not zone:
+        return 0, None
+    name = zone.encode()
+    with open(file_name,'rb') as file:
+        magic, zone_count, _, names_offset, schedules_offset = struct.unpack('<4sHHII', file.read(16))
+        if magic != b'TZD1':
+            raise ValueError(f'{file_name} is not a time zone data file')
+        schedule_number = None
+        low = 0
+        high = zone_count - 1
+        while low <= high:
+            middle = (low + high)//2
+            file.seek(16 + 8*middle)
+            name_position, name_length, number = struct.unpack('<IHH', file.read(8))
+            file.seek(names_offset + name_position)
+            found = file.read(name_length)
+            if found == name:
+                schedule_number = number
+                break
+            elif found < name:
+                low = middle + 1
+            else:
+                high = middle - 1
+        if schedule_number is None:
+            return 0, None
+        file.seek(schedules_offset + 8*schedule_number)
+        position, count, _ = struct.unpack('<IHH', file.read(8))
+        file.seek(position)
+        transitions = file.read(8*count)
     
-    while not success and retries <= total_tries:
-        try:
-            gmt_time = ntptime.time()
-            success = True
-        except Exception as exc:
-            wait = retries * 3
-            print(f'{exc}, Waiting {wait} seconds to retry.')
-            time.sleep(wait)
-            retries += 1
-    if not success:
-        print('Maximum retries reached')
-        print('Will try setting clock again in ten minutes')
-        setup_timer('initial_clock_set',{"interval":600,
-                                         "action":"set_time",
-                                         "library":"utils",
-                                         "running":True,
-                                         "long":True})
+    # Find how many transitions are before utc_time
+    low = 0
+    high = count
+    while low < high:
+        middle = (low + high)//2
+        if struct.unpack_from('<i', transitions, 8*middle)[0] < utc_time:
+            low = middle + 1
+        else:
+            high = middle
+    if low:
+        offset = struct.unpack_from('<i', transitions, 8*(low-1) + 4)[0]
+    else:
+        offset = 0
+    if low < count:
+        next_change = struct.unpack_from('<i', transitions, 8*low)[0]
+    else:
+        next_change = None
+    return offset, next_change
+
+def set_time():
+    """ Starts setting the clock to local time without blocking. Sends a
+        request to the NTP server and starts the clock_sync timer that checks
+        for the reply with check_clock_sync(). If there is no reply the
+        request is sent again after a back off delay that doubles each time,
+        with some random jitter so many controllers do not retry together.
+        Also used by the dst_change timer to set the clock at DST changes.
+    Returns:
+        True if the request was sent
+    """
+    global ntp_socket, ntp_sent_at, ntp_address
+    close_ntp_socket()
+    try:
+        if ntp_address is None:
+            ntp_address = socket.getaddrinfo(ntptime.host, NTP_PORT)[0][-1]
+        request = bytearray(48)
+        request[0] = 0x1B
+        ntp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        ntp_socket.setblocking(False)
+        ntp_socket.sendto(request, ntp_address)
+    except Exception as exc:
+        print(f'Error sending NTP request: {exc}')
+        close_ntp_socket()
+        retry_clock_sync()
         return False
-    
-    still_less = False
-    next_time_change_local = None
-    current_delta = 0
-    
-    for time_change in sorted(current_tz):
-        if still_less:
-            next_time_change_local = time_change + current_delta
-            still_less = False
-        if time_change < gmt_time:
-            current_delta = current_tz[time_change]
-            still_less = True
+    ntp_sent_at = time.ticks_ms()
+    setup_timer('clock_sync',{"interval":NTP_POLL_MS,
+                              "action":"check_clock_sync",
+                              "library":"utils",
+                              "running":True})
+    return True
+
+def check_clock_sync():
+    """ Checks for the NTP server's reply without blocking. Sets the clock if
+        it has arrived, otherwise checks again or retries once the request
+        has timed out
+    """
+    try:
+        reply = ntp_socket.recv(48)
+    except OSError:
+        reply = None
+    if reply and len(reply) >= 48:
+        close_ntp_socket()
+        ntp_epoch_delta = 3155673600 if time.gmtime(0)[0] == 2000 else 2208988800
+        apply_time(struct.unpack('!I', reply[40:44])[0] - ntp_epoch_delta)
+    elif time.ticks_diff(time.ticks_ms(), ntp_sent_at) >= NTP_TIMEOUT_MS:
+        close_ntp_socket()
+        retry_clock_sync()
+    else:
+        setup_timer('clock_sync',{"interval":NTP_POLL_MS,
+                                  "action":"check_clock_sync",
+                                  "library":"utils",
+                                  "running":True})
+
+def retry_clock_sync():
+    """ Sets the clock_sync timer to send the NTP request again after a
+        jittered back off delay
+    """
+    global ntp_attempts
+    delay = min(NTP_MAX_BACKOFF_MS, NTP_BASE_BACKOFF_MS * 2**ntp_attempts)
+    delay = int(delay * (0.75 + 0.5*random.getrandbits(10)/1024))
+    if delay < NTP_MAX_BACKOFF_MS:
+        ntp_attempts += 1
+    print(f'No reply from NTP server. Will try setting clock again in {delay/1000:.1f} seconds')
+    setup_timer('clock_sync',{"interval":delay,
+                              "action":"set_time",
+                              "library":"utils",
+                              "running":True})
+
+def close_ntp_socket():
+    """Closes the socket of the last NTP request"""
+    global ntp_socket
+    if ntp_socket:
+        try:
+            ntp_socket.close()
+        except OSError:
+            pass
+    ntp_socket = None
+
+def apply_time(gmt_time: int):
+    """ Sets the clock to local time using the local time zone data from the
+        file tz_data.bin, starts the dst_change timer for the next change
+        to/from DST, and calls the functions in time_set_callbacks. Runs in a
+        timer action, so the dst_change timer must already be set up
+    Args:
+        gmt_time: seconds since the epoch in UTC from the NTP server
+    """
+    global clock_synced, ntp_attempts
+    current_delta, next_time_change = find_utc_offset(timezone, gmt_time)
+    if next_time_change is None:
+        next_time_change_local = None
+    else:
+        next_time_change_local = next_time_change + current_delta
     
     time_tuple = time.gmtime(gmt_time + current_delta)
     
@@ -129,12 +302,12 @@ def set_time():
                             0))
     
     if next_time_change_local:
-        setup_timer('dst_change',{"expiration":next_time_change_local,
-                                "action":"set_time",
-                                "library":"utils",
-                                "running":True,
-                                "long":True})
-    return True
+        override_timer_expiration('dst_change', next_time_change_local - time.time())
+        start_timer('dst_change')
+    clock_synced = True
+    ntp_attempts = 0
+    for callback in time_set_callbacks:
+        callback()
 
 def parse_time(year, month, mday, hour, minute, second, weekday, yearday):
     """breaks out the response to time.localimte() and returns a string of the
@@ -10,21 +10,32 @@ Main script for LMS controller project
 
 """
 
+import boot_profiler
+boot_profiler.start()
+
 from presto import Presto
 from button_set import ButtonSet
-from utils import show_message, read_input_file
+from utils import show_message, read_input_file, read_layout_file
 from micropytimer import check_timers
 import ezwifi
 
 board_obj = Presto(full_res=True)
 
 show_message(board_obj,"Loading...")
+boot_profiler.mark('Presto init')
 
 if not ezwifi.connect(verbose=True):
     show_message(board_obj,"Wifi failed to connect")
+boot_profiler.mark('wifi connect')
 
 buttons_defs, margin_ratio, default_color, background_color, \
-    default_font, corner_radius, other_vars = read_input_file('button_defs.json')
+    default_font, corner_radius, other_vars = read_layout_file('button_layout.json','button_defs.json') \
+                                              or read_input_file('button_defs.json')
+boot_profiler.mark('read config')
+
+use_asyncio = other_vars.pop('use_asyncio', False)
+boot_profile = other_vars.pop('boot_profile', {})
+diagnostics = other_vars.pop('diagnostics', {})
 
 buttons = ButtonSet(buttons_defs,
                     board_obj,
@@ -35,7 +46,18 @@ buttons = ButtonSet(buttons_defs,
                     corner_radius,
                     other_vars=other_vars)
 
+if diagnostics.get('enabled'):
+    import instrumentation
+    check_timers = instrumentation.install(buttons, diagnostics)
+
 buttons.draw_page()
+boot_profiler.mark('first draw')
+boot_profiler.finish(boot_profile.get('enabled', False),
+                     boot_profile.get('file') if boot_profile.get('enabled') else None)
+
+if use_asyncio:
+    import async_loop
+    async_loop.run(buttons, check_timers=check_timers)
 
 while True:
     action_result = buttons.touch_to_action()
@@ -45,3 +67,5 @@ while True:
     if ButtonSet.needs_redrawing:
         buttons.draw_page()
         ButtonSet.needs_redrawing = False
+    elif ButtonSet.dirty_buttons:
+        buttons.draw_dirty()
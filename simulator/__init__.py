@@ -0,0 +1,214 @@
+"""
+simulator 2026-10-18 v 1.0
+
+Author: Brent Goode
+
+Runs the LMS controller's main.py unmodified on a computer. Stand ins for the
+device modules are in simulator/device, time runs on a virtual clock, the
+device's flash is a temporary directory, and a stub LMS server on local
+ports plays the part of the music server and the NTP server. The asyncio
+main loop runs on an event loop that also keeps to the virtual clock
+
+"""
+
+import asyncio
+import copy
+import json
+import os
+import runpy
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from simulator.clock import VirtualClock
+from simulator.event_loop import VirtualEventLoopPolicy
+from simulator.filesystem import DeviceFilesystem
+from simulator.script import TouchScript, ScriptFinished
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEVICE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'device')
+RESULTS_MARKER = 'SIMULATOR RESULTS '
+
+def merge(settings: dict, overrides: dict) -> dict:
+    """Returns a copy of settings with overrides merged in, dictionaries merged key by key"""
+    merged = copy.deepcopy(settings)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+def report_results(results: dict):
+    """Prints the results of a run in a child process for run_in_child() to read"""
+    print(RESULTS_MARKER + json.dumps(results))
+
+def run_in_child(module: str, *args) -> dict:
+    """
+    Runs a simulator module in a new Python process, so the run starts from
+    a clean boot, and returns the results it gave to report_results()
+    Args:
+        module: name of the module to run, like simulator.perf
+        args: its command line arguments
+    """
+    process = subprocess.run([sys.executable, '-m', module, *[str(arg) for arg in args]],
+                             cwd=PROJECT_DIR, capture_output=True, text=True)
+    for line in process.stdout.splitlines():
+        if line.startswith(RESULTS_MARKER):
+            return json.loads(line[len(RESULTS_MARKER):])
+    print(process.stdout[-4000:])
+    print(process.stderr[-4000:])
+    raise RuntimeError(f'{module} {" ".join(str(arg) for arg in args)} did not give any results')
+
+class Simulation:
+    """
+    One run of the controller in the simulator
+
+    Only one Simulation can run in a process, because the controller keeps
+    its state in module and class variables. Run each in its own process to
+    start from a clean boot.
+
+    Attributes
+    ----------
+    project_dir: str
+        directory holding main.py, lib, art, and button_defs.json
+    overrides: dict
+        settings merged into button_defs.json before it is written to the
+        simulated flash
+    frame_ms: float
+        simulated milliseconds each pass of the main loop takes
+    clock: VirtualClock
+        the virtual clock
+    stub: StubLMS
+        the stub LMS server
+    stub_settings: dict
+        arguments the stub LMS server is made with when stub is not given
+    root: str
+        temporary directory standing in for the device's flash
+    filesystem: DeviceFilesystem
+        maps device paths into root
+    board: Presto
+        the simulated Presto made by main.py, once it has been made
+    board_listeners: list
+        functions called with the board as soon as main.py makes it
+    loop_policy: AbstractEventLoopPolicy
+        the asyncio event loop policy replaced while the simulation runs
+
+    Methods
+    -------
+    start()
+        sets up the simulated device and starts the stub server
+    run(script: TouchScript) -> str
+        runs main.py until the script finishes
+    close()
+        stops the stub server and removes the simulated flash
+    """
+
+    def __init__(self,
+                 project_dir: str = PROJECT_DIR,
+                 overrides: dict | None = None,
+                 frame_ms: float = 10,
+                 stub=None,
+                 stub_settings: dict | None = None):
+        """Inits Simulation without starting anything"""
+        self.project_dir = project_dir
+        self.overrides = overrides or {}
+        self.frame_ms = frame_ms
+        self.clock = VirtualClock()
+        self.stub = stub
+        self.stub_settings = stub_settings or {}
+        self.root = None
+        self.filesystem = None
+        self.board = None
+        self.board_listeners = []
+        self.script = None
+        self.loop_policy = None
+
+    def start(self):
+        """
+        Installs the virtual clock, the device modules, and the simulated
+        flash, starts the stub server, and writes button_defs.json with the
+        server's address
+        """
+        self.clock.install()
+        if self.stub is None:
+            from simulator.lms_stub import StubLMS
+            self.stub = StubLMS(**self.stub_settings)
+        self.stub.start()
+        self.clock.watch(self.stub)
+        self.clock.every(1000, self.stub.update)
+        self.loop_policy = asyncio.get_event_loop_policy()
+        asyncio.set_event_loop_policy(VirtualEventLoopPolicy(self.clock))
+
+        self.root = tempfile.mkdtemp(prefix='lms_controller_')
+        os.symlink(os.path.join(self.project_dir, 'art'), os.path.join(self.root, 'art'))
+        shutil.copy(os.path.join(self.project_dir, 'tz_data.bin'), self.root)
+        with open(os.path.join(self.project_dir, 'button_defs.json'), 'r') as file:
+            settings = json.load(file)
+        first_player = next(iter(self.stub.players.values()))
+        settings = merge(settings, {"host": "127.0.0.1",
+                                    "port": self.stub.http_port,
+                                    "player": first_player.name,
+                                    "timezone": "America/New_York",
+                                    "status_subscription": {"cli_port": self.stub.cli_port}})
+        settings = merge(settings, self.overrides)
+        with open(os.path.join(self.root, 'button_defs.json'), 'w') as file:
+            json.dump(settings, file, indent=1)
+
+        for path in (os.path.join(self.project_dir, 'lib'), DEVICE_DIR, self.project_dir):
+            if path in sys.path:
+                sys.path.remove(path)
+        sys.path[0:0] = [DEVICE_DIR, os.path.join(self.project_dir, 'lib')]
+        self.filesystem = DeviceFilesystem(self.root)
+        self.filesystem.install()
+        os.chdir(self.root)
+
+        import ntptime
+        import utils
+        import presto
+        ntptime.host = '127.0.0.1'
+        utils.NTP_PORT = self.stub.ntp_port
+        presto.on_create.append(self._board_made)
+
+    def run(self, script: TouchScript | None = None) -> str:
+        """
+        Runs main.py until the touch script finishes
+        Args:
+            script: what is done on the touch screen, starting when main.py
+                makes the Presto. With no script the run never finishes
+        Returns:
+            'finished' when the script ran out, 'reset' if the controller
+            reset the device, or 'returned' if main.py ended by itself
+        """
+        from machine import DeviceReset
+        self.script = script
+        try:
+            runpy.run_path(os.path.join(self.project_dir, 'main.py'), run_name='__main__')
+        except ScriptFinished:
+            return 'finished'
+        except DeviceReset:
+            return 'reset'
+        return 'returned'
+
+    def close(self):
+        """Stops the stub server, puts back the replaced functions, and removes the simulated flash"""
+        if self.stub:
+            self.stub.stop()
+        if self.filesystem:
+            self.filesystem.uninstall()
+        os.chdir(self.project_dir)
+        if self.root:
+            shutil.rmtree(self.root, ignore_errors=True)
+        if self.loop_policy:
+            asyncio.set_event_loop_policy(self.loop_policy)
+        self.clock.uninstall()
+
+    def _board_made(self, board):
+        """Loads the script into the touch screen of the Presto main.py has made"""
+        self.board = board
+        board.touch.frame_ms = self.frame_ms
+        if self.script:
+            board.touch.load(self.script)
+        for listener in self.board_listeners:
+            listener(board)
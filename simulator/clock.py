@@ -0,0 +1,205 @@
+"""
+clock.py 2026-10-18 v 1.0
+
+Author: Brent Goode
+
+Virtual clock for the simulator. Replaces the functions of the time module
+that the controller code uses with MicroPython style versions that only move
+forward when the simulation says so, so scripted runs give the same timer
+behaviour every time however fast the computer running them is
+
+"""
+
+import calendar
+import time
+
+TICKS_PERIOD = 1 << 30
+TICKS_MAX = TICKS_PERIOD - 1
+TICKS_HALFPERIOD = TICKS_PERIOD // 2
+
+# The Presto's real time clock starts here at power on until it is set
+DEVICE_START_TIME = 1609459200
+
+current = None
+
+class VirtualClock:
+    """
+    A clock for the simulated device
+
+    Ticks count from zero at power on and wrap at 2**30 like MicroPython's
+    ticks_ms() and ticks_us(). The wall clock acts like the device's real
+    time clock, which has no time zone, so localtime() and gmtime() are the
+    same and it only changes to local time when the controller sets it.
+
+    Attributes
+    ----------
+    elapsed_us: int
+        microseconds since the simulated power on
+    wall_start: int
+        wall clock seconds at power on
+    ticks_offset: int
+        added to the tick counters so runs can start close to a wrap around
+    hooks: list
+        [interval_ms, due_ms, fn] for functions called as time passes
+    watchers: list
+        objects, like the stub LMS server, whose background threads must
+        be settled before and after the clock moves
+    loop_running: bool
+        whether the simulator's asyncio event loop is moving the clock, so
+        background threads can wait for it to move instead of moving it
+        themselves
+    originals: dict
+        the time module functions replaced by install()
+
+    Methods
+    -------
+    advance(ms: float, settle: bool)
+        moves the clock forward and calls any hooks that are due
+    every(interval_ms: int, fn)
+        calls fn each time interval_ms of simulated time passes
+    watch(watcher)
+        settles watcher each time the clock moves
+    settle()
+        waits for the background threads of the watchers to finish what
+        they are doing at the current time
+    next_due_ms() -> int
+        milliseconds until a watcher next needs the clock to move
+    elapsed_ms() -> int
+        milliseconds since the simulated power on
+    set_datetime(datetime: tuple)
+        sets the wall clock from a machine.RTC().datetime() tuple
+    install()
+        replaces the time module functions with the virtual ones
+    uninstall()
+        puts the original time module functions back
+    """
+
+    def __init__(self, wall_start: int = DEVICE_START_TIME, ticks_offset: int = 0):
+        """Inits VirtualClock at power on"""
+        self.elapsed_us = 0
+        self.wall_start = wall_start
+        self.ticks_offset = ticks_offset
+        self.hooks = []
+        self.watchers = []
+        self.loop_running = False
+        self.originals = {}
+
+    def advance(self, ms: float, settle: bool = True):
+        """
+        Moves the clock forward and calls the hooks that fall due on the way.
+        The watchers are settled first, so anything sent to them before now
+        is answered at the time it was sent, and again afterwards, so the
+        answers that fall due are sent before the controller goes on
+        Args:
+            ms: milliseconds to move forward
+            settle: False when called from a watcher's own thread while the
+                controller is blocked waiting for it
+        """
+        if settle:
+            self.settle()
+        self.elapsed_us += int(ms*1000)
+        for watcher in self.watchers:
+            watcher.advanced()
+        if settle:
+            self.settle()
+        now_ms = self.elapsed_ms()
+        for hook in self.hooks:
+            if now_ms >= hook[1]:
+                hook[1] = now_ms + hook[0]
+                hook[2]()
+
+    def every(self, interval_ms: int, fn):
+        """Calls fn each time interval_ms of simulated time passes"""
+        self.hooks.append([interval_ms, self.elapsed_ms() + interval_ms, fn])
+
+    def watch(self, watcher):
+        """
+        Settles watcher each time the clock moves
+        Args:
+            watcher: object with settle(), advanced(), and next_due_ms() methods
+        """
+        self.watchers.append(watcher)
+
+    def settle(self):
+        """Waits for the background threads of the watchers to finish what they are doing at the current time"""
+        for watcher in self.watchers:
+            watcher.settle()
+
+    def next_due_ms(self) -> int | None:
+        """Returns the milliseconds until a watcher next needs the clock to move, or None"""
+        due = [ms for ms in (watcher.next_due_ms() for watcher in self.watchers) if ms is not None]
+        return min(due) if due else None
+
+    def elapsed_ms(self) -> int:
+        """Returns the milliseconds since the simulated power on"""
+        return self.elapsed_us // 1000
+
+    def set_datetime(self, datetime: tuple):
+        """
+        Sets the wall clock
+        Args:
+            datetime: tuple of year, month, day, weekday, hours, minutes,
+                seconds, and subseconds as passed to machine.RTC().datetime()
+        """
+        year, month, day, weekday, hours, minutes, seconds = datetime[:7]
+        now = calendar.timegm((year, month, day, hours, minutes, seconds))
+        self.wall_start = now - self.elapsed_us // 1000000
+
+    # MicroPython time functions
+
+    def ticks_ms(self) -> int:
+        return (self.elapsed_us // 1000 + self.ticks_offset) & TICKS_MAX
+
+    def ticks_us(self) -> int:
+        return (self.elapsed_us + self.ticks_offset) & TICKS_MAX
+
+    def ticks_add(self, ticks: int, delta: int) -> int:
+        return (ticks + delta) & TICKS_MAX
+
+    def ticks_diff(self, ticks1: int, ticks2: int) -> int:
+        return ((ticks1 - ticks2 + TICKS_HALFPERIOD) & TICKS_MAX) - TICKS_HALFPERIOD
+
+    def sleep(self, seconds: float):
+        self.advance(seconds*1000)
+
+    def sleep_ms(self, ms: int):
+        self.advance(ms)
+
+    def sleep_us(self, us: int):
+        self.advance(us/1000)
+
+    def time(self) -> int:
+        return self.wall_start + self.elapsed_us // 1000000
+
+    def gmtime(self, seconds: int | None = None) -> tuple:
+        if seconds is None:
+            seconds = self.time()
+        return tuple(self.originals.get('gmtime', time.gmtime)(int(seconds))[:8])
+
+    def mktime(self, time_tuple: tuple) -> int:
+        return calendar.timegm(tuple(time_tuple[:6]))
+
+    def install(self):
+        """Replaces the time module functions with the virtual ones"""
+        global current
+        for name in ('ticks_ms', 'ticks_us', 'ticks_add', 'ticks_diff', 'sleep',
+                     'sleep_ms', 'sleep_us', 'time', 'gmtime', 'localtime', 'mktime'):
+            if name not in self.originals:
+                self.originals[name] = getattr(time, name, None)
+        for name in ('ticks_ms', 'ticks_us', 'ticks_add', 'ticks_diff', 'sleep',
+                     'sleep_ms', 'sleep_us', 'time', 'gmtime', 'mktime'):
+            setattr(time, name, getattr(self, name))
+        # The device has no time zone so local time is the real time clock
+        time.localtime = self.gmtime
+        current = self
+
+    def uninstall(self):
+        """Puts back the time module functions replaced by install()"""
+        global current
+        for name, fn in self.originals.items():
+            if fn is None:
+                delattr(time, name)
+            else:
+                setattr(time, name, fn)
+        self.originals = {}
+        current = None
@@ -0,0 +1,12 @@
+"""
+ezwifi.py 2026-10-18 v 1.0
+
+Author: Brent Goode
+
+Simulator stand in for Pimoroni's ezwifi module. The computer's own network
+is always connected
+
+"""
+
+def connect(verbose: bool = False, **kwargs) -> bool:
+    return True
@@ -0,0 +1,26 @@
+"""
+machine.py 2026-10-18 v 1.0
+
+Author: Brent Goode
+
+Simulator stand in for the parts of MicroPython's machine module the
+controller uses
+
+"""
+
+from simulator import clock
+
+class DeviceReset(BaseException):
+    """Raised by reset() to end the simulation as a reset would end the program"""
+
+class RTC:
+    """The real time clock, which is the simulator's virtual wall clock"""
+
+    def datetime(self, datetime: tuple | None = None):
+        if datetime is None:
+            now = clock.current.gmtime()
+            return (now[0], now[1], now[2], now[6], now[3], now[4], now[5], 0)
+        clock.current.set_datetime(datetime)
+
+def reset():
+    raise DeviceReset()
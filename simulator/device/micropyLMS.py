@@ -0,0 +1,303 @@
+"""
+micropyLMS.py 2026-10-18 v 1.0
+
+Author: Brent Goode
+
+Simulator stand in for the micropyLMS library with the same functions, Player
+class, and results. Queries go through the simulator's requests module to
+the stub LMS server, so they are counted there
+
+"""
+
+import json
+import requests
+
+REPEAT_MODE = ["none", "song", "playlist"]
+SHUFFLE_MODE = ["none", "song", "album"]
+
+def build_url(host: str, prefix: str = 'http', port: str | int | None = '9000',
+              username: str | None = '', password: str | None = '') -> str:
+    base_url = f"{prefix}://"
+    if username and password:
+        base_url += f"{username}:{password}@"
+    return base_url + f"{host}:{port}/"
+
+def core_query(server_url: str, *command, player: str = "") -> dict | None:
+    query_data = {"id": "1", "method": "slim.request", "params": [player, command]}
+    try:
+        response = requests.get(server_url+'jsonrpc.js', json=query_data)
+        if response.status_code != 200:
+            print(f"Query failed, response code: {response.status_code}")
+            return None
+        result = json.loads(response.content.decode(response.encoding)).get("result")
+    except Exception as exc:
+        print(exc)
+        return None
+    if not isinstance(result, dict):
+        print(f"Received invalid response: {result}")
+        return None
+    return result
+
+def get_players(server_url, image_scale: str | None = None):
+    players = []
+    data = core_query(server_url, "players", "status")
+    if data is None or not isinstance(data.get("players_loop"), list):
+        return []
+    for item in data["players_loop"]:
+        if not (isinstance(item, dict) and item.get("playerid") and item.get("name")):
+            print(f"Received invalid response from LMS for player: {item}")
+            continue
+        new_player = Player(server_url, item["playerid"], image_scale)
+        new_player.status_update()
+        players.append(new_player)
+    return players
+
+def get_player(server_url, name: str | None = None, image_scale: str | None = None):
+    player_list = get_players(server_url, image_scale)
+    if name:
+        players_found = [item for item in player_list if item.name.lower() == name.lower()]
+        if len(players_found) > 1:
+            print(f'WARNING: More than one player named {name} found.')
+        if players_found:
+            return players_found[0]
+        if player_list:
+            print(f'WARNING: No player named {name} found.')
+            print(f'Returning {player_list[0].name} instead.')
+            return player_list[0]
+    elif player_list:
+        return player_list[0]
+    return None
+
+class Player:
+    """An LMS player, with the same attributes and methods as micropyLMS.Player"""
+
+    def __init__(self, server_url, player_id, image_scale):
+        self.server_url = server_url
+        self.player_id = player_id
+        self.image_scale = image_scale or ''
+        self._status = {}
+        self.last_update_current_track = None
+
+    def player_query(self, *command):
+        result = core_query(self.server_url, *command, player=self.player_id)
+        if result == {}:
+            return True
+        return result
+
+    def status_update(self):
+        response = self.player_query("status")
+        if response is None:
+            return False
+        response = self.player_query('status', '0', str(response['playlist_tracks']), 'tags:adJKlNux')
+        if response:
+            self._status = response
+            return True
+        print('ERROR: Received no response in status_update')
+        return False
+
+    def generate_image_url(self, image_url: str) -> str:
+        if self.server_url.endswith('/'):
+            return self.server_url[:-1] + image_url
+        return self.server_url + image_url
+
+    @property
+    def name(self) -> str:
+        return self._status.get('player_name')
+
+    @property
+    def power(self) -> bool:
+        return bool(self._status.get('power'))
+
+    @property
+    def mode(self) -> str | None:
+        return self._status.get('mode')
+
+    @property
+    def volume(self) -> int | None:
+        return abs(int(self._status.get('mixer volume', 0)))
+
+    @property
+    def muting(self) -> bool:
+        return str(self._status.get('mixer volume', '')).startswith('-')
+
+    @property
+    def duration(self) -> float | None:
+        return float(self.current_track.get('duration', 0))
+
+    @property
+    def time(self) -> float | None:
+        return float(self._status.get('time', 0))
+
+    @property
+    def track_id(self) -> str | None:
+        return self.current_track.get('id') if self.current_track else None
+
+    @property
+    def url(self) -> str | None:
+        return self.current_track.get('url') if self.current_track else None
+
+    @property
+    def title(self) -> str:
+        return self.current_track.get('title', '') if self.current_track else ''
+
+    @property
+    def artist(self) -> str:
+        return self.current_track.get('artist', '') if self.current_track else ''
+
+    @property
+    def album(self) -> str:
+        return self.current_track.get('album', '') if self.current_track else ''
+
+    @property
+    def artwork_id(self) -> str | None:
+        return self.current_track.get('artwork_track_id') if self.current_track else None
+
+    def _artwork_url(self, suffix: str) -> str:
+        """Returns the cover art url with suffix before the extension"""
+        if self.current_track:
+            if self.current_track.get('artwork_url'):
+                artwork_url = self.current_track["artwork_url"]
+                if not artwork_url.startswith('http'):
+                    artwork_url = self.generate_image_url('/'+artwork_url.lstrip('/'))
+                return '.'.join(artwork_url.split('.')[:-1]) + f'{suffix}.png'
+            return self.generate_image_url(f'/music/{self.artwork_id}/cover{suffix}.png')
+        return self.generate_image_url(f'/music/unknown/cover{suffix}.png')
+
+    @property
+    def image_url(self) -> str:
+        return self._artwork_url('')
+
+    @property
+    def scaled_image_url(self) -> str:
+        return self._artwork_url(self.image_scale)
+
+    @property
+    def current_index(self) -> int | None:
+        if "playlist_cur_index" in self._status:
+            return int(self._status.get('playlist_cur_index'))
+        return None
+
+    @property
+    def current_track(self) -> dict | None:
+        if self.remote:
+            return self._status.get('remoteMeta')
+        if self.playlist and self.current_index is not None:
+            return self.playlist[self.current_index]
+        return None
+
+    @property
+    def remote(self) -> bool:
+        return bool(self._status.get('remote'))
+
+    @property
+    def remote_title(self) -> str | None:
+        if self.current_track and 'remote_title' in self.current_track:
+            return self.current_track.get('remote_title')
+        return None
+
+    @property
+    def shuffle(self) -> str | None:
+        return self._status.get('playlist shuffle')
+
+    @property
+    def repeat(self) -> str | None:
+        return self._status.get('playlist repeat')
+
+    @property
+    def playlist(self) -> list[dict] | None:
+        return self._status.get('playlist_loop')
+
+    @property
+    def playlist_urls(self) -> list[dict] | None:
+        if not self.playlist:
+            return None
+        return [{'url': item['url']} for item in self.playlist]
+
+    @property
+    def playlist_tracks(self) -> int | None:
+        return int(self._status.get('playlist_tracks', 0))
+
+    @property
+    def synced(self) -> bool:
+        return bool(self._status.get('sync_master'))
+
+    def set_volume(self, volume: int | str):
+        return self.player_query('mixer', 'volume', str(volume))
+
+    def set_muting(self, mute: bool | int):
+        return self.player_query('mixer', 'muting', int(mute))
+
+    def toggle_pause(self):
+        self.status_update()
+        if self.mode == 'play':
+            return self.player_query('pause')
+        return self.player_query('play')
+
+    def play(self):
+        return self.player_query("play")
+
+    def stop(self):
+        return self.player_query('stop')
+
+    def pause(self):
+        return self.player_query('pause')
+
+    def set_power(self, set_to: bool | int):
+        return self.player_query('power', int(set_to))
+
+    def load_url(self, url: str, command: str = 'load'):
+        index = self.current_index or 0
+        if command in ['play_now', 'insert', 'add'] and self.playlist_urls:
+            self.status_update()
+            target_playlist = self.playlist_urls or []
+            if command == 'add':
+                target_playlist.append({'url': url})
+            else:
+                if command == 'insert':
+                    index += 1
+                target_playlist.insert(index, {'url': url})
+        else:
+            target_playlist = [{'url': url}]
+        if command == 'play_now':
+            self.load_playlist(target_playlist)
+            return self.player_query('playlist', 'index', index)
+        return self.player_query('playlist', command, url)
+
+    def load_playlist(self, playlist_ref: dict | list, command: str = 'load'):
+        playlist = playlist_ref if isinstance(playlist_ref, list) else [playlist_ref]
+        playlist = [item for item in playlist if item.get('url')]
+        if command == 'insert':
+            for item in reversed(playlist):
+                return self.load_url(item['url'], command)
+        if command in ['play', 'load']:
+            return self.load_url(playlist.pop(0)['url'], 'play')
+        for item in playlist:
+            return self.load_url(item['url'], 'add')
+
+    def clear_playlist(self):
+        return self.player_query('playlist', 'clear')
+
+    def set_shuffle(self, shuffle: str):
+        if shuffle in SHUFFLE_MODE:
+            return self.player_query('playlist', 'shuffle', str(SHUFFLE_MODE.index(shuffle)))
+        print(f'Invalid shuffle mode: {shuffle}')
+        return False
+
+    def set_repeat(self, repeat: str):
+        if repeat in REPEAT_MODE:
+            return self.player_query('playlist', 'repeat', str(REPEAT_MODE.index(repeat)))
+        print(f'Invalid repeat mode: {repeat}')
+        return False
+
+    def unsync(self):
+        return self.player_query("sync", "-")
+
+    def sync_to_other(self, other):
+        return self.player_query("sync", other)
+
+    def sync_to_all(self):
+        player_list = get_players(self.server_url)
+        for item in player_list:
+            if self.name.lower() != item.name.lower():
+                self.player_query("sync", item.player_id)
+        return all(player_list)
@@ -0,0 +1,129 @@
+"""
+micropytimer.py 2026-10-18 v 1.0
+
+Author: Brent Goode
+
+Simulator stand in for the micropytimer library with the same functions and
+timer behaviour, running on the virtual clock through the time module
+
+"""
+
+import importlib
+import time
+
+timer_registry = {}
+
+def check_timers():
+    """
+    Checks all registered timers, going through the registry itself like
+    micropytimer does, so a timer action that adds a timer raises
+    RuntimeError here as it would go wrong on the device
+    """
+    for name, timer in timer_registry.items():
+        timer.check_timer()
+
+def setup_timer(name: str, timer_def: dict):
+    """Adds a new timer to the registry, replacing any timer with the same name"""
+    if is_true(timer_def.get('long')):
+        timer_registry[name] = LongTimer(timer_def)
+    else:
+        timer_registry[name] = ShortTimer(timer_def)
+
+def start_timer(name: str):
+    get_timer(name).start()
+
+def stop_timer(name: str):
+    get_timer(name).stop()
+
+def trigger_timer(name: str):
+    timer = get_timer(name)
+    timer.stop()
+    timer.action()
+
+def override_timer_expiration(name: str, interval: int):
+    get_timer(name).override_expiration(interval)
+
+def force_restart():
+    for timer in timer_registry.values():
+        if timer.running:
+            timer.start()
+
+def get_timer(name: str):
+    """Returns the timer called name or raises NameError like micropytimer"""
+    if timer_registry.get(name):
+        return timer_registry.get(name)
+    raise NameError(f'No timer of name {name} in registry. All timers should be created using the setup_timer() function')
+
+def is_true(value) -> bool:
+    """Reads a timer definition flag, which may be a bool or the string 'True' or 'False'"""
+    if isinstance(value, str):
+        return value.lower() != 'false'
+    return bool(value)
+
+class Timer:
+    """
+    A one shot timer that calls action when it expires
+
+    Attributes
+    ----------
+    action: callable
+        the function called when the timer expires
+    running: bool
+        whether the timer is checked
+    args: any
+        argument, or list of arguments, for action
+    interval: int
+        time from starting to expiring, or None
+    expiration: int
+        when the timer expires
+    """
+
+    def __init__(self, timer_def: dict):
+        self.action = getattr(importlib.import_module(timer_def.get('library')), timer_def.get('action'))
+        self.running = is_true(timer_def.get('running'))
+        self.args = timer_def.get('args')
+        if timer_def.get('interval'):
+            self.interval = timer_def.get('interval')
+            self.expiration = self.later(self.interval)
+        else:
+            self.interval = None
+            self.expiration = timer_def.get('expiration')
+
+    def start(self):
+        if self.interval:
+            self.expiration = self.later(self.interval)
+        self.running = True
+
+    def stop(self):
+        self.running = False
+
+    def override_expiration(self, interval: int):
+        self.expiration = self.later(interval)
+
+    def check_timer(self):
+        if self.running and self.expired():
+            self.running = False
+            if self.args is None:
+                self.action()
+            elif isinstance(self.args, list):
+                self.action(*self.args)
+            else:
+                self.action(self.args)
+
+class ShortTimer(Timer):
+    """A timer with times in milliseconds on the ticks_ms() clock"""
+
+    def later(self, interval: int) -> int:
+        return time.ticks_add(time.ticks_ms(), interval)
+
+    def expired(self) -> bool:
+        return time.ticks_diff(time.ticks_ms(), self.expiration) > 0
+
+class LongTimer(Timer):
+    """A timer with times in seconds on the wall clock"""
+
+    def later(self, interval: int) -> int:
+        return time.time() + interval
+
+    def expired(self) -> bool:
+        return time.time() > self.expiration
@@ -0,0 +1,11 @@
+"""
+ntptime.py 2026-10-18 v 1.0
+
+Author: Brent Goode
+
+Simulator stand in for MicroPython's ntptime module. The simulator points
+host at its stub NTP server
+
+"""
+
+host = 'pool.ntp.org'
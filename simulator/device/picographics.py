@@ -0,0 +1,111 @@
+"""
+picographics.py 2026-10-18 v 1.0
+
+Author: Brent Goode
+
+Simulator stand in for the Presto's display. The frame buffer is a real
+bytearray, so code that copies it through memoryview() works as on the
+device, and every drawing call is counted
+
+"""
+
+from collections import Counter
+
+class Display(bytearray):
+    """
+    A 16 bit frame buffer with the PicoGraphics drawing methods the
+    controller uses
+
+    Shapes are filled in the frame buffer so that pixel copying code, like
+    the page and image caches, copies real data. Text is only counted.
+
+    Attributes
+    ----------
+    width: int
+        width in pixels
+    height: int
+        height in pixels
+    pen: int
+        the 16 bit color the next drawing call uses
+    pens: int
+        number of pens created
+    calls: Counter
+        number of calls of each drawing method, including the Presto's
+        update() and partial_update() and the PicoVector and PNG calls made
+        on this display
+
+    Methods
+    -------
+    get_bounds() -> tuple
+        returns the width and height
+    create_pen(r: int, g: int, b: int) -> int
+        returns the 16 bit color for an RGB color
+    set_pen(pen: int)
+        sets the color of the next drawing call
+    clear()
+        fills the screen with the pen color
+    rectangle(x: int, y: int, w: int, h: int)
+        fills a rectangle with the pen color
+    text(text: str, x: int, y: int, wordwrap: int, scale: int)
+        counts a call to draw text in the system font
+    fill(x: int, y: int, w: int, h: int, pen: int | None)
+        fills a rectangle without counting a call
+    """
+
+    bytes_per_pixel = 2
+
+    def __init__(self, width: int = 480, height: int = 480):
+        """Inits Display with a black screen"""
+        super().__init__(width*height*self.bytes_per_pixel)
+        self.width = width
+        self.height = height
+        self.pen = 0
+        self.pens = 0
+        self.calls = Counter()
+
+    def get_bounds(self) -> tuple:
+        return self.width, self.height
+
+    def create_pen(self, r: int, g: int, b: int) -> int:
+        self.calls['create_pen'] += 1
+        self.pens += 1
+        return ((int(r) & 0xF8) << 8) | ((int(g) & 0xFC) << 3) | (int(b) >> 3)
+
+    def set_pen(self, pen: int):
+        self.pen = pen
+
+    def clear(self):
+        self.calls['clear'] += 1
+        self[:] = self.pen.to_bytes(2, 'little')*(self.width*self.height)
+
+    def rectangle(self, x: int, y: int, w: int, h: int):
+        self.calls['rectangle'] += 1
+        self.fill(x, y, w, h)
+
+    def text(self, text: str, x: int, y: int, wordwrap: int = -1, scale: float = 2, *args):
+        self.calls['text'] += 1
+
+    def pixel(self, x: int, y: int):
+        self.calls['pixel'] += 1
+        self.fill(x, y, 1, 1)
+
+    def line(self, x1: int, y1: int, x2: int, y2: int, *args):
+        self.calls['line'] += 1
+
+    def set_font(self, font: str):
+        pass
+
+    def fill(self, x: int, y: int, w: int, h: int, pen: int | None = None):
+        """Fills a rectangle, clipped to the screen, without counting a call"""
+        left = max(0, int(x))
+        top = max(0, int(y))
+        right = min(self.width, int(x + w))
+        bottom = min(self.height, int(y + h))
+        if right <= left or bottom <= top:
+            return
+        if pen is None:
+            pen = self.pen
+        row = pen.to_bytes(2, 'little')*(right-left)
+        for line in range(top, bottom):
+            start = (line*self.width + left)*self.bytes_per_pixel
+            self[start:start+len(row)] = row
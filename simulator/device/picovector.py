@@ -0,0 +1,118 @@
+"""
+picovector.py 2026-10-18 v 1.0
+
+Author: Brent Goode
+
+Simulator stand in for Pimoroni's picovector module. Shapes are filled as
+their bounding rectangles and text is measured from an average character
+size, which is close enough for layout code to behave as on the device
+
+"""
+
+import os
+
+HALIGN_LEFT = 0
+HALIGN_CENTER = 1
+HALIGN_RIGHT = 2
+ANTIALIAS_NONE = 0
+ANTIALIAS_X4 = 1
+ANTIALIAS_X16 = 2
+ANTIALIAS_FAST = ANTIALIAS_X4
+ANTIALIAS_BEST = ANTIALIAS_X16
+
+# Average character width and line height as fractions of the font size
+CHARACTER_WIDTH = 0.55
+LINE_HEIGHT = 1.2
+
+class Polygon:
+    """A shape made of paths. Only the bounding rectangle of each path is kept"""
+
+    def __init__(self):
+        self.paths = []
+
+    def rectangle(self, x: float, y: float, w: float, h: float, corners: tuple = (0, 0, 0, 0), stroke: float = 0):
+        self.paths.append((x, y, w, h, stroke))
+        return self
+
+    def circle(self, x: float, y: float, r: float, stroke: float = 0):
+        self.paths.append((x-r, y-r, 2*r, 2*r, stroke))
+        return self
+
+class Transform:
+    """A transform that is accepted and ignored"""
+
+    def rotate(self, angle: float, origin: tuple):
+        return self
+
+    def translate(self, x: float, y: float):
+        return self
+
+    def scale(self, x: float, y: float):
+        return self
+
+    def reset(self):
+        return self
+
+class PicoVector:
+    """
+    Vector drawing on a simulated Display. Calls are counted in the
+    display's calls Counter with a vector. prefix
+
+    Attributes
+    ----------
+    display: Display
+        the display drawn on
+    font: str
+        path of the current font
+    font_size: int
+        size of the current font
+    align: int
+        text alignment
+    """
+
+    def __init__(self, display):
+        """Inits PicoVector"""
+        self.display = display
+        self.font = None
+        self.font_size = 0
+        self.align = HALIGN_LEFT
+
+    def set_antialiasing(self, mode: int):
+        pass
+
+    def set_transform(self, transform: Transform):
+        pass
+
+    def set_font(self, font: str, size: int):
+        self.display.calls['vector.set_font'] += 1
+        if font and font != self.font and not os.path.isfile(font):
+            raise OSError(f'font file {font} not found')
+        self.font = font
+        self.font_size = size
+
+    def set_font_size(self, size: int):
+        self.font_size = size
+
+    def set_font_align(self, align: int):
+        self.align = align
+
+    def draw(self, polygon: Polygon):
+        self.display.calls['vector.draw'] += 1
+        for x, y, w, h, stroke in polygon.paths:
+            if stroke:
+                self.display.fill(x, y, w, stroke)
+                self.display.fill(x, y+h-stroke, w, stroke)
+                self.display.fill(x, y, stroke, h)
+                self.display.fill(x+w-stroke, y, stroke, h)
+            else:
+                self.display.fill(x, y, w, h)
+
+    def text(self, text: str, x: int, y: int, angle: float = 0, max_width: int = 0, max_height: int = 0):
+        self.display.calls['vector.text'] += 1
+
+    def measure_text(self, text: str, *args) -> tuple:
+        self.display.calls['vector.measure_text'] += 1
+        lines = text.split('\n')
+        width = max(len(line) for line in lines)*CHARACTER_WIDTH*self.font_size
+        height = len(lines)*LINE_HEIGHT*self.font_size
+        return 0, 0, width, height
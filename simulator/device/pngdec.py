@@ -0,0 +1,68 @@
+"""
+pngdec.py 2026-10-18 v 1.0
+
+Author: Brent Goode
+
+Simulator stand in for Pimoroni's pngdec module. Images are read and their
+size taken from the PNG header, and decoding fills the image's area of the
+frame buffer with one color worked out from the image data
+
+"""
+
+import struct
+import zlib
+
+PNG_NEAREST = 0
+PNG_COPY = 1
+PNG_POSTERISE = 2
+PNG_DITHER = 3
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+class PNG:
+    """
+    A PNG decoder that draws on a simulated Display. Decodes are counted in
+    the display's calls Counter as png.decode
+
+    Attributes
+    ----------
+    display: Display
+        the display drawn on
+    width: int
+        width of the open image
+    height: int
+        height of the open image
+    pen: int
+        the color the open image is drawn in
+    """
+
+    def __init__(self, display):
+        """Inits PNG with no image open"""
+        self.display = display
+        self.width = 0
+        self.height = 0
+        self.pen = 0
+
+    def open_file(self, file_name: str):
+        with open(file_name, 'rb') as file:
+            self._open(file.read())
+
+    def open_RAM(self, data):
+        self._open(bytes(data))
+
+    def get_width(self) -> int:
+        return self.width
+
+    def get_height(self) -> int:
+        return self.height
+
+    def decode(self, x: int, y: int, scale: int = 1, mode: int = PNG_NEAREST, *args, **kwargs):
+        self.display.calls['png.decode'] += 1
+        self.display.fill(x, y, self.width*scale, self.height*scale, self.pen)
+
+    def _open(self, data: bytes):
+        """Reads the size of an image from its header"""
+        if data[:8] != PNG_SIGNATURE or data[12:16] != b'IHDR':
+            raise OSError('not a PNG file')
+        self.width, self.height = struct.unpack('>II', data[16:24])
+        self.pen = zlib.crc32(data) & 0xFFFF
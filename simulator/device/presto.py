@@ -0,0 +1,87 @@
+"""
+presto.py 2026-10-18 v 1.0
+
+Author: Brent Goode
+
+Simulator stand in for Pimoroni's presto module
+
+"""
+
+from picographics import Display
+from touch import FT6236
+
+# Functions called with each Presto as it is made, so the simulator can
+# find the one main.py makes
+on_create = []
+
+class Presto:
+    """
+    A simulated Presto board with a counting display and a scripted touch screen
+
+    Attributes
+    ----------
+    display: Display
+        the frame buffer
+    touch: FT6236
+        the touch screen
+    backlight: float
+        brightness of the screen from 0 to 1
+    leds: list
+        RGB color of each of the ambient LEDs
+    listeners: list
+        functions called with 'update' or 'partial_update' each time the
+        screen is updated
+
+    Methods
+    -------
+    update()
+        counts a full screen update
+    partial_update(x: int, y: int, w: int, h: int)
+        counts an update of part of the screen
+    set_backlight(brightness: float)
+        sets the screen brightness
+    set_led_rgb(i: int, r: int, g: int, b: int)
+        sets the color of an ambient LED
+    """
+
+    NUM_LEDS = 7
+
+    def __init__(self, full_res: bool = False, ambient_light: bool = False, **kwargs):
+        """Inits Presto"""
+        size = 480 if full_res else 240
+        self.display = Display(size, size)
+        self.touch = FT6236()
+        self.backlight = 1.0
+        self.leds = [(0, 0, 0)]*self.NUM_LEDS
+        self.listeners = []
+        for fn in on_create:
+            fn(self)
+
+    def update(self):
+        self.display.calls['update'] += 1
+        for listener in self.listeners:
+            listener('update')
+
+    def partial_update(self, x: int, y: int, w: int, h: int):
+        self.display.calls['partial_update'] += 1
+        for listener in self.listeners:
+            listener('partial_update')
+
+    def set_backlight(self, brightness: float):
+        self.backlight = brightness
+
+    def auto_ambient_leds(self, enable: bool):
+        pass
+
+    def set_led_rgb(self, i: int, r: int, g: int, b: int):
+        self.leds[i] = (r, g, b)
+
+class Buzzer:
+    """A simulated buzzer that remembers the last tone"""
+
+    def __init__(self, pin: int):
+        self.pin = pin
+        self.tone = (0, 0)
+
+    def set_tone(self, frequency: int, volume: float = 0.5):
+        self.tone = (frequency, volume)
@@ -0,0 +1,92 @@
+"""
+requests.py 2026-10-18 v 1.0
+
+Author: Brent Goode
+
+Simulator stand in for MicroPython's requests module. Like it, every request
+opens a new connection that is closed once the response is read
+
+"""
+
+import http.client
+import json as json_module
+from urllib.parse import urlsplit
+import base64
+
+class Response:
+    """
+    A response with the attributes MicroPython's requests gives
+
+    Attributes
+    ----------
+    status_code: int
+        HTTP status
+    reason: str
+        HTTP reason phrase
+    encoding: str
+        encoding used to decode text
+    raw: HTTPResponse
+        the unread body, with read() and readinto()
+    """
+
+    def __init__(self, connection: http.client.HTTPConnection, response: http.client.HTTPResponse):
+        self.connection = connection
+        self.raw = response
+        self.status_code = response.status
+        self.reason = response.reason
+        self.encoding = 'utf-8'
+        self._content = None
+
+    @property
+    def content(self) -> bytes:
+        if self._content is None:
+            self._content = self.raw.read()
+            self.close()
+        return self._content
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding)
+
+    def json(self):
+        return json_module.loads(self.content)
+
+    def close(self):
+        self.connection.close()
+
+def request(method: str, url: str, data=None, json=None, headers: dict | None = None, timeout: float | None = 10, **kwargs) -> Response:
+    parts = urlsplit(url)
+    headers = dict(headers or {})
+    headers['Connection'] = 'close'
+    if parts.username:
+        credentials = f'{parts.username}:{parts.password or ""}'.encode()
+        headers['Authorization'] = 'Basic ' + base64.b64encode(credentials).decode()
+    if json is not None:
+        data = json_module.dumps(json).encode()
+        headers['Content-Type'] = 'application/json'
+    elif isinstance(data, str):
+        data = data.encode()
+    if parts.scheme == 'https':
+        connection = http.client.HTTPSConnection(parts.hostname, parts.port or 443, timeout=timeout)
+    else:
+        connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=timeout)
+    path = parts.path or '/'
+    if parts.query:
+        path += '?' + parts.query
+    connection.request(method, path, body=data, headers=headers)
+    return Response(connection, connection.getresponse())
+
+def get(url: str, **kwargs) -> Response:
+    return request('GET', url, **kwargs)
+
+def post(url: str, **kwargs) -> Response:
+    return request('POST', url, **kwargs)
+
+def put(url: str, **kwargs) -> Response:
+    return request('PUT', url, **kwargs)
+
+def delete(url: str, **kwargs) -> Response:
+    return request('DELETE', url, **kwargs)
+
+def head(url: str, **kwargs) -> Response:
+    return request('HEAD', url, **kwargs)
@@ -0,0 +1,103 @@
+"""
+touch.py 2026-10-18 v 1.0
+
+Author: Brent Goode
+
+Simulator stand in for Pimoroni's touch module with a touch screen that
+plays a TouchScript
+
+"""
+
+from simulator import clock
+from simulator.script import ScriptFinished
+
+class Button:
+    """A rectangular area of the touch screen"""
+
+    def __init__(self, x: int, y: int, w: int, h: int):
+        self.bounds = (x, y, w, h)
+
+    def is_pressed(self) -> bool:
+        return False
+
+class FT6236:
+    """
+    A simulated touch controller
+
+    Each poll() stands for one pass of the main loop, so it moves the virtual
+    clock forward by frame_ms before reading the script. In the asyncio main
+    loop the event loop moves the clock instead, since the touch task polls
+    more often than the other tasks pass. Once the script has
+    finished, poll() raises ScriptFinished. With no script loaded the screen
+    is never touched and poll() only moves the clock.
+
+    Attributes
+    ----------
+    state, x, y: bool, int, int
+        whether the first finger is down and where
+    state2, x2, y2: bool, int, int
+        the same for the second finger, which scripts do not use
+    frame_ms: float
+        simulated milliseconds each poll stands for
+    script: TouchScript
+        the script being played, or None
+    start_ms: int
+        simulated time the script was loaded
+    position: int
+        index of the next sample of the script to play
+    event_ms: int
+        simulated time the script put the finger down or lifted it last
+    listeners: list
+        functions called with 'press' or 'release', the x and y, and the
+        step's label, each time the finger goes down or up
+
+    Methods
+    -------
+    load(script: TouchScript)
+        starts playing a script
+    poll()
+        moves the clock forward and reads the script
+    """
+
+    def __init__(self, frame_ms: float = 10):
+        """Inits FT6236 with no script"""
+        self.state = False
+        self.x = 0
+        self.y = 0
+        self.state2 = False
+        self.x2 = 0
+        self.y2 = 0
+        self.frame_ms = frame_ms
+        self.script = None
+        self.start_ms = 0
+        self.position = 0
+        self.event_ms = None
+        self.listeners = []
+
+    def load(self, script):
+        """Starts playing script from the current simulated time"""
+        self.script = script
+        self.start_ms = clock.current.elapsed_ms()
+        self.position = 0
+
+    def poll(self):
+        if not clock.current.loop_running:
+            clock.current.advance(self.frame_ms)
+        if not self.script:
+            return
+        now = clock.current.elapsed_ms() - self.start_ms
+        samples = self.script.samples
+        while self.position < len(samples) and samples[self.position][0] <= now:
+            at, pressed, position, label = samples[self.position]
+            self.position += 1
+            if callable(position):
+                position = position()
+            was_pressed = self.state
+            self.state = pressed
+            self.x, self.y = int(position[0]), int(position[1])
+            if pressed != was_pressed:
+                self.event_ms = self.start_ms + at
+                for listener in self.listeners:
+                    listener('press' if pressed else 'release', self.x, self.y, label)
+        if self.position >= len(samples) and now >= self.script.end:
+            raise ScriptFinished()
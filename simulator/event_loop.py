@@ -0,0 +1,99 @@
+"""
+event_loop.py 2026-10-18 v 1.0
+
+Author: Brent Goode
+
+asyncio event loop for the simulator that runs on the virtual clock. Waits
+that would block move the clock on instead of waiting in real time, and the
+stub LMS server is settled before each check for ready sockets, so runs of
+the asyncio main loop give the same results every time
+
+"""
+
+import asyncio
+import math
+import selectors
+
+# Longest step the clock is moved in one wait, so the clock's hooks run on time
+MAX_STEP_MS = 10
+
+# Simulated time taken by a pass of the event loop that does not wait, so
+# tasks that poll without waiting still let time pass
+PASS_MS = 1
+
+class VirtualSelector(selectors.DefaultSelector):
+    """
+    A selector that never waits in real time
+
+    Attributes
+    ----------
+    clock: VirtualClock
+        the clock moved on while the event loop has nothing to do
+    """
+
+    def __init__(self, clock):
+        """Inits VirtualSelector"""
+        super().__init__()
+        self.clock = clock
+
+    def select(self, timeout: float | None = None) -> list:
+        """
+        Returns the sockets that are ready. If the event loop would not wait
+        the clock is moved on by PASS_MS. If no sockets are ready and it would
+        wait, the clock is moved on to the loop's next timer or the next reply
+        of the stub server, whichever is sooner
+        Args:
+            timeout: seconds the event loop would wait, or None for no limit
+        """
+        self.clock.settle()
+        events = super().select(0)
+        if timeout is not None and timeout <= 0:
+            self.clock.advance(PASS_MS)
+            return events
+        if events:
+            return events
+        step_ms = MAX_STEP_MS
+        if timeout is not None:
+            # Whole microseconds rounded up, so the loop's next timer is due after the step
+            step_ms = min(step_ms, math.ceil(timeout*1000000)/1000)
+        due_ms = self.clock.next_due_ms()
+        if due_ms is not None:
+            step_ms = min(step_ms, due_ms)
+        self.clock.advance(step_ms)
+        return super().select(0)
+
+class VirtualEventLoop(asyncio.SelectorEventLoop):
+    """
+    An asyncio event loop whose time is the virtual clock
+
+    Attributes
+    ----------
+    clock: VirtualClock
+        the simulator's clock
+    """
+
+    def __init__(self, clock):
+        """Inits VirtualEventLoop"""
+        super().__init__(VirtualSelector(clock))
+        self.clock = clock
+
+    def time(self) -> float:
+        return self.clock.elapsed_us/1000000
+
+    def run_forever(self):
+        """Runs the loop, telling the clock that the loop is moving it"""
+        self.clock.loop_running = True
+        try:
+            super().run_forever()
+        finally:
+            self.clock.loop_running = False
+
+class VirtualEventLoopPolicy(asyncio.DefaultEventLoopPolicy):
+    """Event loop policy that makes VirtualEventLoops, so asyncio.run() uses the virtual clock"""
+
+    def __init__(self, clock):
+        super().__init__()
+        self.clock = clock
+
+    def new_event_loop(self) -> VirtualEventLoop:
+        return VirtualEventLoop(self.clock)
@@ -0,0 +1,81 @@
+"""
+filesystem.py 2026-10-18 v 1.0
+
+Author: Brent Goode
+
+Maps the absolute paths the controller uses on the device, such as /art and
+/cover_cache, into a directory on the computer running the simulator
+
+"""
+
+import builtins
+import os
+
+class DeviceFilesystem:
+    """
+    Redirects file access to the device's flash into root
+
+    Paths are redirected if they are absolute and either start with one of
+    the device directories or name a file directly in /, like the boot
+    profile file. All other paths are left alone, so the computer's own
+    files can still be used.
+
+    Attributes
+    ----------
+    root: str
+        directory standing in for the device's flash
+    device_dirs: tuple
+        top level directories on the device that are redirected
+    originals: dict
+        the functions replaced by install()
+
+    Methods
+    -------
+    map(path) -> str
+        returns where a device path is on the computer
+    install()
+        replaces open() and the os functions the controller uses
+    uninstall()
+        puts the original functions back
+    """
+
+    os_functions = ('mkdir', 'remove', 'stat', 'listdir', 'rename', 'rmdir')
+
+    def __init__(self, root: str, device_dirs: tuple = ('art', 'cover_cache')):
+        """Inits DeviceFilesystem"""
+        self.root = root
+        self.device_dirs = device_dirs
+        self.originals = {}
+
+    def map(self, path):
+        """Returns where a device path is on the computer, or path if it is not redirected"""
+        if not isinstance(path, str) or not path.startswith('/'):
+            return path
+        parts = path[1:].split('/')
+        if len(parts) == 1 or parts[0] in self.device_dirs:
+            return os.path.join(self.root, *parts)
+        return path
+
+    def install(self):
+        """Replaces open() and the os functions the controller uses"""
+        self.originals['open'] = builtins.open
+        def device_open(file, *args, **kwargs):
+            return self.originals['open'](self.map(file), *args, **kwargs)
+        builtins.open = device_open
+        for name in self.os_functions:
+            self.originals[name] = getattr(os, name)
+            setattr(os, name, self._redirect(self.originals[name]))
+
+    def uninstall(self):
+        """Puts back the functions replaced by install()"""
+        if 'open' in self.originals:
+            builtins.open = self.originals.pop('open')
+        for name, fn in self.originals.items():
+            setattr(os, name, fn)
+        self.originals = {}
+
+    def _redirect(self, fn):
+        """Returns a version of an os function with its path arguments mapped"""
+        def redirected(*args, **kwargs):
+            return fn(*[self.map(arg) for arg in args], **kwargs)
+        return redirected
@@ -0,0 +1,720 @@
+"""
+lms_stub.py 2026-10-18 v 1.0
+
+Author: Brent Goode
+
+A small stand in for a Lyrion Music Server for the simulator. It answers the
+JSON-RPC commands the controller sends, serves cover art, pushes change
+notifications to CLI subscribers, and answers NTP requests, all on local
+ports, and logs every request so they can be counted. The servers run in
+background threads, and the virtual clock waits for them to settle each
+time it moves, so every request is answered at the same simulated time on
+every run
+
+"""
+
+import json
+import re
+import select
+import socket
+import socketserver
+import struct
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote
+
+from simulator import clock
+
+NTP_EPOCH_DELTA = 2208988800
+# A fixed date for the NTP server so runs start at the same time of day
+DEFAULT_UTC_START = 1772366400
+
+class StubPlayer:
+    """
+    The state of one simulated player
+
+    The current track's position is worked out from the virtual clock when
+    it is asked for, and playback moves on to the next track when a track
+    ends.
+
+    Attributes
+    ----------
+    player_id: str
+        MAC address style id
+    name: str
+        player name
+    power: int
+        1 if on
+    mode: str
+        play, pause, or stop
+    volume: int
+        0 to 100
+    muted: bool
+        whether the volume is muted
+    playlist: list
+        track dictionaries
+    index: int
+        index of the current track
+    position: float
+        seconds into the current track when started_ms was taken
+    started_ms: int
+        virtual time of the last change of position or mode
+    shuffle: int
+        index in SHUFFLE_MODE
+    repeat: int
+        index in REPEAT_MODE
+    sync_group: list
+        ids of the players this one is synced with
+    """
+
+    def __init__(self, player_id: str, name: str, playlist: list):
+        self.player_id = player_id
+        self.name = name
+        self.power = 1
+        self.mode = 'play'
+        self.volume = 40
+        self.muted = False
+        self.playlist = playlist
+        self.index = 0
+        self.position = 0.0
+        self.started_ms = clock.current.elapsed_ms()
+        self.shuffle = 0
+        self.repeat = 0
+        self.sync_group = []
+
+    def time(self) -> float:
+        """Returns the playback position in seconds"""
+        if self.mode == 'play':
+            return self.position + (clock.current.elapsed_ms() - self.started_ms)/1000
+        return self.position
+
+    def seek(self, seconds: float):
+        self.position = max(0.0, seconds)
+        self.started_ms = clock.current.elapsed_ms()
+
+    def set_mode(self, mode: str):
+        self.position = self.time()
+        self.started_ms = clock.current.elapsed_ms()
+        self.mode = mode
+
+    def jump(self, index: int):
+        if self.playlist:
+            self.index = index % len(self.playlist)
+        self.seek(0)
+
+    def track_ended(self) -> bool:
+        """Moves to the next track if the current one has finished. Returns True if it did"""
+        if self.mode != 'play' or not self.playlist:
+            return False
+        if self.time() < self.playlist[self.index]['duration']:
+            return False
+        if self.index + 1 >= len(self.playlist) and self.repeat != 2:
+            self.set_mode('stop')
+            self.seek(0)
+        else:
+            self.jump(self.index + 1)
+        return True
+
+def make_tracks(count: int, first: int = 0) -> list:
+    """Makes count track dictionaries with the tags the controller asks for"""
+    tracks = []
+    for number in range(first, first + count):
+        tracks.append({"id": 1000 + number,
+                       "title": f"Track {number}",
+                       "artist": f"Artist {number//4}",
+                       "album": f"Album {number//4}",
+                       "duration": 150 + 17*(number % 7),
+                       "artwork_track_id": f"{0xa000 + number//4:x}",
+                       "url": f"file:///music/track{number}.flac"})
+    return tracks
+
+def make_png(width: int, height: int, color: tuple) -> bytes:
+    """Returns a PNG file of one color"""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+    row = b'\x00' + bytes(color)*width
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(row*height))
+            + chunk(b'IEND', b''))
+
+class StubLMS:
+    """
+    A stub LMS server with players that play through their playlists on the
+    virtual clock
+
+    Attributes
+    ----------
+    players: dict
+        StubPlayer objects addressed by player id
+    utc_start: int
+        UTC time the NTP server gives at virtual time zero
+    log: list
+        (virtual ms, kind, name) of every request, where kind is jsonrpc,
+        artwork, cli, or ntp
+    connections: int
+        number of HTTP connections accepted
+    latency_ms: float
+        simulated milliseconds each HTTP request waits before it is
+        answered, like the round trip to a server over WiFi
+    connect_ms: float
+        simulated milliseconds the first request on each new HTTP connection
+        waits as well, like the round trips of making the connection
+    subscribers: list
+        [socket, set of subscribed commands] for each CLI client
+    lock: Lock
+        held while the player state is read or changed
+    condition: Condition
+        held while busy, open_sockets, and replies_due are changed, and
+        notified when they change
+    busy: int
+        number of requests being read or answered by the server threads
+    open_sockets: set
+        sockets of the open HTTP and CLI connections
+    replies_due: list
+        [simulated microseconds, released] for each request waiting for the
+        event loop to move the clock to when it is answered
+    http_port, cli_port, ntp_port: int
+        ports the servers are listening on
+
+    Methods
+    -------
+    start()
+        starts the servers on free local ports
+    stop()
+        stops the servers
+    update()
+        moves players on to their next tracks and notifies subscribers
+    handle(player_id: str, command: list) -> dict
+        runs one JSON-RPC command
+    notify(player_id: str, *words)
+        sends a notification line to the CLI subscribers
+    count(kind: str, since_ms: int) -> int
+        number of logged requests of a kind since a virtual time
+    settle()
+        waits until every request sent so far is answered or waiting for
+        its simulated time
+    advanced()
+        releases the requests whose simulated time has come
+    next_due_ms() -> int
+        simulated milliseconds until the next waiting request is answered
+    """
+
+    def __init__(self, player_names: tuple = ('Kitchen', 'Living Room'), tracks: int = 12,
+                 utc_start: int = DEFAULT_UTC_START, latency_ms: float = 0, connect_ms: float = 0):
+        """Inits StubLMS with players that are on and playing"""
+        self.players = {}
+        for number, name in enumerate(player_names):
+            player_id = f'00:04:20:00:00:{number+1:02x}'
+            self.players[player_id] = StubPlayer(player_id, name, make_tracks(tracks, number*tracks))
+        self.utc_start = utc_start
+        self.log = []
+        self.connections = 0
+        self.latency_ms = latency_ms
+        self.connect_ms = connect_ms
+        self.subscribers = []
+        self.lock = threading.RLock()
+        self.condition = threading.Condition()
+        self.busy = 0
+        self.open_sockets = set()
+        self.replies_due = []
+        self.covers = {}
+        self.servers = []
+        self.http_port = self.cli_port = self.ntp_port = None
+
+    def start(self):
+        """Starts the HTTP, CLI, and NTP servers on free local ports in background threads"""
+        stub = self
+
+        class TrackedServer:
+            """Keeps the connections in open_sockets from when they are accepted until they are closed"""
+            daemon_threads = True
+            def get_request(self):
+                stub.begin()
+                try:
+                    request = super().get_request()
+                    with stub.condition:
+                        stub.open_sockets.add(request[0])
+                    return request
+                finally:
+                    stub.end()
+            def shutdown_request(self, request):
+                with stub.condition:
+                    stub.open_sockets.discard(request)
+                super().shutdown_request(request)
+
+        class HTTPServer(TrackedServer, ThreadingHTTPServer):
+            def get_request(self):
+                request = super().get_request()
+                stub.connections += 1
+                return request
+
+        class HTTPHandler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Buffer writes so headers and body go out together
+            wbufsize = 65536
+            def handle_one_request(self):
+                # Count the request as busy before any of it is read
+                select.select([self.connection], [], [])
+                stub.begin()
+                try:
+                    super().handle_one_request()
+                finally:
+                    if self.close_connection:
+                        # Ends the connection before the request counts as
+                        # answered, so the client sees it closed when settled
+                        try:
+                            self.wfile.flush()
+                            self.connection.shutdown(socket.SHUT_WR)
+                        except OSError:
+                            pass
+                    stub.end()
+            def do_GET(self):
+                stub.serve_http(self)
+            do_POST = do_GET
+            def log_message(self, format, *args):
+                pass
+
+        class CLIHandler(socketserver.StreamRequestHandler):
+            # Unbuffered so a line is not read until it is answered
+            rbufsize = 0
+            def handle(self):
+                stub.serve_cli(self)
+
+        class CLIServer(TrackedServer, socketserver.ThreadingTCPServer):
+            allow_reuse_address = True
+
+        class NTPServer(socketserver.UDPServer):
+            def get_request(self):
+                stub.begin()
+                try:
+                    return super().get_request()
+                except BaseException:
+                    stub.end()
+                    raise
+            def process_request(self, request, client_address):
+                try:
+                    super().process_request(request, client_address)
+                finally:
+                    stub.end()
+
+        class NTPHandler(socketserver.BaseRequestHandler):
+            def handle(self):
+                stub.serve_ntp(self)
+
+        http_server = HTTPServer(('127.0.0.1', 0), HTTPHandler)
+        cli_server = CLIServer(('127.0.0.1', 0), CLIHandler)
+        ntp_server = NTPServer(('127.0.0.1', 0), NTPHandler)
+        self.http_port = http_server.server_address[1]
+        self.cli_port = cli_server.server_address[1]
+        self.ntp_port = ntp_server.server_address[1]
+        for server in (http_server, cli_server, ntp_server):
+            self.servers.append(server)
+            threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+
+    def stop(self):
+        """Stops the servers and closes the subscriber connections"""
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+        self.servers = []
+        for subscriber in self.subscribers:
+            try:
+                subscriber[0].close()
+            except OSError:
+                pass
+        self.subscribers = []
+
+    # Settling with the virtual clock
+
+    def begin(self):
+        """Counts a request as busy"""
+        with self.condition:
+            self.busy += 1
+
+    def end(self):
+        """Counts a request as no longer busy"""
+        with self.condition:
+            self.busy -= 1
+            self.condition.notify_all()
+
+    def quiet(self) -> bool:
+        """Returns True if no request is waiting to be read or being answered"""
+        with self.condition:
+            sockets = [server.socket for server in self.servers] + list(self.open_sockets)
+        try:
+            if select.select(sockets, [], [], 0)[0]:
+                return False
+        except (OSError, ValueError):
+            return False
+        # Checked after the sockets, since a request is counted as busy
+        # before it is read from its socket
+        with self.condition:
+            return self.busy == 0
+
+    def settle(self, timeout: float = 10):
+        """
+        Waits until every request sent so far has been answered or is
+        waiting for its simulated time
+        Args:
+            timeout: real seconds to wait before giving up
+        """
+        give_up = time.monotonic() + timeout
+        while not self.quiet():
+            if time.monotonic() > give_up:
+                raise RuntimeError('The stub LMS server did not settle')
+            with self.condition:
+                self.condition.wait(0.0005)
+
+    def advanced(self):
+        """Releases the requests whose simulated time has come, counting them as busy again"""
+        now_us = clock.current.elapsed_us
+        with self.condition:
+            for reply in list(self.replies_due):
+                if reply[0] <= now_us:
+                    reply[1] = True
+                    self.busy += 1
+                    self.replies_due.remove(reply)
+            self.condition.notify_all()
+
+    def next_due_ms(self) -> int | None:
+        """Returns the simulated milliseconds until the next waiting request is answered, or None"""
+        with self.condition:
+            if not self.replies_due:
+                return None
+            due_us = min(reply[0] for reply in self.replies_due)
+        return max(0, -((clock.current.elapsed_us - due_us)//1000))
+
+    def wait(self, ms: float):
+        """
+        Lets ms of simulated time pass before a request is answered. While
+        the controller is blocked waiting for the answer the clock is moved
+        from here, after the other requests sent before this one have been
+        answered, otherwise the request waits for the event loop to move it
+        Args:
+            ms: simulated milliseconds to wait
+        """
+        if not clock.current.loop_running:
+            with self.condition:
+                self.busy -= 1
+            try:
+                self.settle()
+            finally:
+                with self.condition:
+                    self.busy += 1
+            clock.current.advance(ms, settle=False)
+            return
+        with self.condition:
+            reply = [clock.current.elapsed_us + int(ms*1000), False]
+            self.replies_due.append(reply)
+            self.busy -= 1
+            self.condition.notify_all()
+            while not reply[1]:
+                self.condition.wait()
+
+    def record(self, kind: str, name: str):
+        self.log.append((clock.current.elapsed_ms(), kind, name))
+
+    def count(self, kind: str | None = None, since_ms: int = 0) -> int:
+        """Returns the number of logged requests of kind, or of all kinds, since since_ms"""
+        return sum(1 for at, logged_kind, name in self.log
+                   if at >= since_ms and (kind is None or logged_kind == kind))
+
+    def update(self):
+        """Moves players on to their next tracks and notifies subscribers of the change"""
+        with self.lock:
+            for player in self.players.values():
+                if player.track_ended():
+                    self.notify(player.player_id, 'playlist', 'newsong', player.playlist[player.index]['title'], player.index)
+
+    def notify(self, player_id: str, *words):
+        """Sends a notification line to each CLI client subscribed to its first word"""
+        line = (' '.join([quote(player_id, safe='')] + [quote(str(word), safe='') for word in words]) + '\n').encode()
+        for subscriber in list(self.subscribers):
+            if words[0] in subscriber[1]:
+                try:
+                    subscriber[0].sendall(line)
+                except OSError:
+                    self.subscribers.remove(subscriber)
+
+    # Request handling
+
+    def serve_http(self, handler: BaseHTTPRequestHandler):
+        """Answers a JSON-RPC request or a cover art request"""
+        length = int(handler.headers.get('Content-Length') or 0)
+        body = handler.rfile.read(length) if length else b''
+        delay_ms = self.latency_ms
+        if not getattr(handler, 'answered', False):
+            handler.answered = True
+            delay_ms += self.connect_ms
+        if delay_ms:
+            self.wait(delay_ms)
+        path = handler.path.split('?')[0]
+        if path == '/jsonrpc.js':
+            try:
+                request = json.loads(body)
+                player_id, command = request['params']
+                command = [str(word) for word in command]
+            except (ValueError, KeyError, TypeError):
+                self.send(handler, 400, b'bad request', 'text/plain')
+                return
+            self.record('jsonrpc', ' '.join(command[:2]))
+            with self.lock:
+                self.update()
+                result = self.handle(player_id, command)
+            reply = {"id": request.get('id'), "method": "slim.request",
+                     "params": request['params'], "result": result}
+            self.send(handler, 200, json.dumps(reply).encode(), 'application/json')
+            return
+        match = re.match(r'/music/([^/]+)/cover(?:_(\d+)x(\d+))?[^/]*\.(png|jpg)$', path)
+        if match:
+            self.record('artwork', match.group(1))
+            size = (int(match.group(2) or 480), int(match.group(3) or 480))
+            self.send(handler, 200, self.cover(match.group(1), size), 'image/png')
+            return
+        self.record('other', path)
+        self.send(handler, 404, b'not found', 'text/plain')
+
+    def send(self, handler: BaseHTTPRequestHandler, status: int, body: bytes, content_type: str):
+        handler.send_response(status)
+        handler.send_header('Content-Type', content_type)
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def cover(self, artwork_id: str, size: tuple) -> bytes:
+        """Returns a PNG of one color made from the artwork id"""
+        key = (artwork_id, size)
+        if key not in self.covers:
+            seed = zlib.crc32(artwork_id.encode())
+            self.covers[key] = make_png(size[0], size[1], (seed & 0xFF, (seed >> 8) & 0xFF, (seed >> 16) & 0xFF))
+        return self.covers[key]
+
+    def serve_cli(self, handler: socketserver.StreamRequestHandler):
+        """Answers CLI commands and keeps the connection open for notifications after subscribe"""
+        subscriber = [handler.request, set()]
+        try:
+            while True:
+                select.select([handler.request], [], [])
+                self.begin()
+                try:
+                    raw_line = handler.rfile.readline()
+                    if not raw_line:
+                        break
+                    self.answer_cli(handler, subscriber, raw_line)
+                finally:
+                    self.end()
+        except OSError:
+            pass
+        finally:
+            if subscriber in self.subscribers:
+                self.subscribers.remove(subscriber)
+
+    def answer_cli(self, handler: socketserver.StreamRequestHandler, subscriber: list, raw_line: bytes):
+        """Answers one CLI command line"""
+        line = raw_line.decode().strip()
+        self.record('cli', line.split(' ', 1)[0])
+        if line.startswith('login '):
+            handler.wfile.write(b'login ******\n')
+        elif line.startswith('subscribe'):
+            subscriber[1] = set(line.split(' ', 1)[1].split(',')) if ' ' in line else set()
+            handler.wfile.write(raw_line.rstrip() + b'\n')
+            if subscriber not in self.subscribers:
+                self.subscribers.append(subscriber)
+        else:
+            handler.wfile.write(raw_line.rstrip() + b'\n')
+
+    def serve_ntp(self, handler: socketserver.BaseRequestHandler):
+        """Answers an SNTP request with the virtual UTC time"""
+        data, sock = handler.request
+        self.record('ntp', 'time')
+        now = self.utc_start + clock.current.elapsed_us/1000000
+        reply = bytearray(48)
+        reply[0] = 0x24
+        reply[1] = 1
+        seconds = int(now) + NTP_EPOCH_DELTA
+        fraction = int((now % 1)*(1 << 32))
+        reply[32:40] = reply[40:48] = struct.pack('!II', seconds, fraction)
+        sock.sendto(bytes(reply), handler.client_address)
+
+    # JSON-RPC commands
+
+    def handle(self, player_id: str, command: list) -> dict:
+        """
+        Runs one JSON-RPC command
+        Args:
+            player_id: the player the command is for, or '' for server commands
+            command: list of the command words
+        Returns:
+            the result dictionary, which is empty for commands with no result
+        """
+        if command[:2] == ['players', 'status'] or command[:1] == ['players']:
+            return self.players_status()
+        if command[:1] == ['serverstatus']:
+            return {"player count": len(self.players), "version": "9.0.0"}
+        player = self.players.get(player_id.lower())
+        if not player:
+            return {}
+        word = command[0]
+        args = command[1:]
+        if word == 'status':
+            return self.status(player, args)
+        if word == 'mixer' and args[:1] == ['volume'] and len(args) > 1:
+            player.volume = max(0, min(100, self.relative(args[1], player.volume)))
+            player.muted = False
+            self.notify(player.player_id, 'mixer', 'volume', args[1])
+        elif word == 'mixer' and args[:1] == ['muting'] and len(args) > 1:
+            player.muted = not player.muted if args[1] == 'toggle' else args[1] == '1'
+            self.notify(player.player_id, 'mixer', 'muting', int(player.muted))
+        elif word == 'power' and args:
+            player.power = int(not player.power) if args[0] == 'toggle' else int(args[0])
+            if not player.power and player.mode == 'play':
+                player.set_mode('pause')
+            self.notify(player.player_id, 'power', player.power)
+        elif word == 'play':
+            player.set_mode('play')
+            self.notify(player.player_id, 'play')
+        elif word == 'pause':
+            paused = player.mode == 'play' if not args else args[0] == '1'
+            player.set_mode('pause' if paused else 'play')
+            self.notify(player.player_id, 'pause', int(paused))
+        elif word == 'stop':
+            player.set_mode('stop')
+            self.notify(player.player_id, 'stop')
+        elif word == 'button' and args:
+            self.button(player, args[0])
+        elif word == 'playlist' and args:
+            return self.playlist_command(player, args)
+        elif word == 'time' and args:
+            player.seek(self.relative(args[0], player.time()))
+        elif word == 'sync' and args:
+            self.sync(player, args[0])
+        elif word == 'randomplay':
+            player.playlist = make_tracks(20, 100 + len(self.log) % 50)
+            player.jump(0)
+            player.set_mode('play')
+            self.notify(player.player_id, 'playlist', 'newsong', player.playlist[0]['title'], 0)
+        elif word == 'favorites' and args[:1] == ['items']:
+            items = [{"id": f"fav.{number}", "name": f"Favorite {number}", "url": track['url'],
+                      "isaudio": 1, "hasitems": 0} for number, track in enumerate(make_tracks(5, 200))]
+            return {"count": len(items), "loop_loop": items, "title": "Favorites"}
+        elif word == 'playlists' and args:
+            lists = [{"id": 300 + number, "playlist": f"Playlist {number}",
+                      "url": f"file:///music/playlist{number}.m3u"} for number in range(4)]
+            return {"count": len(lists), "playlists_loop": lists}
+        return {}
+
+    def relative(self, value: str, current: float) -> float:
+        """Reads a new value that may be relative to current, like +3 or -10"""
+        if value.startswith('+') or value.startswith('-'):
+            return current + float(value)
+        return float(value)
+
+    def players_status(self) -> dict:
+        players = [{"playerid": player.player_id, "name": player.name, "connected": 1,
+                    "power": player.power, "isplaying": int(player.mode == 'play'),
+                    "model": "squeezelite", "playerindex": str(number)}
+                   for number, player in enumerate(self.players.values())]
+        return {"count": len(players), "players_loop": players}
+
+    def status(self, player: StubPlayer, args: list) -> dict:
+        """Returns the status of a player, with the part of its playlist asked for"""
+        result = {"player_name": player.name,
+                  "player_connected": 1,
+                  "power": player.power,
+                  "mode": player.mode,
+                  "mixer volume": -player.volume if player.muted else player.volume,
+                  "time": round(player.time(), 3),
+                  "rate": 1,
+                  "playlist repeat": player.repeat,
+                  "playlist shuffle": player.shuffle,
+                  "playlist_tracks": len(player.playlist),
+                  "seq_no": len(self.log)}
+        if player.playlist:
+            result["playlist_cur_index"] = str(player.index)
+            result["duration"] = player.playlist[player.index]['duration']
+        if player.sync_group:
+            result["sync_master"] = player.sync_group[0]
+            result["sync_slaves"] = ','.join(player.sync_group[1:])
+        if args and args[0] not in ('-',) and not args[0].startswith('tags'):
+            start = int(args[0])
+            count = int(args[1]) if len(args) > 1 and args[1].isdigit() else 1
+            loop = []
+            for number, track in enumerate(player.playlist[start:start+count], start):
+                item = dict(track)
+                item["playlist index"] = number
+                loop.append(item)
+            result["playlist_loop"] = loop
+        return result
+
+    def button(self, player: StubPlayer, name: str):
+        """Runs a remote control button command"""
+        if name == 'fwd.single' or name == 'jump_fwd':
+            player.jump(player.index + 1)
+            self.notify(player.player_id, 'playlist', 'newsong', player.playlist[player.index]['title'], player.index)
+        elif name == 'rew.single' or name == 'jump_rew':
+            if player.time() > 5:
+                player.seek(0)
+            else:
+                player.jump(player.index - 1)
+            self.notify(player.player_id, 'playlist', 'newsong', player.playlist[player.index]['title'], player.index)
+        elif name == 'shuffle.single' or name == 'shuffle':
+            player.shuffle = (player.shuffle + 1) % 3
+            self.notify(player.player_id, 'playlist', 'shuffle', player.shuffle)
+        elif name == 'repeat':
+            player.repeat = (player.repeat + 1) % 3
+            self.notify(player.player_id, 'playlist', 'repeat', player.repeat)
+        elif name == 'pause':
+            self.handle(player.player_id, ['pause'])
+        elif name == 'power':
+            self.handle(player.player_id, ['power', 'toggle'])
+
+    def playlist_command(self, player: StubPlayer, args: list) -> dict:
+        """Runs a playlist command"""
+        action = args[0]
+        if action == 'index' and len(args) > 1:
+            player.jump(int(self.relative(args[1], player.index)))
+            self.notify(player.player_id, 'playlist', 'newsong', player.playlist[player.index]['title'], player.index)
+        elif action == 'shuffle' and len(args) > 1:
+            player.shuffle = int(args[1])
+            self.notify(player.player_id, 'playlist', 'shuffle', player.shuffle)
+        elif action == 'repeat' and len(args) > 1:
+            player.repeat = int(args[1])
+            self.notify(player.player_id, 'playlist', 'repeat', player.repeat)
+        elif action in ('play', 'load') and len(args) > 1:
+            player.playlist = [{"id": 5000, "title": args[1].rsplit('/', 1)[-1], "artist": "Radio",
+                                "album": "", "duration": 3600, "artwork_track_id": "radio", "url": args[1]}]
+            player.jump(0)
+            player.set_mode('play')
+            self.notify(player.player_id, 'playlist', 'newsong', player.playlist[0]['title'], 0)
+        elif action in ('add', 'insert') and len(args) > 1:
+            track = {"id": 5001 + len(player.playlist), "title": args[1].rsplit('/', 1)[-1], "artist": "",
+                     "album": "", "duration": 200, "artwork_track_id": "added", "url": args[1]}
+            position = len(player.playlist) if action == 'add' else player.index + 1
+            player.playlist.insert(position, track)
+            self.notify(player.player_id, 'playlist', action, args[1])
+        elif action == 'clear':
+            player.playlist = []
+            player.index = 0
+            player.set_mode('stop')
+            self.notify(player.player_id, 'playlist', 'clear')
+        return {}
+
+    def sync(self, player: StubPlayer, other_id: str):
+        """Syncs a player with another, or unsyncs it when other_id is -"""
+        if other_id == '-':
+            for other in self.players.values():
+                if player.player_id in other.sync_group:
+                    other.sync_group.remove(player.player_id)
+                    if len(other.sync_group) < 2:
+                        other.sync_group = []
+            player.sync_group = []
+        elif other_id.lower() in self.players:
+            group = self.players[other_id.lower()].sync_group or [other_id.lower()]
+            if player.player_id not in group:
+                group.append(player.player_id)
+            for member in group:
+                self.players[member].sync_group = group
+        self.notify(player.player_id, 'sync', other_id)
@@ -0,0 +1,473 @@
+"""
+perf.py 2026-10-18 v 1.0
+
+Author: Brent Goode
+
+Performance harness for the LMS controller. Runs scripted scenarios in the
+simulator, each in its own process so each starts from a clean boot, and
+measures draws per page change, touch to action latency, requests to the
+LMS server per minute, and how long each player query takes. The counts and
+the timings on the virtual clock are the same on every run, so they are
+compared with a baseline file and the harness exits with an error if any of
+them has got worse by more than the baseline's tolerance. Timings in real
+time depend on the computer and what else it is doing, so they are only
+reported
+
+Usage:
+    python -m simulator.perf
+    python -m simulator.perf --scenario navigation --output results.json
+    python -m simulator.perf --update_baseline
+
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from simulator import Simulation, TouchScript, report_results, run_in_child
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'perf_baseline.json')
+
+# Allowed increase over the baseline as a fraction of it plus a fixed amount,
+# for timings on the virtual clock and for counts
+DEFAULT_TOLERANCE = {"virtual_ms": {"relative": 0.1, "absolute": 1.0},
+                     "count": {"relative": 0.1, "absolute": 0.5}}
+
+SWIPE_LEFT = ((400, 240), (80, 240))
+SWIPE_RIGHT = ((80, 240), (400, 240))
+
+# Simulated milliseconds the stub server waits before answering, like a
+# server reached over WiFi, for the scenarios comparing connection handling
+WIFI_LATENCY = {"latency_ms": 10, "connect_ms": 10}
+
+def button(address: tuple):
+    """Returns a function giving the center of the button at address when the touch happens"""
+    def center():
+        from button_set import ButtonSet
+        target = ButtonSet.get_button_obj(address)
+        return (target.x + target.width/2, target.y + target.height/2)
+    return center
+
+# Each scenario returns the settings merged into button_defs.json, the touch
+# script, and the settings of the stub LMS server
+
+def idle_scenario() -> tuple:
+    """Ten minutes on the now playing page while the player plays through its playlist"""
+    return {}, TouchScript().wait(600000), {}
+
+def navigation_scenario() -> tuple:
+    """Moving around the menu pages with taps and swipes, three times over"""
+    script = TouchScript().wait(3000)
+    for repeat in range(3):
+        script.tap(button((1, 0, 0)), label='open menu').wait(1000)
+        script.swipe(*SWIPE_LEFT, label='swipe to settings').wait(1000)
+        script.swipe(*SWIPE_RIGHT, label='swipe to menu').wait(1000)
+        script.tap(button((2, 2, 2)), label='settings').wait(1000)
+        script.tap(button((3, 2, 0)), label='back to menu').wait(1000)
+        script.tap(button((2, 2, 0)), label='now playing').wait(3000)
+    return {}, script, {}
+
+def controls_scenario() -> tuple:
+    """Playback and volume buttons, including quick repeated taps"""
+    script = TouchScript().wait(3000)
+    script.tap(button((1, 0, 0)), label='open menu').wait(1000)
+    for repeat in range(2):
+        script.tap(button((2, 0, 1)), label='play pause').wait(1500)
+    for repeat in range(3):
+        script.tap(button((2, 0, 2)), label='next track').wait(100)
+    script.wait(1500)
+    script.tap(button((2, 0, 0)), label='previous track').wait(1500)
+    script.tap(button((2, 2, 2)), label='settings').wait(1000)
+    for repeat in range(5):
+        script.tap(button((3, 0, 2)), label='volume up').wait(100)
+    for repeat in range(5):
+        script.tap(button((3, 1, 2)), label='volume down').wait(100)
+    for repeat in range(2):
+        script.tap(button((3, 2, 2)), label='mute').wait(1500)
+    script.wait(15000)
+    return {}, script, {}
+
+def keep_alive_scenario() -> tuple:
+    """The controls scenario against a server with WiFi like latency, reusing connections"""
+    overrides, script, stub_settings = controls_scenario()
+    return {"keep_alive": {"enabled": True}}, script, WIFI_LATENCY
+
+def no_keep_alive_scenario() -> tuple:
+    """The controls scenario against a server with WiFi like latency, with a new connection for each request"""
+    overrides, script, stub_settings = controls_scenario()
+    return {"keep_alive": {"enabled": False}}, script, WIFI_LATENCY
+
+def asyncio_scenario() -> tuple:
+    """The controls scenario with the asyncio main loop against a server with WiFi like latency"""
+    overrides, script, stub_settings = controls_scenario()
+    return {"use_asyncio": True}, script, WIFI_LATENCY
+
+SCENARIOS = {"idle": idle_scenario,
+             "navigation": navigation_scenario,
+             "controls": controls_scenario,
+             "keep_alive": keep_alive_scenario,
+             "no_keep_alive": no_keep_alive_scenario,
+             "asyncio": asyncio_scenario}
+
+# Asyncio scenarios and the synchronous scenario with the same script and
+# server, whose touch to action latency they must not be worse than
+SYNC_COUNTERPARTS = {"asyncio": "no_keep_alive"}
+
+def percentile(values: list, fraction: float) -> float:
+    """Returns a percentile of values, or 0 if there are none"""
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[int(fraction*(len(values)-1))]
+
+class Recorder:
+    """
+    Takes the measurements during a simulated run
+
+    Attributes
+    ----------
+    simulation: Simulation
+        the run being measured
+    boot_ms: float
+        real milliseconds from starting main.py to the first pass of the main loop
+    boot_virtual_ms: int
+        virtual time of the first pass of the main loop
+    boot_requests: int
+        requests to the LMS server before the first pass of the main loop
+    boot_connections: int
+        connections to the LMS server before the first pass of the main loop
+    pressed: tuple
+        real and virtual time of the last finger press not yet handled, or None
+    released: tuple
+        real and virtual time of the last finger release not yet handled, or None
+    handled_events: list
+        kind and finger of each touch event taken from the queue since the
+        last pass of the main loop
+    awaiting_screen: tuple
+        real and virtual time of the last handled touch whose screen update
+        has not happened yet, or None
+    touch_to_action_ms: list
+        real milliseconds from each touch to the end of the pass of the main
+        loop's touch handling that acted on it. A button that acts when
+        pressed is timed from the press, and anything else from the release,
+        which is then after the debounce time
+    touch_to_action_virtual_ms: list
+        the same on the virtual clock, which includes any time the action
+        blocked the main loop waiting for the server
+    touch_to_screen_ms: list
+        real milliseconds from each timed touch to the next screen update
+    touch_to_screen_virtual_ms: list
+        the same on the virtual clock
+    page_changes: int
+        number of times a different page from the last one was drawn
+    drawn_page: int
+        the page drawn last, or None before the first draw
+    page_draw_ms: list
+        real milliseconds of each draw_page() call
+    page_draw_ops: list
+        drawing calls made by each draw_page() call
+    query_ms: list
+        virtual milliseconds of each player query after boot, including its
+        wait for the server
+    querying: bool
+        whether a timed query is running, so queries made inside it are not
+        timed twice
+    """
+
+    def __init__(self, simulation: Simulation):
+        self.simulation = simulation
+        self.started = None
+        self.boot_ms = None
+        self.boot_virtual_ms = 0
+        self.boot_requests = 0
+        self.boot_connections = 0
+        self.pressed = None
+        self.released = None
+        self.handled_events = []
+        self.awaiting_screen = None
+        self.touch_to_action_ms = []
+        self.touch_to_action_virtual_ms = []
+        self.touch_to_screen_ms = []
+        self.touch_to_screen_virtual_ms = []
+        self.page_changes = 0
+        self.drawn_page = None
+        self.page_draw_ms = []
+        self.page_draw_ops = []
+        self.query_ms = []
+        self.querying = False
+        simulation.board_listeners.append(self.attach)
+
+    def attach(self, board):
+        """Starts listening to the board main.py has made and wraps the ButtonSet methods measured"""
+        from button_set import ButtonSet
+        from touch_events import TouchEvents
+        board.listeners.append(self.screen_updated)
+        board.touch.listeners.append(self.touched)
+        recorder = self
+        clock = self.simulation.clock
+        touch_to_action = ButtonSet.touch_to_action
+        draw_page = ButtonSet.draw_page
+        get_event = TouchEvents.get_event
+        calls = board.display.calls
+
+        def watched_get_event(events):
+            event = get_event(events)
+            if event:
+                recorder.handled_events.append(event[:2])
+            return event
+
+        def timed_touch_to_action(buttons):
+            if recorder.boot_ms is None:
+                recorder.booted()
+            recorder.handled_events = []
+            result = touch_to_action(buttons)
+            for kind, finger in recorder.handled_events:
+                if kind == 'press':
+                    touch, recorder.pressed = recorder.pressed, None
+                    if not buttons.fired_on_press[finger]:
+                        continue
+                else:
+                    touch, recorder.released = recorder.released, None
+                    if buttons.fired_on_press[finger]:
+                        continue
+                if touch is not None:
+                    recorder.touch_to_action_ms.append(1000*(time.perf_counter() - touch[0]))
+                    recorder.touch_to_action_virtual_ms.append(clock.elapsed_ms() - touch[1])
+                    recorder.awaiting_screen = touch
+            return result
+
+        def timed_draw_page(buttons):
+            if recorder.drawn_page is not None and ButtonSet.current_page != recorder.drawn_page:
+                recorder.page_changes += 1
+            recorder.drawn_page = ButtonSet.current_page
+            ops = sum(calls.values())
+            start = time.perf_counter()
+            draw_page(buttons)
+            recorder.page_draw_ms.append(1000*(time.perf_counter() - start))
+            recorder.page_draw_ops.append(sum(calls.values()) - ops)
+
+        ButtonSet.touch_to_action = timed_touch_to_action
+        ButtonSet.draw_page = timed_draw_page
+        TouchEvents.get_event = watched_get_event
+        import micropyLMS
+        import lms_connection
+        import lms_client
+        for player_class in (micropyLMS.Player, lms_connection.PooledPlayer):
+            self.time_queries(player_class)
+        async_player_query = lms_client.player_query
+
+        async def timed_async_player_query(player, *command):
+            start_us = clock.elapsed_us
+            try:
+                return await async_player_query(player, *command)
+            finally:
+                if recorder.boot_ms is not None:
+                    recorder.query_ms.append((clock.elapsed_us - start_us)/1000)
+
+        lms_client.player_query = timed_async_player_query
+
+    def time_queries(self, player_class):
+        """Wraps player_query() of a player class to time each query made after boot"""
+        recorder = self
+        clock = self.simulation.clock
+        player_query = player_class.player_query
+
+        def timed_player_query(player, *command):
+            if recorder.querying or recorder.boot_ms is None:
+                return player_query(player, *command)
+            recorder.querying = True
+            start_us = clock.elapsed_us
+            try:
+                return player_query(player, *command)
+            finally:
+                recorder.query_ms.append((clock.elapsed_us - start_us)/1000)
+                recorder.querying = False
+
+        player_class.player_query = timed_player_query
+
+    def booted(self):
+        """Records the end of the boot at the first pass of the main loop"""
+        stub = self.simulation.stub
+        self.boot_ms = 1000*(time.perf_counter() - self.started)
+        self.boot_virtual_ms = self.simulation.clock.elapsed_ms()
+        self.boot_requests = stub.count('jsonrpc') + stub.count('artwork')
+        self.boot_connections = stub.connections
+
+    def touched(self, kind: str, x: int, y: int, label: str | None):
+        touch = (time.perf_counter(), self.simulation.board.touch.event_ms)
+        if kind == 'press':
+            self.pressed = touch
+        else:
+            self.released = touch
+
+    def screen_updated(self, kind: str):
+        if self.awaiting_screen is not None:
+            touched_at, touched_virtual_ms = self.awaiting_screen
+            self.touch_to_screen_ms.append(1000*(time.perf_counter() - touched_at))
+            self.touch_to_screen_virtual_ms.append(self.simulation.clock.elapsed_ms() - touched_virtual_ms)
+            self.awaiting_screen = None
+
+    def results(self) -> dict:
+        """Returns the measurements of the run"""
+        stub = self.simulation.stub
+        since = self.boot_virtual_ms
+        minutes = max(1, self.simulation.clock.elapsed_ms() - since)/60000
+        requests = stub.count('jsonrpc', since) + stub.count('artwork', since)
+        commands = {}
+        for at, kind, name in stub.log:
+            if at >= since and kind in ('jsonrpc', 'artwork'):
+                name = f'{kind} {name}' if kind == 'artwork' else name
+                commands[name] = commands.get(name, 0) + 1
+        page_draws = len(self.page_draw_ops) - 1
+        return {"virtual_minutes": round(minutes, 2),
+                "boot_ms": round(self.boot_ms or 0, 1),
+                "boot_virtual_ms": self.boot_virtual_ms,
+                "boot_requests": self.boot_requests,
+                "boot_connections": self.boot_connections,
+                "requests_per_minute": round(requests/minutes, 2),
+                "connections_per_minute": round((stub.connections - self.boot_connections)/minutes, 2),
+                "subscription_connects": sum(1 for at, kind, name in stub.log
+                                             if at >= since and kind == 'cli' and name == 'subscribe'),
+                "page_changes": self.page_changes,
+                "page_draws_per_page_change": round(page_draws/self.page_changes, 2) if self.page_changes else 0,
+                "draw_ops_per_page_draw": round(sum(self.page_draw_ops[1:])/page_draws, 1) if page_draws > 0 else 0,
+                "page_draw_p50_ms": round(percentile(self.page_draw_ms[1:], 0.5), 2),
+                "touches": len(self.touch_to_action_ms),
+                "touch_to_action_p50_ms": round(percentile(self.touch_to_action_ms, 0.5), 2),
+                "touch_to_action_p95_ms": round(percentile(self.touch_to_action_ms, 0.95), 2),
+                "touch_to_screen_p50_ms": round(percentile(self.touch_to_screen_ms, 0.5), 2),
+                "touch_to_screen_p95_ms": round(percentile(self.touch_to_screen_ms, 0.95), 2),
+                "touch_to_action_p50_virtual_ms": percentile(self.touch_to_action_virtual_ms, 0.5),
+                "touch_to_action_p95_virtual_ms": percentile(self.touch_to_action_virtual_ms, 0.95),
+                "touch_to_screen_p50_virtual_ms": percentile(self.touch_to_screen_virtual_ms, 0.5),
+                "touch_to_screen_p95_virtual_ms": percentile(self.touch_to_screen_virtual_ms, 0.95),
+                "queries": len(self.query_ms),
+                "query_p50_virtual_ms": round(percentile(self.query_ms, 0.5), 2),
+                "query_p95_virtual_ms": round(percentile(self.query_ms, 0.95), 2),
+                "screen_updates": self.simulation.board.display.calls['update'] + self.simulation.board.display.calls['partial_update'],
+                "requests_by_command": commands}
+
+def run_scenario(name: str) -> dict:
+    """Runs one scenario in this process and returns its measurements"""
+    overrides, script, stub_settings = SCENARIOS[name]()
+    simulation = Simulation(overrides=overrides, stub_settings=stub_settings)
+    recorder = Recorder(simulation)
+    simulation.start()
+    try:
+        recorder.started = time.perf_counter()
+        ending = simulation.run(script)
+        results = recorder.results()
+        results["ending"] = ending
+        return results
+    finally:
+        simulation.close()
+
+def metric_kind(metric: str) -> str:
+    """Returns 'virtual_ms' for timings on the virtual clock, 'ms' for real time timings, or 'count'"""
+    if metric.endswith('_virtual_ms'):
+        return 'virtual_ms'
+    return 'ms' if metric.endswith('_ms') else 'count'
+
+def compare(results: dict, baseline: dict) -> list:
+    """
+    Compares results with a baseline. Lower is better for every measurement
+    in the baseline. Real time timings are not compared
+    Returns:
+        list of descriptions of the measurements that got worse by more
+        than the tolerance
+    """
+    tolerance = dict(DEFAULT_TOLERANCE)
+    tolerance.update(baseline.get('tolerance', {}))
+    regressions = []
+    for scenario, expected in baseline.get('scenarios', {}).items():
+        if scenario not in results:
+            continue
+        for metric, value in expected.items():
+            measured = results[scenario].get(metric)
+            if not isinstance(value, (int, float)) or not isinstance(measured, (int, float)):
+                continue
+            if metric_kind(metric) not in tolerance:
+                continue
+            allowed = tolerance[metric_kind(metric)]
+            limit = value*(1 + allowed['relative']) + allowed['absolute']
+            if measured > limit:
+                regressions.append(f'{scenario} {metric} is {measured}, more than the limit of {limit:.2f} from baseline {value}')
+    return regressions
+
+def compare_touch_latency(results: dict) -> list:
+    """
+    Compares the touch latency of each asyncio scenario with that of the
+    synchronous scenario with the same script and server, when both were run
+    Returns:
+        list of descriptions of the latencies that are worse than the
+        synchronous main loop's
+    """
+    regressions = []
+    for scenario, counterpart in SYNC_COUNTERPARTS.items():
+        if scenario not in results or counterpart not in results:
+            continue
+        for metric in ('touch_to_action_p50_virtual_ms', 'touch_to_action_p95_virtual_ms'):
+            measured, limit = results[scenario][metric], results[counterpart][metric]
+            if measured > limit:
+                regressions.append(f'{scenario} {metric} is {measured}, more than {limit} in {counterpart}')
+    return regressions
+
+def baseline_from(results: dict) -> dict:
+    """Makes a baseline from results, leaving out real time timings and the measurements that are only for information"""
+    skipped = ('virtual_minutes', 'touches', 'queries', 'page_changes', 'requests_by_command', 'ending')
+    return {"tolerance": DEFAULT_TOLERANCE,
+            "scenarios": {scenario: {metric: value for metric, value in measured.items()
+                                     if metric not in skipped and metric_kind(metric) != 'ms'}
+                          for scenario, measured in results.items()}}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scenario', action='append', choices=list(SCENARIOS),
+                        help='Scenario to run. Can be given more than once. All are run if not given')
+    parser.add_argument('--baseline', type=str, default=BASELINE_FILE, help='Baseline file to compare with')
+    parser.add_argument('--update_baseline', default=False, action='store_true',
+                        help='Write the results to the baseline file instead of comparing')
+    parser.add_argument('--output', type=str, default=None, help='File to write the results to')
+    parser.add_argument('--child', type=str, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        report_results(run_scenario(args.child))
+        sys.exit(0)
+
+    results = {}
+    for name in args.scenario or list(SCENARIOS):
+        results[name] = run_in_child('simulator.perf', '--child', name)
+        print(f'{name}:')
+        for metric, value in results[name].items():
+            if metric != 'requests_by_command':
+                print(f'    {metric:<34}{value}')
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=1)
+
+    if args.update_baseline:
+        # Scenarios that were not run keep their place in the baseline
+        baseline = baseline_from(results)
+        if os.path.isfile(args.baseline):
+            with open(args.baseline, 'r') as file:
+                baseline["scenarios"] = dict(json.load(file).get('scenarios', {}), **baseline["scenarios"])
+        with open(args.baseline, 'w') as file:
+            json.dump(baseline, file, indent=1)
+        print(f'Wrote baseline to {args.baseline}')
+        sys.exit(0)
+
+    if not os.path.isfile(args.baseline):
+        print(f'No baseline file {args.baseline} to compare with')
+        sys.exit(0)
+    with open(args.baseline, 'r') as file:
+        baseline = json.load(file)
+    regressions = compare(results, baseline) + compare_touch_latency(results)
+    for regression in regressions:
+        print(f'REGRESSION: {regression}')
+    if regressions:
+        sys.exit(1)
+    print('No regressions from the baseline')
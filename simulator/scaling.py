@@ -0,0 +1,278 @@
+"""
+scaling.py 2026-10-18 v 1.0
+
+Author: Brent Goode
+
+Benchmark of how ButtonSet scales with the number of buttons. Makes
+button_defs.json files with the project's own pages 0 to 3 followed by
+synthetic pages of buttons, from tens to thousands of buttons, runs each in
+the simulator in its own process, and measures the time to make the
+buttons, the cost of an idle pass of the main loop, the cost of drawing a
+page after a page change, and the heap used by each FunctionButton
+
+Heap use is measured with tracemalloc in CPython, so it shows how the
+button representation changes rather than the bytes used on the Presto. The
+boot profile's button setup phase gives the device's own figure.
+
+Usage:
+    python -m simulator.scaling
+    python -m simulator.scaling --buttons 10 100 1000 --grid 4x4 --output scaling.json
+    python -m simulator.scaling --compare scaling.json
+
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+from simulator import PROJECT_DIR, Simulation, TouchScript, report_results, run_in_child
+from simulator.perf import SWIPE_LEFT, SWIPE_RIGHT, button, percentile
+
+RESULTS_FORMAT = 1
+# The project's pages 0 to 3, with 21 buttons, are kept so the button
+# actions find the buttons they expect, so that is the smallest size
+DEFAULT_SIZES = (25, 50, 100, 250, 500, 1000, 2000)
+KEPT_PAGES = 4
+IDLE_MS = 20000
+PAGE_VISITS = 30
+HEAP_SAMPLE = 200
+
+def synthetic_buttons(total: int, rows: int, columns: int, project_buttons: list) -> list:
+    """
+    Returns button definitions with the project's first pages and enough
+    synthetic pages of rows by columns buttons to make total buttons
+    Args:
+        total: number of buttons wanted, which is never less than the
+            number on the kept pages
+        rows: rows on each synthetic page
+        columns: buttons in each row of a synthetic page
+        project_buttons: the buttons_defs list from the project's button_defs.json
+    """
+    buttons = [dict(item) for item in project_buttons if item['page'] < KEPT_PAGES]
+    symbols = sorted({item['symbol'] for item in project_buttons if item.get('symbol')})
+    number = 0
+    while len(buttons) < total:
+        page = KEPT_PAGES + number // (rows*columns)
+        row = number // columns % rows
+        column = number % columns
+        item = {"name": f"button {number}",
+                "page": page,
+                "row": row,
+                "column": column,
+                "fn_name": "next_page_w_interaction"}
+        if number % 2 and symbols:
+            item["symbol"] = symbols[number % len(symbols)]
+        else:
+            item["label"] = f"Button\n{number}"
+        if number % 3 == 0:
+            item["color"] = ["red", "green", "blue"][number % 9 // 3]
+        buttons.append(item)
+        number += 1
+    return buttons
+
+class ScalingRecorder:
+    """
+    Takes the measurements of one size
+
+    Attributes
+    ----------
+    simulation: Simulation
+        the run being measured
+    construct_ms: float
+        real milliseconds making the ButtonSet, not counting the setup of
+        the player, timers, and connections done by initialize_other_vars()
+    frame_us: list
+        real microseconds of each idle pass of the main loop
+    poll_us: list
+        real microseconds of the touch handling in each idle pass
+    page_draw_ms: list
+        real milliseconds of each draw_page() after the first
+    page_draw_ops: list
+        drawing calls made by each draw_page() after the first
+    """
+
+    def __init__(self, simulation: Simulation):
+        self.simulation = simulation
+        self.construct_ms = 0
+        self.idle_end_ms = None
+        self.last_frame = None
+        self.frame_us = []
+        self.poll_us = []
+        self.page_draw_ms = []
+        self.page_draw_ops = []
+        self.draws = 0
+        simulation.board_listeners.append(self.attach)
+
+    def attach(self, board):
+        """Wraps the ButtonSet methods measured once main.py has made the board"""
+        import button_action_fns
+        from button_set import ButtonSet
+        recorder = self
+        clock = self.simulation.clock
+        calls = board.display.calls
+        init = ButtonSet.__init__
+        initialize_other_vars = button_action_fns.initialize_other_vars
+        touch_to_action = ButtonSet.touch_to_action
+        draw_page = ButtonSet.draw_page
+        setup_ms = [0]
+
+        def timed_init(buttons, *args, **kwargs):
+            start = time.perf_counter()
+            init(buttons, *args, **kwargs)
+            recorder.construct_ms = 1000*(time.perf_counter() - start) - setup_ms[0]
+
+        def timed_initialize_other_vars(*args, **kwargs):
+            start = time.perf_counter()
+            initialize_other_vars(*args, **kwargs)
+            setup_ms[0] = 1000*(time.perf_counter() - start)
+
+        def timed_touch_to_action(buttons):
+            now = time.perf_counter()
+            if recorder.idle_end_ms is None:
+                recorder.idle_end_ms = clock.elapsed_ms() + IDLE_MS
+            elif clock.elapsed_ms() < recorder.idle_end_ms:
+                recorder.frame_us.append(1e6*(now - recorder.last_frame))
+            recorder.last_frame = now
+            result = touch_to_action(buttons)
+            if clock.elapsed_ms() < recorder.idle_end_ms:
+                recorder.poll_us.append(1e6*(time.perf_counter() - now))
+            return result
+
+        def timed_draw_page(buttons):
+            ops = sum(calls.values())
+            start = time.perf_counter()
+            draw_page(buttons)
+            if recorder.draws:
+                recorder.page_draw_ms.append(1000*(time.perf_counter() - start))
+                recorder.page_draw_ops.append(sum(calls.values()) - ops)
+            recorder.draws += 1
+
+        ButtonSet.__init__ = timed_init
+        button_action_fns.initialize_other_vars = timed_initialize_other_vars
+        ButtonSet.touch_to_action = timed_touch_to_action
+        ButtonSet.draw_page = timed_draw_page
+
+def heap_per_button(board, count: int, rows: int, columns: int, project_buttons: list) -> tuple:
+    """
+    Makes count more FunctionButtons like those on a synthetic page and
+    measures the heap they use
+    Returns:
+        tuple of bytes per button and attributes per button
+    """
+    from button_layout import layout_pages
+    from button_set import FunctionButton
+    kept = len([item for item in project_buttons if item['page'] < KEPT_PAGES])
+    template = [dict(item, page=0) for item in synthetic_buttons(kept + rows*columns, rows, columns, project_buttons)
+                if item['page'] == KEPT_PAGES]
+    width, height = board.display.get_bounds()
+    layout = layout_pages(template, width, height, 0.1, None, 'OpenSans-Regular.af', 'white')[0]
+    arguments = []
+    for row, button_width, columns in layout['rows']:
+        for column, x, y, button_info in columns:
+            arguments.append((x, y, button_width, layout['button_height'], (0, row, column), button_info))
+    made = []
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for number in range(count):
+        x, y, w, h, address, button_info = arguments[number % len(arguments)]
+        made.append(FunctionButton(x, y, w, h, address, **button_info))
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    attributes = len(getattr(made[0], '__dict__', {})) + len(getattr(type(made[0]), '__slots__', ()))
+    return used/count, attributes
+
+def run_size(total: int, rows: int, columns: int) -> dict:
+    """Runs one size in this process and returns its measurements"""
+    with open(os.path.join(PROJECT_DIR, 'button_defs.json'), 'r') as file:
+        project_buttons = json.load(file)['buttons_defs']
+    buttons_defs = synthetic_buttons(total, rows, columns, project_buttons)
+    pages = max(item['page'] for item in buttons_defs) + 1
+    # Go from the first menu page through the synthetic pages and back again
+    visits = min(PAGE_VISITS, pages - 2)
+    script = TouchScript().wait(IDLE_MS + 1000)
+    script.tap(button((1, 0, 0)), label='open menu').wait(500)
+    for visit in range(visits):
+        script.swipe(*SWIPE_LEFT).wait(300)
+    for visit in range(visits):
+        script.swipe(*SWIPE_RIGHT).wait(300)
+
+    simulation = Simulation(overrides={"buttons_defs": buttons_defs})
+    recorder = ScalingRecorder(simulation)
+    simulation.start()
+    try:
+        ending = simulation.run(script)
+        bytes_per_button, attributes = heap_per_button(simulation.board, HEAP_SAMPLE, rows, columns, project_buttons)
+    finally:
+        simulation.close()
+    return {"buttons": len(buttons_defs),
+            "pages": pages,
+            "ending": ending,
+            "construct_ms": round(recorder.construct_ms, 2),
+            "construct_us_per_button": round(1000*recorder.construct_ms/len(buttons_defs), 2),
+            "idle_frame_us_p50": round(percentile(recorder.frame_us, 0.5), 2),
+            "idle_frame_us_mean": round(sum(recorder.frame_us)/max(1, len(recorder.frame_us)), 2),
+            "idle_touch_us_p50": round(percentile(recorder.poll_us, 0.5), 2),
+            "page_draws": len(recorder.page_draw_ms),
+            "page_draw_ms_mean": round(sum(recorder.page_draw_ms)/max(1, len(recorder.page_draw_ms)), 3),
+            "page_draw_ms_p95": round(percentile(recorder.page_draw_ms, 0.95), 3),
+            "draw_ops_per_page_draw": round(sum(recorder.page_draw_ops)/max(1, len(recorder.page_draw_ops)), 1),
+            "heap_bytes_per_button": round(bytes_per_button, 1),
+            "attributes_per_button": attributes}
+
+def show_comparison(old: dict, new: dict):
+    """Prints the change in each measurement for the sizes in both results"""
+    old_sizes = {item['buttons']: item for item in old['results']}
+    for item in new['results']:
+        before = old_sizes.get(item['buttons'])
+        if not before:
+            continue
+        print(f"{item['buttons']} buttons:")
+        for metric, value in item.items():
+            if isinstance(value, (int, float)) and isinstance(before.get(metric), (int, float)) and metric != 'buttons':
+                change = f'{100*(value-before[metric])/before[metric]:+.1f}%' if before[metric] else ''
+                print(f'    {metric:<28}{before[metric]:>12} {value:>12} {change:>9}')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--buttons', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                        help='Total numbers of buttons to measure')
+    parser.add_argument('--grid', type=str, default='3x3', help='Rows and columns of each synthetic page, like 3x3')
+    parser.add_argument('--output', type=str, default=None, help='File to write the JSON results to')
+    parser.add_argument('--compare', type=str, default=None, help='Earlier results file to compare with')
+    parser.add_argument('--child', type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    rows, columns = [int(i) for i in args.grid.lower().split('x')]
+
+    if args.child:
+        report_results(run_size(args.child, rows, columns))
+        sys.exit(0)
+
+    results = {"format": RESULTS_FORMAT,
+               "date": time.strftime('%Y-%m-%d %H:%M:%S'),
+               "python": platform.python_version(),
+               "machine": platform.machine(),
+               "grid": f'{rows}x{columns}',
+               "results": []}
+    for total in args.buttons:
+        measured = run_in_child('simulator.scaling', '--child', total, '--grid', f'{rows}x{columns}')
+        results["results"].append(measured)
+        print(f"{measured['buttons']:>6} buttons {measured['pages']:>4} pages  "
+              f"construct {measured['construct_ms']:>8.1f} ms  "
+              f"idle frame {measured['idle_frame_us_p50']:>7.1f} us  "
+              f"page draw {measured['page_draw_ms_mean']:>6.2f} ms  "
+              f"heap {measured['heap_bytes_per_button']:>7.0f} B/button")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=1)
+        print(f'Wrote results to {args.output}')
+    else:
+        print(json.dumps(results))
+
+    if args.compare:
+        with open(args.compare, 'r') as file:
+            show_comparison(json.load(file), results)
@@ -0,0 +1,74 @@
+"""
+script.py 2026-10-18 v 1.0
+
+Author: Brent Goode
+
+Scripts of touches for the simulated touch screen
+
+"""
+
+class ScriptFinished(BaseException):
+    """
+    Raised by the simulated touch screen when its script has run out, to stop
+    main.py's endless loop. It is not an Exception so that the controller's
+    own error handling does not catch it
+    """
+
+class TouchScript:
+    """
+    A timed list of what the first finger does on the touch screen
+
+    Times are in milliseconds of simulated time from when the script is
+    loaded into the touch screen. Positions are (x, y) tuples or functions
+    that return one when the touch happens, so a touch can aim at wherever a
+    button is at that moment.
+
+    Attributes
+    ----------
+    samples: list
+        [time, pressed, position, label] for each change of the finger
+    end: int
+        time the script finishes
+
+    Methods
+    -------
+    wait(ms: int) -> TouchScript
+        adds time with no touches
+    tap(position, hold_ms: int, label: str) -> TouchScript
+        adds a press and release in one place
+    long_press(position, hold_ms: int, label: str) -> TouchScript
+        adds a press held long enough to be a long press
+    swipe(start, end, duration_ms: int, steps: int, label: str) -> TouchScript
+        adds a press that moves from start to end before it is released
+    """
+
+    def __init__(self):
+        """Inits an empty TouchScript"""
+        self.samples = []
+        self.end = 0
+
+    def wait(self, ms: int):
+        """Adds ms of time with no touches"""
+        self.end += ms
+        return self
+
+    def tap(self, position, hold_ms: int = 60, label: str | None = None):
+        """Adds a press and release at position, then waits for hold_ms"""
+        self.samples.append([self.end, True, position, label])
+        self.samples.append([self.end + hold_ms, False, position, label])
+        self.end += 2*hold_ms
+        return self
+
+    def long_press(self, position, hold_ms: int = 900, label: str | None = None):
+        """Adds a press held for hold_ms at position"""
+        return self.tap(position, hold_ms, label)
+
+    def swipe(self, start: tuple, end: tuple, duration_ms: int = 200, steps: int = 5, label: str | None = None):
+        """Adds a press at start that moves to end in duration_ms and is then released"""
+        for step in range(steps + 1):
+            position = (start[0] + (end[0]-start[0])*step//steps,
+                        start[1] + (end[1]-start[1])*step//steps)
+            self.samples.append([self.end + duration_ms*step//steps, True, position, label])
+        self.samples.append([self.end + duration_ms + 20, False, end, label])
+        self.end += duration_ms + 100
+        return self
@@ -0,0 +1,22 @@
+"""
+simulator.tests 2026-10-18 v 1.0
+
+Author: Brent Goode
+
+Unit tests of the controller's modules. They run on a computer with the
+simulator's stand ins for the device modules, so lib and simulator/device
+are put at the front of the import path here. Run them from the project
+directory with:
+
+    python3 -m unittest discover -s simulator/tests -t .
+
+"""
+
+import os
+import sys
+
+from simulator import PROJECT_DIR, DEVICE_DIR
+
+for path in (os.path.join(PROJECT_DIR, 'lib'), DEVICE_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,238 @@
+"""
+test_button_action_fns.py 2026-10-18 v 1.0
+
+Author: Brent Goode
+
+Tests of the button action functions that talk to the LMS server, with the
+server's answers stood in for
+
+"""
+
+import asyncio
+import unittest
+
+import simulator.tests
+from simulator.clock import VirtualClock
+import button_action_fns
+import lms_client
+import micropytimer
+import utils
+from player_state import PlayerState
+
+class SlowStatus:
+    """
+    Stand in for lms_client.status_update() that answers only when released
+
+    Attributes
+    ----------
+    requests: int
+        number of status requests sent
+    release: asyncio.Event
+        set to let the requests waiting for their response finish
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.release = asyncio.Event()
+
+    async def status_update(self, player) -> bool:
+        self.requests += 1
+        await self.release.wait()
+        return True
+
+class UpdateStatusTest(unittest.TestCase):
+
+    def setUp(self):
+        self.status_update = lms_client.status_update
+        self.player = getattr(button_action_fns, 'player', None)
+        self.player_state = button_action_fns.player_state
+        button_action_fns.player = None
+        button_action_fns.player_state = None
+        utils.async_mode = True
+
+    def tearDown(self):
+        lms_client.status_update = self.status_update
+        button_action_fns.player = self.player
+        button_action_fns.player_state = self.player_state
+        button_action_fns.status_request = None
+        utils.async_mode = False
+
+    def test_callers_share_request_in_flight(self):
+        """A caller while a status request is waiting for its response gets that response"""
+        async def run():
+            status = SlowStatus()
+            lms_client.status_update = status.status_update
+            first = asyncio.create_task(button_action_fns.update_status())
+            await asyncio.sleep(0)
+            second = asyncio.create_task(button_action_fns.update_status())
+            await asyncio.sleep(0)
+            status.release.set()
+            return await first, await second, status.requests
+
+        self.assertEqual(asyncio.run(asyncio.wait_for(run(), 1)), (True, True, 1))
+
+    def test_new_request_after_response(self):
+        """A caller after the response has come sends a new request"""
+        async def run():
+            status = SlowStatus()
+            status.release.set()
+            lms_client.status_update = status.status_update
+            await button_action_fns.update_status()
+            await button_action_fns.update_status()
+            return status.requests
+
+        self.assertEqual(asyncio.run(asyncio.wait_for(run(), 1)), 2)
+
+class StubPlayer:
+    """Player whose status update sets its muting to the server's"""
+
+    def __init__(self):
+        self.muting = False
+        self.server_muting = False
+
+    def status_update(self) -> bool:
+        self.muting = self.server_muting
+        return True
+
+class CheckPlayerStateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = VirtualClock()
+        self.clock.install()
+        self.player = StubPlayer()
+        self.saved = (getattr(button_action_fns, 'player', None), button_action_fns.player_state)
+        button_action_fns.player = self.player
+        button_action_fns.player_state = PlayerState(self.player, 3000)
+        micropytimer.setup_timer('player_state_check', {"interval": 3000,
+                                                        "action": "check_player_state",
+                                                        "library": "button_action_fns",
+                                                        "running": False})
+        self.rolled_back = []
+
+    def tearDown(self):
+        button_action_fns.player, button_action_fns.player_state = self.saved
+        micropytimer.timer_registry.pop('player_state_check', None)
+        self.clock.uninstall()
+
+    def toggle(self):
+        """Mutes with a command that the server accepts"""
+        async def command(value):
+            return True
+        button_action_fns.send_toggle('muting', True, command, self.rolled_back.append)
+
+    def test_confirmed_after_settle_ms(self):
+        """A change made by the server is confirmed by the status requested after settle_ms"""
+        self.toggle()
+        self.player.server_muting = True
+        self.clock.advance(3000)
+        micropytimer.check_timers()
+        self.assertIn('muting', button_action_fns.player_state.expected)
+        self.clock.advance(1)
+        micropytimer.check_timers()
+        self.assertEqual(button_action_fns.player_state.expected, {})
+        self.assertTrue(self.player.muting)
+        self.assertEqual(self.rolled_back, [])
+
+    def test_rolled_back_after_settle_ms(self):
+        """A change the server has not made is rolled back by the status requested after settle_ms"""
+        self.toggle()
+        self.clock.advance(3001)
+        micropytimer.check_timers()
+        self.assertEqual(button_action_fns.player_state.expected, {})
+        self.assertEqual(self.rolled_back, [False])
+
+class PlayingPlayer:
+    """Player playing position seconds into its track"""
+
+    def __init__(self, position: float):
+        self.playing_at = position
+
+    def position(self) -> float:
+        return self.playing_at
+
+class CommandCoalescingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = VirtualClock()
+        self.clock.install()
+        self.saved = (getattr(button_action_fns, 'player', None), button_action_fns.query_player,
+                      button_action_fns.command_window)
+        button_action_fns.player = PlayingPlayer(60)
+        button_action_fns.command_window = 300
+        micropytimer.setup_timer('command_flush', {"interval": 300,
+                                                   "action": "flush_commands",
+                                                   "library": "button_action_fns",
+                                                   "running": False})
+        self.sent = []
+        async def query_player(*command):
+            self.sent.append(command)
+            return True
+        button_action_fns.query_player = query_player
+
+    def tearDown(self):
+        button_action_fns.player, button_action_fns.query_player, button_action_fns.command_window = self.saved
+        button_action_fns.pending_commands.clear()
+        micropytimer.timer_registry.pop('command_flush', None)
+        self.clock.uninstall()
+
+    def presses(self, *commands) -> list:
+        """Queues each (name, amount) and returns the requests sent when the window ends"""
+        for name, amount in commands:
+            button_action_fns.queue_command(name, amount)
+        self.assertEqual(self.sent, [])
+        self.clock.advance(301)
+        micropytimer.check_timers()
+        return self.sent
+
+    def test_volume_summed(self):
+        """Volume presses in one window are sent as their sum"""
+        self.assertEqual(self.presses(('volume', 5), ('volume', 5), ('volume', -3)),
+                         [('mixer', 'volume', '+7')])
+
+    def test_volume_down_summed(self):
+        """A net volume decrease is sent with its sign"""
+        self.assertEqual(self.presses(('volume', -5), ('volume', -5)), [('mixer', 'volume', '-10')])
+
+    def test_cancelling_presses_send_nothing(self):
+        """Presses that add up to nothing send no request"""
+        self.assertEqual(self.presses(('volume', 5), ('volume', -5), ('skip', 1), ('skip', -1)), [])
+
+    def test_single_skips(self):
+        """One press forward or back is sent as the remote's button"""
+        self.assertEqual(self.presses(('skip', 1)), [('button', 'fwd.single')])
+        self.sent.clear()
+        self.assertEqual(self.presses(('skip', -1)), [('button', 'rew.single')])
+
+    def test_skips_forward_summed(self):
+        """Several presses forward are sent as one jump in the playlist"""
+        self.assertEqual(self.presses(('skip', 1), ('skip', 1), ('skip', 1)), [('playlist', 'index', '+3')])
+
+    def test_skips_back_past_rewind_threshold(self):
+        """Past the rewind threshold the first press back only goes to the start of the track"""
+        self.assertEqual(self.presses(('skip', -1), ('skip', -1), ('skip', -1)), [('playlist', 'index', '-2')])
+
+    def test_skips_back_within_rewind_threshold(self):
+        """Within the rewind threshold every press back goes back a track"""
+        button_action_fns.player = PlayingPlayer(2)
+        self.assertEqual(self.presses(('skip', -1), ('skip', -1), ('skip', -1)), [('playlist', 'index', '-3')])
+
+    def test_position_at_first_press(self):
+        """The rewind threshold is judged at the first press back"""
+        button_action_fns.player = PlayingPlayer(2)
+        button_action_fns.queue_command('skip', -1)
+        button_action_fns.player.playing_at = 60
+        self.assertEqual(self.presses(('skip', -1)), [('playlist', 'index', '-2')])
+
+    def test_seek_summed(self):
+        """Seek presses in one window are sent as their sum"""
+        self.assertEqual(self.presses(('seek', 10), ('seek', 10)), [('time', '+20')])
+        self.sent.clear()
+        self.assertEqual(self.presses(('seek', 10), ('seek', -30)), [('time', '-20')])
+
+    def test_each_kind_sent_once(self):
+        """Volume, skip, and seek presses in one window are each sent as one request"""
+        self.assertEqual(self.presses(('seek', 10), ('volume', 2), ('skip', 1), ('volume', 2), ('skip', 1)),
+                         [('mixer', 'volume', '+4'), ('playlist', 'index', '+2'), ('time', '+10')])
+
+if __name__ == '__main__':
+    unittest.main()
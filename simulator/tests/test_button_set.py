@@ -0,0 +1,97 @@
+"""
+test_button_set.py 2026-10-18 v 1.0
+
+Author: Brent Goode
+
+Tests of when a ButtonSet triggers button actions for touch events, with the
+touch controller and page layout stood in for
+
+"""
+
+import unittest
+
+import simulator.tests
+from button_set import ButtonSet
+from touch_events import PRESS, RELEASE, LONG_PRESS, SWIPE_LEFT
+
+class QueuedEvents:
+    """Stand in for TouchEvents that hands out the events given to it"""
+
+    def __init__(self):
+        self.queue = []
+
+    def poll(self):
+        pass
+
+    def get_event(self) -> tuple | None:
+        if self.queue:
+            return self.queue.pop(0)
+        return None
+
+class StubButton:
+    """Button that records each time its action runs"""
+
+    def __init__(self, address: tuple, runs: list):
+        self.address = address
+        self.fn = lambda: runs.append(address)
+        self.arg = None
+
+class TouchToActionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.current_page = ButtonSet.current_page
+        ButtonSet.current_page = 1
+        self.runs = []
+        self.long_presses = []
+        self.swipes = []
+        self.buttons = ButtonSet.__new__(ButtonSet)
+        self.buttons.touch_events = QueuedEvents()
+        self.buttons.long_press_actions = {}
+        self.buttons.fired_on_press = [False, False]
+        self.buttons.swipe_left_fn = lambda: self.swipes.append('left')
+        self.buttons.swipe_right_fn = None
+        self.buttons.swipe_min_page = 2
+        self.button = StubButton((1, 0, 0), self.runs)
+        self.buttons.button_at = lambda x, y: self.button if x < 100 else None
+
+    def tearDown(self):
+        ButtonSet.current_page = self.current_page
+
+    def touch(self, *events) -> list:
+        """Handles each (kind, x) touch of the first finger in its own pass and returns the actions run"""
+        for kind, x in events:
+            self.buttons.touch_events.queue.append((kind, 0, x, 10))
+            self.buttons.touch_to_action()
+        return self.runs
+
+    def test_fires_on_press(self):
+        """An ordinary button acts when pressed and not again when released"""
+        self.assertEqual(self.touch((PRESS, 10)), [(1, 0, 0)])
+        self.assertEqual(self.touch((RELEASE, 10)), [(1, 0, 0)])
+
+    def test_press_in_gap(self):
+        """A press that misses every button does nothing, nor does its release"""
+        self.assertEqual(self.touch((PRESS, 200), (RELEASE, 200)), [])
+
+    def test_release_after_page_change(self):
+        """A release over another page's button after the press acted does not act again"""
+        self.assertEqual(self.touch((PRESS, 10), (LONG_PRESS, 10), (RELEASE, 10)), [(1, 0, 0)])
+
+    def test_long_press_button_waits(self):
+        """A button with a long press action waits to see which press it is"""
+        self.buttons.long_press_actions[(1, 0, 0)] = lambda: self.long_presses.append('held')
+        self.assertEqual(self.touch((PRESS, 10)), [])
+        self.assertEqual(self.touch((RELEASE, 10)), [(1, 0, 0)])
+        self.assertEqual(self.touch((PRESS, 10), (LONG_PRESS, 10)), [(1, 0, 0)])
+        self.assertEqual(self.long_presses, ['held'])
+
+    def test_swipe_page_waits(self):
+        """On a page that can be swiped a button acts when released, and a swipe does not press it"""
+        ButtonSet.current_page = 2
+        self.assertEqual(self.touch((PRESS, 10)), [])
+        self.assertEqual(self.touch((RELEASE, 10)), [(1, 0, 0)])
+        self.assertEqual(self.touch((PRESS, 10), (SWIPE_LEFT, 10)), [(1, 0, 0)])
+        self.assertEqual(self.swipes, ['left'])
+
+if __name__ == '__main__':
+    unittest.main()
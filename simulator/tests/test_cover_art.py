@@ -0,0 +1,89 @@
+"""
+test_cover_art.py 2026-10-18 v 1.0
+
+Author: Brent Goode
+
+Tests of swapping prefetched covers into the cover buffer while downloads
+are still running in the asyncio main loop
+
+"""
+
+import asyncio
+import unittest
+
+import simulator.tests
+import lms_client
+import utils
+from cover_art import CoverArt
+
+class SlowDownloads:
+    """
+    Stand in for lms_client.fetch_into() where each download writes the
+    first letter of its url into the buffer straight away, and fills the
+    rest of the image with it only when released
+
+    Attributes
+    ----------
+    release: dict
+        events that let the download of each url finish
+    """
+
+    def __init__(self):
+        self.release = {}
+
+    def gate(self, url: str) -> asyncio.Event:
+        """Returns the event that lets the download of url finish"""
+        return self.release.setdefault(url, asyncio.Event())
+
+    async def fetch_into(self, url: str, buffer: bytearray, chunk_size: int = 2048) -> int:
+        buffer[0] = ord(url[0])
+        await self.gate(url).wait()
+        buffer[:8] = url[0].encode()*8
+        return 8
+
+class PrefetchSwapTest(unittest.TestCase):
+
+    def setUp(self):
+        self.downloads = SlowDownloads()
+        self.fetch_into = lms_client.fetch_into
+        lms_client.fetch_into = self.downloads.fetch_into
+        utils.async_mode = True
+
+    def tearDown(self):
+        lms_client.fetch_into = self.fetch_into
+        utils.async_mode = False
+
+    def test_fetch_during_next_prefetch(self):
+        """A fetch of the last prefetched cover while the next prefetch downloads gets whole covers"""
+        async def run():
+            cover_art = CoverArt(64, prefetch=True)
+            self.downloads.gate('A').set()
+            self.downloads.gate('B').set()
+            self.assertEqual(bytes(await cover_art.fetch('A')), b'A'*8)
+            self.assertTrue(await cover_art.prefetch('B'))
+            prefetch_c = asyncio.create_task(cover_art.prefetch('C'))
+            await asyncio.sleep(0)
+            fetched_b = bytes(await cover_art.fetch('B'))
+            self.downloads.gate('C').set()
+            await prefetch_c
+            fetched_c = bytes(await cover_art.fetch('C'))
+            return fetched_b, fetched_c
+
+        fetched_b, fetched_c = asyncio.run(asyncio.wait_for(run(), 1))
+        self.assertEqual(fetched_b, b'B'*8)
+        self.assertEqual(fetched_c, b'C'*8)
+
+    def test_one_prefetch_at_a_time(self):
+        """A prefetch asked for while another is downloading is not started"""
+        async def run():
+            cover_art = CoverArt(64, prefetch=True)
+            prefetch_b = asyncio.create_task(cover_art.prefetch('B'))
+            await asyncio.sleep(0)
+            refused = await cover_art.prefetch('C')
+            self.downloads.gate('B').set()
+            return refused, await prefetch_b, cover_art.prefetch_key
+
+        self.assertEqual(asyncio.run(asyncio.wait_for(run(), 1)), (False, True, 'B'))
+
+if __name__ == '__main__':
+    unittest.main()
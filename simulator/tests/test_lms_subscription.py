@@ -0,0 +1,113 @@
+"""
+test_lms_subscription.py 2026-10-18 v 1.0
+
+Author: Brent Goode
+
+Tests of the status subscription against the stub LMS server's command line
+interface, on the simulator's virtual clock
+
+"""
+
+import select
+import socket
+import unittest
+
+import simulator.tests
+from simulator.clock import VirtualClock
+from simulator.lms_stub import StubLMS
+from lms_subscription import StatusSubscription
+
+PLAYER_ID = '00:04:20:00:00:01'
+OTHER_PLAYER_ID = '00:04:20:00:00:02'
+
+class StatusSubscriptionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = VirtualClock()
+        self.clock.install()
+        self.stub = StubLMS()
+        self.stub.start()
+        self.clock.watch(self.stub)
+        self.subscription = StatusSubscription('127.0.0.1', self.stub.cli_port, PLAYER_ID,
+                                               retry_ms=1000, keepalive_ms=2000, timeout_ms=500)
+        self.assertTrue(self.subscription.connect())
+        self.clock.settle()
+        # Reads the server's echo of the subscribe command
+        self.arrived()
+        self.assertFalse(self.subscription.poll())
+
+    def tearDown(self):
+        self.subscription.close()
+        self.stub.stop()
+        self.clock.uninstall()
+
+    def arrived(self):
+        """Waits for anything the server has sent to reach the subscription"""
+        select.select([self.subscription.sock], [], [], 1)
+
+    def test_mixer_notification(self):
+        """A volume change of the player is reported"""
+        self.stub.handle(PLAYER_ID, ['mixer', 'volume', '40'])
+        self.arrived()
+        self.assertTrue(self.subscription.poll())
+
+    def test_other_player_ignored(self):
+        """A change of another player is not reported"""
+        self.stub.handle(OTHER_PLAYER_ID, ['pause', '1'])
+        self.arrived()
+        self.assertFalse(self.subscription.poll())
+        self.assertTrue(self.subscription.connected)
+
+    def test_for_player(self):
+        """Notification lines match the player id however the colons are escaped"""
+        self.assertTrue(self.subscription._for_player(b'00%3A04%3A20%3A00%3A00%3A01 mixer volume 40'))
+        self.assertTrue(self.subscription._for_player(b'00%3a04%3a20%3a00%3a00%3a01 pause 1'))
+        self.assertTrue(self.subscription._for_player(b'00:04:20:00:00:01 power 0'))
+        self.assertFalse(self.subscription._for_player(b'00%3A04%3A20%3A00%3A00%3A02 pause 1'))
+        self.assertFalse(self.subscription._for_player(b'subscribe power,playlist'))
+
+    def test_reconnect(self):
+        """A subscription closed by the server reconnects after retry_ms"""
+        self.stub.subscribers[0][0].shutdown(socket.SHUT_RDWR)
+        self.arrived()
+        self.assertFalse(self.subscription.poll())
+        self.assertFalse(self.subscription.connected)
+        self.clock.advance(500)
+        self.assertFalse(self.subscription.poll())
+        self.clock.advance(500)
+        self.assertTrue(self.subscription.poll())
+        self.assertTrue(self.subscription.connected)
+        self.clock.settle()
+        self.stub.handle(PLAYER_ID, ['stop'])
+        self.arrived()
+        self.assertTrue(self.subscription.poll())
+
+    def test_keepalive_answered(self):
+        """A quiet connection is checked and stays up when the server answers"""
+        self.clock.advance(2000)
+        self.subscription.poll()
+        self.assertIsNotNone(self.subscription.keepalive_sent)
+        self.clock.settle()
+        self.arrived()
+        self.subscription.poll()
+        self.assertIsNone(self.subscription.keepalive_sent)
+        self.clock.advance(500)
+        self.subscription.poll()
+        self.assertTrue(self.subscription.connected)
+
+    def test_keepalive_not_answered(self):
+        """A connection that stops answering is taken to be down after timeout_ms"""
+        answer_cli = self.stub.answer_cli
+        self.stub.answer_cli = lambda handler, subscriber, raw_line: \
+            None if raw_line.startswith(b'version') else answer_cli(handler, subscriber, raw_line)
+        self.clock.advance(2000)
+        self.subscription.poll()
+        self.clock.advance(499)
+        self.subscription.poll()
+        self.assertTrue(self.subscription.connected)
+        self.clock.advance(1)
+        self.subscription.poll()
+        self.assertFalse(self.subscription.connected)
+
+if __name__ == '__main__':
+    unittest.main()